@@ -1,5 +1,6 @@
 from typing import Optional, Any
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+from app.common.models.plan import CompiledPlan, compile_plan
 
 
 class Input(BaseModel):
@@ -41,7 +42,34 @@ class Echo(BaseModel):
 
     inputs: dict[str, Input] = Field(default_factory=dict)
     permissions: PermissionSet = Field(..., description="permissions and tools")
+    plan: list[Step] = Field(
+        default_factory=list, description="Steps to run, wired by ${{ }} references"
+    )
     returns: dict[str, str] = Field(
         ...,
         description="Return info for the spec (eg:  summary: ${{ summarize.output }})",
     )
+
+    # Compiled on validation; a plain slot (like EchoEvent's hash cache) so it
+    # stays out of equality and dumps. Unpickled copies recompile on access.
+    __slots__ = ("_compiled",)
+
+    @model_validator(mode="after")
+    def compile_steps(self):
+        object.__setattr__(
+            self, "_compiled", compile_plan(self.plan, self.inputs, self.returns)
+        )
+        return self
+
+    @property
+    def compiled(self) -> CompiledPlan:
+        """The plan's step DAG with every ${{ }} template already parsed."""
+        compiled = getattr(self, "_compiled", None)
+        if compiled is None:
+            compiled = compile_plan(self.plan, self.inputs, self.returns)
+            object.__setattr__(self, "_compiled", compiled)
+        return compiled
+
+    def reuse_compiled(self, previous: "Echo") -> None:
+        """Share `previous`'s compiled plan; only valid if plan, inputs and returns match."""
+        object.__setattr__(self, "_compiled", previous.compiled)
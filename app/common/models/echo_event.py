@@ -1,10 +1,18 @@
 import hashlib
 import json
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from datetime import datetime, timezone
 from typing_extensions import override
 from pydantic import BaseModel, Field, computed_field
 
+_object_setattr = object.__setattr__
+_FIELDS = frozenset(("name", "source", "payload", "timestamp"))
+
+
+def canonical_json(value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Stable JSON encoding (sorted keys, no whitespace) used for hashing."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=default)
+
 
 class EchoEvent(BaseModel):
     name: str = Field(..., description="Name of the event")
@@ -14,19 +22,70 @@ class EchoEvent(BaseModel):
     )
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-    @computed_field
-    @property
-    def hash(self) -> str:
+    # The digest is computed on first access and dropped whenever a field is
+    # reassigned. In-place mutation of `payload` is not detected; call
+    # invalidate_hash() after doing that. A plain slot rather than a pydantic
+    # private attribute, which would double the cost of every validation;
+    # it is also left out of equality and of model_copy().
+    __slots__ = ("_hash",)
+
+    @classmethod
+    def from_trusted(
+        cls,
+        name: str,
+        source: str,
+        payload: Optional[Dict],
+        timestamp: datetime,
+        hash: Optional[str] = None,
+    ) -> "EchoEvent":
+        """
+        Build an event from values that are already known to be valid (e.g.
+        decoded from a trusted producer), skipping pydantic validation.
+        Cheaper than both validation and model_construct(). A transmitted
+        `hash` is trusted as-is.
+        """
+        event = cls.__new__(cls)
+        _object_setattr(
+            event,
+            "__dict__",
+            {
+                "name": name,
+                "source": source,
+                "payload": payload,
+                "timestamp": timestamp,
+            },
+        )
+        _object_setattr(event, "__pydantic_fields_set__", set(_FIELDS))
+        _object_setattr(event, "__pydantic_extra__", None)
+        _object_setattr(event, "__pydantic_private__", None)
+        if hash is not None:
+            _object_setattr(event, "_hash", hash)
+        return event
+
+    @override
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _FIELDS:
+            self.invalidate_hash()
+
+    def invalidate_hash(self) -> None:
+        _object_setattr(self, "_hash", None)
+
+    def _canonical(self) -> bytes:
         ts = self.timestamp.replace(tzinfo=timezone.utc).isoformat(
             timespec="milliseconds"
         )
-        payload_str = (
-            json.dumps(self.payload, sort_keys=True, separators=(",", ":"))
-            if self.payload is not None
-            else ""
-        )
-        data = f"{ts}|{self.name}|{self.source}|{payload_str}"
-        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+        payload_str = canonical_json(self.payload) if self.payload is not None else ""
+        return f"{ts}|{self.name}|{self.source}|{payload_str}".encode("utf-8")
+
+    @computed_field
+    @property
+    def hash(self) -> str:
+        digest = getattr(self, "_hash", None)
+        if digest is None:
+            digest = hashlib.sha256(self._canonical()).hexdigest()
+            _object_setattr(self, "_hash", digest)
+        return digest
 
     @override
     def __str__(self) -> str:
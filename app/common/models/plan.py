@@ -0,0 +1,280 @@
+import heapq
+import json
+import re
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from app.common.models.echo import Step
+
+# ${{ clone_repo.output.repo_path }}
+TEMPLATE = re.compile(r"\$\{\{\s*(.*?)\s*\}\}", re.DOTALL)
+_PATH = re.compile(r"[A-Za-z_][\w-]*(\.[\w-]+)*")
+
+INPUTS = "inputs"
+OUTPUT = "output"
+
+
+class Ref:
+    """
+    A parsed `${{ ... }}` expression: `inputs.<name>[.path]` or
+    `<step>.output[.path]`, resolved by walking mappings (or attributes).
+    """
+
+    __slots__ = ("source", "key", "path")
+
+    def __init__(self, source: str, key: str, path: Tuple[str, ...]):
+        # `source` is INPUTS or OUTPUT; `key` the input name or step id
+        self.source = source
+        self.key = key
+        self.path = path
+
+    def render(self, inputs: Mapping[str, Any], outputs: Mapping[str, Any]) -> Any:
+        value = (inputs if self.source == INPUTS else outputs)[self.key]
+        for part in self.path:
+            if type(value) is dict or isinstance(value, Mapping):
+                value = value[part]
+            else:
+                value = getattr(value, part)
+        return value
+
+    def refs(self) -> Iterable["Ref"]:
+        yield self
+
+
+class Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def render(self, inputs: Mapping[str, Any], outputs: Mapping[str, Any]) -> Any:
+        return self.value
+
+    def refs(self) -> Iterable[Ref]:
+        return ()
+
+
+class Template:
+    """A string mixing literal text and references; always renders to a str."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: List[Any]):
+        self.parts = parts
+
+    def render(self, inputs: Mapping[str, Any], outputs: Mapping[str, Any]) -> str:
+        rendered = []
+        for part in self.parts:
+            if type(part) is str:
+                rendered.append(part)
+                continue
+            value = part.render(inputs, outputs)
+            rendered.append(value if type(value) is str else _to_text(value))
+        return "".join(rendered)
+
+    def refs(self) -> Iterable[Ref]:
+        return (part for part in self.parts if not isinstance(part, str))
+
+
+class Items:
+    """A dict or list containing templates somewhere below it."""
+
+    __slots__ = ("items", "as_list")
+
+    def __init__(self, items: List[Tuple[Any, Any]], as_list: bool):
+        self.items = items
+        self.as_list = as_list
+
+    def render(self, inputs: Mapping[str, Any], outputs: Mapping[str, Any]) -> Any:
+        if self.as_list:
+            return [node.render(inputs, outputs) for _, node in self.items]
+        return {key: node.render(inputs, outputs) for key, node in self.items}
+
+    def refs(self) -> Iterable[Ref]:
+        for _, node in self.items:
+            yield from node.refs()
+
+
+def _to_text(value: Any) -> str:
+    # Step outputs spilled to a blob store (OutputHandle) render as their
+    # text, read whole; as_text() refuses those past the store's text_bytes
+    as_text = getattr(value, "as_text", None)
+    if as_text is not None:
+        return as_text()
+    return json.dumps(value, default=str)
+
+
+def parse_expression(expression: str) -> Ref:
+    if not _PATH.fullmatch(expression):
+        raise ValueError(f"Unsupported expression '${{{{ {expression} }}}}'")
+    head, *path = expression.split(".")
+    if head == INPUTS:
+        if not path:
+            raise ValueError("'inputs' must be followed by an input name")
+        return Ref(INPUTS, path[0], tuple(path[1:]))
+    if not path or path[0] != OUTPUT:
+        raise ValueError(
+            f"Unsupported expression '${{{{ {expression} }}}}', "
+            f"expected '<step>.output' or 'inputs.<name>'"
+        )
+    return Ref(OUTPUT, head, tuple(path[1:]))
+
+
+def compile_value(value: Any):
+    """Parse every template in `value` once into a renderable node."""
+    if isinstance(value, str):
+        if "${{" not in value:
+            return Const(value)
+        whole = TEMPLATE.fullmatch(value)
+        if whole is not None and "${{" not in whole.group(1):
+            # A lone expression keeps the referenced value's type
+            return parse_expression(whole.group(1))
+        matches = list(TEMPLATE.finditer(value))
+        parts: List[Any] = []
+        last = 0
+        for match in matches:
+            if match.start() > last:
+                parts.append(value[last : match.start()])
+            parts.append(parse_expression(match.group(1)))
+            last = match.end()
+        if last < len(value):
+            parts.append(value[last:])
+        return Template(parts)
+    if isinstance(value, (dict, list)):
+        pairs = value.items() if isinstance(value, dict) else enumerate(value)
+        items = [(key, compile_value(item)) for key, item in pairs]
+        if all(isinstance(node, Const) for _, node in items):
+            return Const(value)
+        return Items(items, as_list=isinstance(value, list))
+    return Const(value)
+
+
+class CompiledStep:
+    __slots__ = ("id", "use", "output", "args", "deps")
+
+    def __init__(self, id: str, use: str, output: Optional[str], args, deps):
+        self.id = id
+        self.use = use
+        self.output = output
+        self.args = args
+        # Ids of the steps whose output this step reads
+        self.deps: FrozenSet[str] = deps
+
+    def render_args(
+        self, inputs: Mapping[str, Any], outputs: Mapping[str, Any]
+    ) -> Dict[str, Any]:
+        return self.args.render(inputs, outputs)
+
+
+class CompiledPlan:
+    """
+    A spec's plan with all templates parsed and its dependency DAG built.
+
+    `order` is a topological order that keeps declaration order where the
+    DAG allows it; `dependents` maps each step to the steps reading its output.
+    """
+
+    __slots__ = ("steps", "order", "dependents", "returns")
+
+    def __init__(
+        self,
+        steps: Dict[str, CompiledStep],
+        order: Tuple[str, ...],
+        dependents: Dict[str, Tuple[str, ...]],
+        returns: Dict[str, Any],
+    ):
+        self.steps = steps
+        self.order = order
+        self.dependents = dependents
+        self.returns = returns
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def render_returns(
+        self, inputs: Mapping[str, Any], outputs: Mapping[str, Any]
+    ) -> Dict[str, Any]:
+        return {key: node.render(inputs, outputs) for key, node in self.returns.items()}
+
+
+def compile_plan(
+    plan: List["Step"], inputs: Iterable[str], returns: Mapping[str, Any]
+) -> CompiledPlan:
+    """
+    Compile `plan`, raising ValueError for duplicate step ids, references to
+    unknown steps or inputs, and dependency cycles.
+
+    `<step>.output.<name>`, where `<name>` is the step's declared `output`
+    variable, refers to the whole output (`clone_repo.output.repo_path`).
+    """
+    declared_inputs = set(inputs)
+    ids = [step.id for step in plan]
+    outputs = {step.id: step.output for step in plan}
+    if len(outputs) != len(ids):
+        dupes = sorted({i for i in ids if ids.count(i) > 1})
+        raise ValueError(f"Duplicate step ids: {', '.join(dupes)}")
+
+    def check(owner: str, node) -> FrozenSet[str]:
+        deps = set()
+        for ref in node.refs():
+            if ref.source == INPUTS:
+                if ref.key not in declared_inputs:
+                    raise ValueError(f"{owner} references unknown input '{ref.key}'")
+                continue
+            if ref.key not in outputs:
+                raise ValueError(f"{owner} references unknown step '{ref.key}'")
+            if ref.path and ref.path[0] == outputs[ref.key]:
+                ref.path = ref.path[1:]
+            deps.add(ref.key)
+        return frozenset(deps)
+
+    steps: Dict[str, CompiledStep] = {}
+    for step in plan:
+        args = compile_value(step.with_)
+        deps = check(f"Step '{step.id}'", args)
+        steps[step.id] = CompiledStep(step.id, step.use, step.output, args, deps)
+
+    compiled_returns = {}
+    for key, value in returns.items():
+        node = compile_value(value)
+        check(f"Return '{key}'", node)
+        compiled_returns[key] = node
+
+    dependents: Dict[str, List[str]] = {step_id: [] for step_id in steps}
+    for step in steps.values():
+        for dep in step.deps:
+            dependents[dep].append(step.id)
+
+    # Kahn's algorithm, always taking the earliest declared ready step
+    position = {step_id: i for i, step_id in enumerate(steps)}
+    remaining = {step_id: len(step.deps) for step_id, step in steps.items()}
+    ready = [position[i] for i, count in remaining.items() if count == 0]
+    heapq.heapify(ready)
+    order: List[str] = []
+    while ready:
+        step_id = ids[heapq.heappop(ready)]
+        order.append(step_id)
+        for dependent in dependents[step_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                heapq.heappush(ready, position[dependent])
+    if len(order) < len(steps):
+        cycle = sorted(i for i, count in remaining.items() if count)
+        raise ValueError(f"Plan has a dependency cycle between: {', '.join(cycle)}")
+
+    return CompiledPlan(
+        steps,
+        tuple(order),
+        {step_id: tuple(deps) for step_id, deps in dependents.items()},
+        compiled_returns,
+    )
@@ -1,11 +1,103 @@
+import time
+from array import array
+from bisect import bisect_left
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from enum import IntEnum
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Iterator, List, NamedTuple, Optional
+
+
+class EventKind(IntEnum):
+    CREATED = 0
+    MODIFIED = 1
+    DELETED = 2
+
+    @property
+    def subject(self) -> str:
+        """Bus subject the kind is published on (e.g. file.created)."""
+        return f"file.{self.name.lower()}"
+
+
+class LogEntry(NamedTuple):
+    kind: EventKind
+    path: str
+    timestamp: float  # time.monotonic()
+
+
+class EventLog:
+    """
+    Fixed-capacity ring buffer of watcher events.
+
+    Kinds and timestamps live in typed arrays and paths in a preallocated
+    list, so appends are O(1) and never allocate once the buffer is full.
+    Timestamps are monotonic, which keeps them sorted in ring order and lets
+    `since` binary-search instead of scanning.
+    """
+
+    __slots__ = ("capacity", "_kinds", "_times", "_paths", "_next", "_count")
+
+    def __init__(self, capacity: int = 1000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._kinds = array("B", bytes(capacity))
+        self._times = array("d", bytes(8 * capacity))
+        self._paths: List[Optional[str]] = [None] * capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def append(
+        self, kind: EventKind, path: str, timestamp: Optional[float] = None
+    ) -> None:
+        i = self._next
+        self._kinds[i] = kind
+        self._times[i] = time.monotonic() if timestamp is None else timestamp
+        self._paths[i] = path
+        self._next = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _slot(self, logical: int) -> int:
+        # logical 0 is the oldest retained entry
+        return (self._next - self._count + logical) % self.capacity
+
+    def _entry(self, logical: int) -> LogEntry:
+        i = self._slot(logical)
+        return LogEntry(EventKind(self._kinds[i]), self._paths[i], self._times[i])
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        for logical in range(self._count):
+            yield self._entry(logical)
+
+    def last(self, n: int) -> List[LogEntry]:
+        """The newest `n` entries, oldest first."""
+        n = max(0, min(n, self._count))
+        return [self._entry(logical) for logical in range(self._count - n, self._count)]
+
+    def since(self, timestamp: float) -> List[LogEntry]:
+        """Entries recorded at or after `timestamp` (a time.monotonic() value)."""
+        start = bisect_left(
+            range(self._count), timestamp, key=lambda j: self._times[self._slot(j)]
+        )
+        return [self._entry(logical) for logical in range(start, self._count)]
+
+    def clear(self) -> None:
+        self._paths = [None] * self.capacity
+        self._next = 0
+        self._count = 0
 
 
 class WatcherConfig(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     name: str = Field(..., description="Name of the watcher")
     duration: datetime = Field(default_factory=datetime.now)
     watch_path: Optional[str] = Field(default=None, description="Path to watch")
-    logs: List[str] = Field(default_factory=list)
+    logs: EventLog = Field(default_factory=EventLog)
     active: bool = Field(default=False, description="Whether the watcher is running")
@@ -0,0 +1,113 @@
+import hashlib
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from app.common.models.echo import Echo
+from app.common.utils.loader import parse_echo_strict
+
+
+class BulkResult(NamedTuple):
+    path: str
+    echo: Optional[Echo]
+    error: Optional[str]
+    digest: str = ""
+    mtime_ns: int = 0
+    size: int = 0
+
+
+def iter_spec_paths(root: str) -> Iterator[str]:
+    """Yield every .yaml/.yml file under `root`, walking with os.scandir."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith((".yaml", ".yml")):
+                        yield entry.path
+        except OSError as e:
+            print(f"Skipping unreadable directory '{directory}': {e}")
+
+
+def _load_one(path: str) -> BulkResult:
+    try:
+        st = os.stat(path)
+        with open(path, "rb") as stream:
+            data = stream.read()
+        digest = hashlib.sha256(data).hexdigest()
+    except OSError as e:
+        return BulkResult(path, None, str(e))
+    try:
+        echo = parse_echo_strict(data)
+    except Exception as e:
+        return BulkResult(path, None, str(e), digest, st.st_mtime_ns, st.st_size)
+    return BulkResult(path, echo, None, digest, st.st_mtime_ns, st.st_size)
+
+
+def _load_chunk(paths: List[str]) -> List[BulkResult]:
+    return [_load_one(path) for path in paths]
+
+
+def _chunks(paths: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_load(
+    root: str, workers: Optional[int] = None, chunk_size: int = 64
+) -> Iterator[BulkResult]:
+    """
+    Parse and validate every spec under `root`, yielding results (including
+    failures) as soon as each chunk completes, in completion order.
+
+    The walk, the fan-out and the consumer all overlap: at most two chunks per
+    worker are outstanding, so memory stays flat for arbitrarily large trees.
+    `workers=1` loads serially in-process, which avoids pool start-up for
+    small trees.
+    """
+    return bulk_load_paths(iter_spec_paths(root), workers, chunk_size)
+
+
+def bulk_load_paths(
+    paths: Iterable[str], workers: Optional[int] = None, chunk_size: int = 64
+) -> Iterator[BulkResult]:
+    """bulk_load() over an explicit list of spec files."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    workers = workers or os.cpu_count() or 1
+    return _bulk_load(_chunks(paths, chunk_size), workers)
+
+
+def _bulk_load(chunks: Iterator[List[str]], workers: int) -> Iterator[BulkResult]:
+    if workers == 1:
+        for chunk in chunks:
+            yield from _load_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending: Set[Future] = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_load_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
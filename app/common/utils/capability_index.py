@@ -0,0 +1,265 @@
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.common.models.echo import Echo
+
+# What a spec can be looked up by
+FIELDS = ("capability", "tool", "network", "filesystem", "input", "input_type")
+
+# (field, value) pairs a spec is indexed under
+Terms = Tuple[Tuple[str, str], ...]
+
+
+def _terms(
+    capability: str,
+    network: str,
+    filesystem: str,
+    tools: Iterable[str],
+    inputs: Iterable[Tuple[str, str]],
+) -> Terms:
+    terms = {
+        ("capability", capability),
+        ("network", network),
+        ("filesystem", filesystem),
+    }
+    terms.update(("tool", tool) for tool in tools)
+    for name, type_ in inputs:
+        terms.add(("input", name))
+        terms.add(("input_type", type_))
+    return tuple(sorted(terms))
+
+
+def echo_terms(echo: Echo) -> Terms:
+    permissions = echo.permissions
+    return _terms(
+        echo.capability,
+        permissions.network,
+        permissions.filesystem,
+        permissions.tools,
+        ((name, spec.type) for name, spec in echo.inputs.items()),
+    )
+
+
+def dump_terms(data: Mapping[str, Any]) -> Terms:
+    """Terms of a dumped Echo (e.g. a snapshot blob), without validating it."""
+    permissions = data["permissions"]
+    return _terms(
+        data["capability"],
+        permissions["network"],
+        permissions["filesystem"],
+        permissions["tools"],
+        ((name, spec["type"]) for name, spec in data.get("inputs", {}).items()),
+    )
+
+
+class _Query:
+    """Base of query nodes; combine them with & and |."""
+
+    __slots__ = ()
+
+    def __and__(self, other: "_Query") -> "AllOf":
+        return AllOf(self, other)
+
+    def __or__(self, other: "_Query") -> "AnyOf":
+        return AnyOf(self, other)
+
+
+class Term(_Query):
+    """Specs indexed under `field` = `value`."""
+
+    __slots__ = ("field", "value")
+
+    def __init__(self, field: str, value: str):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}' (expected one of {FIELDS})")
+        self.field = field
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"{self.field}={self.value!r}"
+
+
+class AllOf(_Query):
+    """Specs matching every part."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, *parts: _Query):
+        self.parts = parts
+
+    def __repr__(self) -> str:
+        return "(" + " & ".join(map(repr, self.parts)) + ")"
+
+
+class AnyOf(_Query):
+    """Specs matching at least one part."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, *parts: _Query):
+        self.parts = parts
+
+    def __repr__(self) -> str:
+        return "(" + " | ".join(map(repr, self.parts)) + ")"
+
+
+class CapabilityIndex:
+    """
+    Inverted index from spec attributes (see FIELDS) to spec paths.
+
+    Every spec gets a slot number, and each (field, value) maps to a bitmap
+    of slots held as a Python int, so AND/OR queries are big-int & and |
+    whatever the number of specs or matches. Updating a spec only touches
+    the postings of the terms it gained or lost. Freed slots are reused, so
+    bitmaps stay as wide as the largest number of specs loaded at once.
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._paths: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._terms: Dict[int, Terms] = {}
+        self._postings: Dict[Tuple[str, str], int] = {}
+        # Readers see immutable ints; only writers need to be serialised
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._slots
+
+    def add(self, path: str, terms: Terms) -> None:
+        """Index `path` under `terms`, replacing what it was indexed under."""
+        self.update([(path, terms)])
+
+    def add_echo(self, path: str, echo: Echo) -> None:
+        self.update([(path, echo_terms(echo))])
+
+    def update(self, items: Iterable[Tuple[str, Terms]]) -> None:
+        """
+        Index many specs at once; new bits are collected per term and merged
+        into each bitmap once, which keeps bulk loads linear.
+        """
+        added: Dict[Tuple[str, str], int] = {}
+        with self._lock:
+            for path, terms in items:
+                slot = self._slots.get(path)
+                if slot is None:
+                    slot = self._allocate(path)
+                    new = terms
+                else:
+                    old = self._terms[slot]
+                    if old == terms:
+                        continue
+                    gone = set(old).difference(terms)
+                    self._clear(slot, gone)
+                    # The same path may be listed twice in one batch
+                    for term in gone.intersection(added):
+                        added[term] &= ~(1 << slot)
+                    new = set(terms).difference(old)
+                self._terms[slot] = terms
+                bit = 1 << slot
+                for term in new:
+                    added[term] = added.get(term, 0) | bit
+            postings = self._postings
+            for term, bits in added.items():
+                postings[term] = postings.get(term, 0) | bits
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            slot = self._slots.pop(path, None)
+            if slot is None:
+                return
+            self._clear(slot, self._terms.pop(slot))
+            self._paths[slot] = None
+            self._free.append(slot)
+
+    def _allocate(self, path: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._paths[slot] = path
+        else:
+            slot = len(self._paths)
+            self._paths.append(path)
+        self._slots[path] = slot
+        return slot
+
+    def _clear(self, slot: int, terms: Iterable[Tuple[str, str]]) -> None:
+        mask = ~(1 << slot)
+        postings = self._postings
+        for term in terms:
+            bits = postings.get(term, 0) & mask
+            if bits:
+                postings[term] = bits
+            else:
+                postings.pop(term, None)
+
+    def _match(self, query: _Query) -> int:
+        if isinstance(query, AllOf):
+            if not query.parts:
+                return 0
+            parts = iter(query.parts)
+            bits = self._match(next(parts))
+            for part in parts:
+                if not bits:
+                    break
+                bits &= self._match(part)
+            return bits
+        if isinstance(query, AnyOf):
+            bits = 0
+            for part in query.parts:
+                bits |= self._match(part)
+            return bits
+        return self._postings.get((query.field, query.value), 0)
+
+    def count(self, query: _Query) -> int:
+        return self._match(query).bit_count()
+
+    def query(self, query: _Query, limit: Optional[int] = None) -> List[str]:
+        """Paths of the specs matching `query`, in slot order."""
+        bits = self._match(query)
+        paths = self._paths
+        found: List[str] = []
+        # Walk 64-bit words, skipping empty ones, lowest bit first
+        data = bits.to_bytes((bits.bit_length() + 63) // 64 * 8, "little")
+        for number, word in enumerate(array("Q", data)):
+            if not word:
+                continue
+            base = number * 64
+            while word:
+                low = word & -word
+                found.append(paths[base + low.bit_length() - 1])
+                word ^= low
+            if limit is not None and len(found) >= limit:
+                return found[:limit]
+        return found
+
+    def find(self, limit: Optional[int] = None, **fields: Any) -> List[str]:
+        """
+        Shorthand for an AND over keyword fields; a list value is an OR
+        within that field, e.g. find(tool=["git.clone", "git.fetch"],
+        network="write").
+        """
+        parts = []
+        for field, value in fields.items():
+            if isinstance(value, (list, tuple, set)):
+                parts.append(AnyOf(*(Term(field, v) for v in value)))
+            else:
+                parts.append(Term(field, value))
+        return self.query(AllOf(*parts), limit)
+
+    def values(self, field: str) -> Dict[str, int]:
+        """Distinct values of `field` with the number of specs having each."""
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}' (expected one of {FIELDS})")
+        return {
+            value: bits.bit_count()
+            for (f, value), bits in list(self._postings.items())
+            if f == field
+        }
+
+    def terms(self, path: str) -> Terms:
+        slot = self._slots.get(path)
+        return self._terms[slot] if slot is not None else ()
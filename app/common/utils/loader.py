@@ -1,29 +1,91 @@
 from dotenv import load_dotenv
 from pydantic import ValidationError
 from app.common.models.echo import Echo
+from app.common.utils.metrics import REGISTRY
+from typing import Any, List, Optional, Tuple, Union
 import sys
 import os
+import time
 import yaml
 
+# libyaml's C loader when PyYAML was built with it, else the pure-Python one
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-def _load_validate(yaml_path: str):
+
+YAML_PARSE = REGISTRY.histogram("echo_yaml_parse_seconds", "Spec YAML parse time")
+SPEC_VALIDATE = REGISTRY.histogram(
+    "echo_spec_validate_seconds", "Echo model validation time, including plan compile"
+)
+
+
+def _safe_load(source: Any) -> Any:
+    start = time.perf_counter()
+    try:
+        return yaml.load(source, Loader=SafeLoader)
+    finally:
+        YAML_PARSE.observe(time.perf_counter() - start)
+
+
+def _check_path(yaml_path: str):
     if not yaml_path.endswith((".yaml", ".yml")):
         raise ValueError("yaml_path must end with .yaml or .yml")
 
     if not os.path.exists(yaml_path):
         raise FileNotFoundError(f"File not found at path: {yaml_path}")
 
+
+def _build(loaded_file: Any) -> Tuple[Optional[Echo], List[str]]:
+    if not isinstance(loaded_file, dict):
+        return None, ["(): spec must be a YAML mapping"]
+    start = time.perf_counter()
+    try:
+        return Echo(**loaded_file), []
+    except ValidationError as e:
+        return None, [f"{err['loc']}: {err['msg']}" for err in e.errors()]
+    finally:
+        SPEC_VALIDATE.observe(time.perf_counter() - start)
+
+
+def _validate(loaded_file: Any) -> Optional[Echo]:
+    """Build an Echo from parsed YAML, printing validation errors on failure."""
+    echo, errors = _build(loaded_file)
+    for err in errors:
+        print(f" - {err}")
+    return echo
+
+
+def parse_echo(source: Union[str, bytes]) -> Optional[Echo]:
+    """Parse and validate raw spec content into an Echo."""
+    try:
+        loaded_file = _safe_load(source)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML syntax: {e}") from e
+    return _validate(loaded_file)
+
+
+def parse_echo_strict(source: Union[str, bytes]) -> Echo:
+    """Like parse_echo(), but raises ValueError with the validation errors."""
+    try:
+        loaded_file = _safe_load(source)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML syntax: {e}") from e
+    echo, errors = _build(loaded_file)
+    if echo is None:
+        raise ValueError("; ".join(errors))
+    return echo
+
+
+def _load_validate(yaml_path: str):
+    _check_path(yaml_path)
+
     try:
         with open(yaml_path) as stream:
-            loaded_file = yaml.safe_load(stream)
-
-            try:
-                echo_schema = Echo(**loaded_file)
-                print(echo_schema.model_dump())
-            except ValidationError as e:
-                for err in e.errors():
-                    print(f" - {err['loc']}: {err['msg']}")
+            loaded_file = _safe_load(stream)
+
+            echo_schema = _validate(loaded_file)
+            if echo_schema is None:
                 return None
+            print(echo_schema.model_dump())
         return loaded_file
     except yaml.YAMLError as e:
         raise ValueError(f"Invalid YAML syntax: {e}") from e
@@ -35,3 +97,14 @@ def load(yaml_path):
     except Exception as e:
         print(f"Error loading YAML: {e}")
         return None
+
+
+def load_echo(yaml_path: str) -> Optional[Echo]:
+    """Like load(), but returns the validated Echo instead of the raw dict."""
+    try:
+        _check_path(yaml_path)
+        with open(yaml_path, "rb") as stream:
+            return parse_echo(stream.read())
+    except Exception as e:
+        print(f"Error loading YAML: {e}")
+        return None
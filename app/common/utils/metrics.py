@@ -0,0 +1,306 @@
+import asyncio
+import bisect
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+# Seconds; spans sub-millisecond decode up to slow handler runs
+DEFAULT_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+GaugeValue = Union[float, Mapping[Union[str, Tuple[str, ...]], float]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True))
+    return "{" + pairs + "}"
+
+
+class _Metric(ABC):
+    """Common parts of a metric family: name, help text and labelled children."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> "_Metric":
+        """The child for one combination of label values (created on first use)."""
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {values}"
+            )
+        with self._lock:
+            return self._children.setdefault(values, self._child())
+
+    @abstractmethod
+    def _child(self) -> "_Metric":
+        """A new, unlabelled metric of the same kind."""
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.labelnames:
+            return sorted(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, metric in self._series():
+            lines.extend(metric._samples(self.name, self.labelnames, values))
+        return lines
+
+    @abstractmethod
+    def _samples(self, name, labelnames, values) -> List[str]:
+        """Exposition lines for this metric's value(s) under `values`."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+
+    def _child(self) -> "Counter":
+        return Counter(self.name, self.help)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _samples(self, name, labelnames, values) -> List[str]:
+        labels = _label_text(labelnames, values)
+        return [f"{name}_total{labels} {_format_value(self.value)}"]
+
+
+class Gauge(_Metric):
+    """
+    A value set directly, or read from `fn` at export time. For a labelled
+    gauge, `fn` returns a mapping of label value(s) to value.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        fn: Optional[Callable[[], GaugeValue]] = None,
+    ):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+        self.fn = fn
+
+    def _child(self) -> "Gauge":
+        return Gauge(self.name, self.help)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.fn is None:
+            return super()._series()
+        try:
+            current = self.fn()
+        except Exception as e:
+            print(f"[Metrics] Gauge '{self.name}' failed: {e}")
+            return []
+        if not self.labelnames:
+            self.value = current
+            return [((), self)]
+        series = []
+        for key, value in sorted(current.items()):
+            child = Gauge(self.name, self.help)
+            child.value = value
+            series.append(((key,) if isinstance(key, str) else tuple(key), child))
+        return series
+
+    def _samples(self, name, labelnames, values) -> List[str]:
+        labels = _label_text(labelnames, values)
+        return [f"{name}{labels} {_format_value(self.value)}"]
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. observe() is a bisect and two additions;
+    cumulative counts are only built at export time.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        if list(buckets) != sorted(buckets) or not buckets:
+            raise ValueError("buckets must be a non-empty increasing sequence")
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def _child(self) -> "Histogram":
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def _samples(self, name, labelnames, values) -> List[str]:
+        counts, total = list(self.counts), self.sum
+        lines = []
+        cumulative = 0
+        names = labelnames + ("le",)
+        for bound, count in zip(self.buckets + (math.inf,), counts, strict=True):
+            cumulative += count
+            labels = _label_text(names, values + (_format_value(bound),))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _label_text(labelnames, values)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named metrics with Prometheus text export.
+
+    Registering a name twice returns the existing metric, so modules can
+    declare their metrics at import time; a name reused for a different
+    metric type raises ValueError.
+
+    Updates take no lock, to stay cheap enough for per-event use: an update
+    racing with one from another thread can be lost, which only skews
+    metrics hit from several threads at once (e.g. parse timings) slightly.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric '{name}' is already a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        fn: Optional[Callable[[], GaugeValue]] = None,
+    ) -> Gauge:
+        gauge = self._register(Gauge, name, help, labelnames)
+        if fn is not None:
+            # Re-registering rebinds the callback, e.g. to a new executor
+            gauge.fn = fn
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Everything in Prometheus text exposition format."""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write render() to `path` atomically (e.g. for a textfile collector)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9464):
+        """Serve render() over HTTP on every path; returns the asyncio server."""
+
+        async def respond(reader, writer):
+            try:
+                # Request line and headers; the path is ignored
+                while (await reader.readline()).strip():
+                    pass
+                body = self.render().encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/plain; version=0.0.4\r\n"
+                    b"Content-Length: %d\r\nConnection: close\r\n\r\n%s"
+                    % (len(body), body)
+                )
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(respond, host, port)
+        print(f"📈 Metrics at http://{host}:{server.sockets[0].getsockname()[1]}/")
+        return server
+
+
+# Process-wide registry the instrumented modules declare their metrics on
+REGISTRY = MetricsRegistry()
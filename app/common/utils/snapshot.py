@@ -0,0 +1,143 @@
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.common.models.echo import Echo
+
+# Written beside the watched tree, as `<root>.echo-snapshot`: inside it, every
+# rewrite would come back as file events
+SNAPSHOT_SUFFIX = ".echo-snapshot"
+
+_MAGIC = b"ECHOSNP1"
+# magic, schema version, index offset, index length
+_HEADER = struct.Struct("<8s16sQQ")
+_MARSHAL_VERSION = 4
+
+# (spec path, encoded Echo, content digest, mtime_ns, size)
+SnapshotRecord = Tuple[str, bytes, str, int, int]
+
+
+@lru_cache(maxsize=None)
+def schema_version() -> bytes:
+    """Fingerprint of the Echo model; any schema change invalidates snapshots."""
+    schema = json.dumps(Echo.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).digest()[:16]
+
+
+def snapshot_path(root: str) -> str:
+    """Where the snapshot of the tree at `root` is kept."""
+    return os.path.abspath(root).rstrip(os.sep) + SNAPSHOT_SUFFIX
+
+
+def encode_echo(echo: Echo) -> bytes:
+    return marshal.dumps(echo.model_dump(by_alias=True), _MARSHAL_VERSION)
+
+
+def decode_dump(blob: bytes) -> dict:
+    """The dumped Echo fields, without building (validating) the model."""
+    return marshal.loads(blob)
+
+
+def decode_echo(blob: bytes) -> Echo:
+    return Echo.model_validate(decode_dump(blob))
+
+
+class SnapshotEntry(NamedTuple):
+    offset: int
+    length: int
+    digest: str
+    mtime_ns: int
+    size: int
+
+
+class SpecSnapshot:
+    """
+    Read side of a persisted set of validated specs.
+
+    The file is a fixed header, the marshalled spec blobs back to back, and a
+    marshalled index of path -> (offset, length, digest, mtime_ns, size). It is
+    memory-mapped and only the index is decoded on open; each spec is
+    deserialised on first `load()`. A missing, corrupt or schema-mismatched
+    file reads as an empty snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index: Dict[str, SnapshotEntry] = {}
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        if os.path.exists(path):
+            try:
+                self._open()
+            except Exception as e:
+                print(f"Ignoring unreadable snapshot '{path}': {e}")
+                self.close()
+                self.index = {}
+
+    @classmethod
+    def for_tree(cls, root: str) -> "SpecSnapshot":
+        return cls(snapshot_path(root))
+
+    def _open(self) -> None:
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, schema, offset, length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError("not an Echo snapshot")
+        if schema != schema_version():
+            print(f"Snapshot '{self.path}' was written for another Echo schema")
+            self.close()
+            return
+        raw = marshal.loads(self._mmap[offset : offset + length])
+        self.index = {path: SnapshotEntry(*fields) for path, fields in raw.items()}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.index
+
+    def entry(self, path: str) -> Optional[SnapshotEntry]:
+        return self.index.get(path)
+
+    def blob(self, path: str) -> bytes:
+        entry = self.index[path]
+        return self._mmap[entry.offset : entry.offset + entry.length]
+
+    def load(self, path: str) -> Echo:
+        return decode_echo(self.blob(path))
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def write(path: str, records: Iterable[SnapshotRecord]) -> int:
+        """Atomically replace the snapshot at `path`; returns the entry count."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        index = {}
+        with open(tmp, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            offset = _HEADER.size
+            for spec_path, blob, digest, mtime_ns, size in records:
+                f.write(blob)
+                index[spec_path] = (offset, len(blob), digest, mtime_ns, size)
+                offset += len(blob)
+            raw_index = marshal.dumps(index, _MARSHAL_VERSION)
+            f.write(raw_index)
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, schema_version(), offset, len(raw_index)))
+            f.flush()
+            os.fsync(f.fileno())
+        # Readers holding the old mmap keep the old inode until they close it
+        os.replace(tmp, path)
+        return len(index)
@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from app.common.models.echo import Echo
+
+HEADER_FIELDS = ("version", "capability", "description")
+
+
+def _diff_keys(old: Mapping[str, Any], new: Mapping[str, Any]) -> Tuple[List[str], ...]:
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    changed = [key for key in new if key in old and old[key] != new[key]]
+    return added, removed, changed
+
+
+class SpecDiff:
+    """
+    Structural difference between two validated versions of a spec.
+
+    Inputs and steps are compared by name / step id, so an edit to one step
+    reports just that step. The `affects_*` properties say which derived
+    artefacts need rebuilding.
+    """
+
+    __slots__ = (
+        "header",
+        "inputs_added",
+        "inputs_removed",
+        "inputs_changed",
+        "permissions",
+        "steps_added",
+        "steps_removed",
+        "steps_changed",
+        "order_changed",
+        "returns",
+    )
+
+    def __init__(self):
+        self.header: List[str] = []
+        self.inputs_added: List[str] = []
+        self.inputs_removed: List[str] = []
+        self.inputs_changed: List[str] = []
+        self.permissions = False
+        self.steps_added: List[str] = []
+        self.steps_removed: List[str] = []
+        self.steps_changed: List[str] = []
+        # Same steps, declared in a different order
+        self.order_changed = False
+        self.returns = False
+
+    def __bool__(self) -> bool:
+        return (
+            bool(self.header)
+            or self.affects_plan
+            or self.affects_inputs
+            or self.permissions
+        )
+
+    @property
+    def affects_inputs(self) -> bool:
+        return bool(self.inputs_added or self.inputs_removed or self.inputs_changed)
+
+    @property
+    def affects_plan(self) -> bool:
+        """True if the compiled plan (steps, references, returns) must be rebuilt."""
+        return bool(
+            self.steps_added
+            or self.steps_removed
+            or self.steps_changed
+            or self.order_changed
+            or self.returns
+            # References to inputs are checked when the plan is compiled
+            or self.inputs_added
+            or self.inputs_removed
+        )
+
+    @property
+    def affects_index(self) -> bool:
+        """True if the spec's capability index terms may have changed."""
+        return "capability" in self.header or self.permissions or self.affects_inputs
+
+    @property
+    def affects_tools(self) -> bool:
+        """True if the spec's tools must be validated again."""
+        return self.permissions
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Compact change-set: only the parts that changed, by name."""
+        payload: Dict[str, Any] = {}
+        if self.header:
+            payload["header"] = self.header
+        inputs = {
+            "added": self.inputs_added,
+            "removed": self.inputs_removed,
+            "changed": self.inputs_changed,
+        }
+        inputs = {kind: names for kind, names in inputs.items() if names}
+        if inputs:
+            payload["inputs"] = inputs
+        if self.permissions:
+            payload["permissions"] = True
+        steps = {
+            "added": self.steps_added,
+            "removed": self.steps_removed,
+            "changed": self.steps_changed,
+        }
+        steps = {kind: ids for kind, ids in steps.items() if ids}
+        if self.order_changed:
+            steps["reordered"] = True
+        if steps:
+            payload["steps"] = steps
+        if self.returns:
+            payload["returns"] = True
+        return payload
+
+
+def diff_echo(old: Optional[Echo], new: Echo) -> SpecDiff:
+    """Compare two versions of a spec; `old=None` reports everything as added."""
+    diff = SpecDiff()
+    if old is None:
+        diff.header = list(HEADER_FIELDS)
+        diff.inputs_added = list(new.inputs)
+        diff.permissions = True
+        diff.steps_added = [step.id for step in new.plan]
+        diff.returns = bool(new.returns)
+        return diff
+
+    diff.header = [
+        name for name in HEADER_FIELDS if getattr(old, name) != getattr(new, name)
+    ]
+    diff.inputs_added, diff.inputs_removed, diff.inputs_changed = _diff_keys(
+        old.inputs, new.inputs
+    )
+    diff.permissions = old.permissions != new.permissions
+
+    old_steps = {step.id: step for step in old.plan}
+    new_steps = {step.id: step for step in new.plan}
+    diff.steps_added, diff.steps_removed, diff.steps_changed = _diff_keys(
+        old_steps, new_steps
+    )
+    if not (diff.steps_added or diff.steps_removed):
+        diff.order_changed = list(old_steps) != list(new_steps)
+    diff.returns = old.returns != new.returns
+    return diff
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Dict, Optional, Tuple
+
+from app.common.models.echo import Echo
+from app.common.utils.loader import _check_path, parse_echo
+
+# Rough per-entry bookkeeping cost on top of the spec source size; a validated
+# Echo is a handful of small pydantic models, so the source length is a fair
+# proxy for how much memory the parsed object holds.
+_ENTRY_OVERHEAD = 1024
+
+
+class _Entry:
+    __slots__ = ("mtime_ns", "size", "digest", "echo", "cost", "loader")
+
+    def __init__(
+        self,
+        mtime_ns: int,
+        size: int,
+        digest: str,
+        echo: Optional[Echo],
+        cost: int,
+        loader: Optional[Callable[[], Echo]] = None,
+    ):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.echo = echo
+        self.cost = cost
+        # Deferred deserialisation for entries primed from a snapshot
+        self.loader = loader
+
+    def materialise(self) -> Echo:
+        if self.echo is None and self.loader is not None:
+            self.echo = self.loader()
+            self.loader = None
+        return self.echo
+
+
+class SpecRegistry:
+    """
+    In-process cache of validated specs keyed by path and content digest.
+
+    A lookup first compares (mtime_ns, size) against the cached entry; only when
+    those differ is the file read and hashed, and only when the digest differs
+    is the YAML parsed and validated again. Entries are evicted in LRU order
+    once either `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("max_entries and max_bytes must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "stat_hits": 0,
+            "digest_hits": 0,
+            "parses": 0,
+            "evictions": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self._entries
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, path: str) -> Optional[Echo]:
+        """Return the validated Echo for `path`, parsing only if its content changed."""
+        try:
+            _check_path(path)
+            return self._get(os.path.abspath(path))
+        except Exception as e:
+            print(f"Error loading YAML: {e}")
+            return None
+
+    async def aget(
+        self, path: str, executor: Optional[Executor] = None
+    ) -> Optional[Echo]:
+        """
+        Async get(): cache checks run inline, while YAML parsing and validation
+        run on `executor` (the loop's default thread pool if None). Pass a
+        ProcessPoolExecutor to keep large parses off the GIL entirely.
+        """
+        try:
+            _check_path(path)
+            key = os.path.abspath(path)
+            echo, pending = self._lookup(key)
+            if pending is None:
+                return echo
+            loop = asyncio.get_running_loop()
+            echo = await loop.run_in_executor(executor, parse_echo, pending[0])
+            return self._commit(key, echo, *pending)
+        except Exception as e:
+            print(f"Error loading YAML: {e}")
+            return None
+
+    def _get(self, key: str) -> Optional[Echo]:
+        echo, pending = self._lookup(key)
+        if pending is None:
+            return echo
+        return self._commit(key, parse_echo(pending[0]), *pending)
+
+    def _lookup(
+        self, key: str
+    ) -> Tuple[Optional[Echo], Optional[Tuple[bytes, str, os.stat_result]]]:
+        """Cached Echo, or the (data, digest, stat) that still needs parsing."""
+        st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.mtime_ns == st.st_mtime_ns
+                and entry.size == st.st_size
+            ):
+                self._entries.move_to_end(key)
+                self.stats["stat_hits"] += 1
+                return entry.materialise(), None
+
+        with open(key, "rb") as stream:
+            data = stream.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                # Touched but unchanged (editor re-save, `touch`, etc.)
+                entry.mtime_ns = st.st_mtime_ns
+                entry.size = st.st_size
+                self._entries.move_to_end(key)
+                self.stats["digest_hits"] += 1
+                return entry.materialise(), None
+        return None, (data, digest, st)
+
+    def _commit(
+        self,
+        key: str,
+        echo: Optional[Echo],
+        data: bytes,
+        digest: str,
+        st: os.stat_result,
+    ) -> Optional[Echo]:
+        with self._lock:
+            self.stats["parses"] += 1
+            if echo is None:
+                self._discard(key)
+                return None
+            cost = len(data) + _ENTRY_OVERHEAD
+            self._store(key, _Entry(st.st_mtime_ns, st.st_size, digest, echo, cost))
+        return echo
+
+    def prime(
+        self, path: str, echo: Echo, digest: str, mtime_ns: int, size: int
+    ) -> None:
+        """Insert a spec validated elsewhere (e.g. by the bulk loader)."""
+        entry = _Entry(mtime_ns, size, digest, echo, size + _ENTRY_OVERHEAD)
+        with self._lock:
+            self._store(os.path.abspath(path), entry)
+
+    def prime_lazy(
+        self,
+        path: str,
+        loader: Callable[[], Echo],
+        digest: str,
+        mtime_ns: int,
+        size: int,
+    ) -> None:
+        """
+        Insert a spec known to be valid whose Echo is only built by `loader` on
+        first access (e.g. an entry of an on-disk snapshot).
+        """
+        entry = _Entry(mtime_ns, size, digest, None, size + _ENTRY_OVERHEAD, loader)
+        with self._lock:
+            self._store(os.path.abspath(path), entry)
+
+    def peek(self, path: str) -> Optional[Echo]:
+        """Return the cached Echo for `path` without touching the filesystem."""
+        entry = self._entries.get(os.path.abspath(path))
+        if entry is None:
+            return None
+        with self._lock:
+            return entry.materialise()
+
+    def digest(self, path: str) -> Optional[str]:
+        entry = self._entries.get(os.path.abspath(path))
+        return entry.digest if entry else None
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._discard(os.path.abspath(path))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._discard(key)
+        self._entries[key] = entry
+        self._bytes += entry.cost
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.cost
+            self.stats["evictions"] += 1
+
+    def _discard(self, key: str) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.cost
@@ -1,34 +1,158 @@
 import asyncio
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 
 # Ensure top-level path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
+from app.control_plane.events.batcher import PublishBatcher
 from app.control_plane.events.client import NATSClient
+from app.control_plane.events.codec import get_codec
+from app.control_plane.events.dedup import SeenSet
+from app.control_plane.events.executor import HandlerExecutor
 from app.control_plane.events.emitter import Emitter
-from app.control_plane.events.loader import Loader
+from app.control_plane.events.journal import Journal
+from app.control_plane.events.loader import DEFAULT_QUEUE_GROUP, Loader
+from app.control_plane.events.memory_bus import InMemoryBus
+from app.control_plane.events.sharding import ShardCoordinator
+from app.control_plane.watcher.coalescer import Batch, EventCoalescer
 from app.control_plane.watcher.manager import WatcherManager
 from app.common.models.echo_event import EchoEvent
+from app.common.utils.metrics import REGISTRY
+from app.worker import spec_worker
 
 # Load environment variables
 load_dotenv()
 
 NATS_BASE_URL = os.getenv("NATS_BASE_URL")
 NATS_BASE_PORT = os.getenv("NATS_BASE_PORT")
+# Wire format for published events: "json" (default) or "msgpack"
+ECHO_CODEC = os.getenv("ECHO_CODEC", "json")
+# Event bus: "nats" (default) or "memory" for a single-process deployment
+ECHO_BUS = os.getenv("ECHO_BUS", "nats")
+# Decode events without validation (see Codec.decode). Anything that can
+# publish to the broker could then inject unchecked events, so this is off
+# unless set to "1"; the in-memory bus never leaves the process and is trusted.
+ECHO_TRUST_EVENTS = os.getenv("ECHO_TRUST_EVENTS", "") == "1" or ECHO_BUS == "memory"
+# Processes for spec parsing; 0 parses on the event loop's thread pool
+ECHO_PARSE_PROCESSES = int(os.getenv("ECHO_PARSE_PROCESSES", "0"))
+# Local event journal replayed on restart; empty disables it
+ECHO_JOURNAL_DIR = os.getenv("ECHO_JOURNAL_DIR", ".echo-journal")
+# Prometheus metrics over HTTP on 127.0.0.1 and/or as a text file; empty disables
+ECHO_METRICS_PORT = os.getenv("ECHO_METRICS_PORT", "")
+ECHO_METRICS_FILE = os.getenv("ECHO_METRICS_FILE", "")
+# Spread file events over worker processes (app.worker.main): a shared queue
+# group, or ECHO_SHARDS > 0 partitions of the spec paths owned per worker.
+# The controller's own loader takes part like any other worker.
+ECHO_QUEUE_GROUP = os.getenv("ECHO_QUEUE_GROUP", DEFAULT_QUEUE_GROUP)
+ECHO_SHARDS = int(os.getenv("ECHO_SHARDS", "0"))
+# Change detection: "watchdog" (default) or "scan" for network/bind mounts
+# and trees too large for inotify watches
+ECHO_WATCH_BACKEND = os.getenv("ECHO_WATCH_BACKEND", "watchdog")
+ECHO_SCAN_INTERVAL = float(os.getenv("ECHO_SCAN_INTERVAL", "2.0"))
+
+
+def register_gauges(executor, coalescer, batcher, nats_client):
+    """Queue depths, read when metrics are exported."""
+    REGISTRY.gauge(
+        "echo_handlers_in_flight",
+        "Handlers queued or running",
+        fn=lambda: executor.in_flight,
+    )
+    REGISTRY.gauge(
+        "echo_handlers_queued",
+        "Handlers waiting for a per-subject slot",
+        ("subject",),
+        fn=lambda: {s: m["queued"] for s, m in executor.metrics().items()},
+    )
+    REGISTRY.gauge(
+        "echo_coalescer_pending",
+        "Paths waiting out their debounce window",
+        fn=lambda: len(coalescer),
+    )
+    if batcher is not None:
+        REGISTRY.gauge(
+            "echo_publish_pending_bytes",
+            "Payload bytes buffered or in flight to the broker",
+            fn=lambda: batcher.pending_bytes,
+        )
+    if isinstance(nats_client, InMemoryBus):
+        REGISTRY.gauge(
+            "echo_bus_queued",
+            "Messages queued per in-memory bus subscription",
+            ("subject",),
+            fn=lambda: {
+                s.pattern: s.queue.qsize() for s in list(nats_client.subscribers)
+            },
+        )
 
 
 async def main():
     # Initialize NATS and subsystems
-    nats_client = NATSClient(base_url=NATS_BASE_URL, port=NATS_BASE_PORT)
+    if ECHO_BUS == "memory":
+        nats_client = InMemoryBus()
+    else:
+        nats_client = NATSClient(base_url=NATS_BASE_URL, port=NATS_BASE_PORT)
     await nats_client.init_nats()
 
-    emitter = Emitter(nats_client)
-    loader = Loader(nats_client)
-    watcher = WatcherManager()
+    # Batch publishes to NATS; the in-memory bus hands over objects directly
+    batcher = None if ECHO_BUS == "memory" else PublishBatcher(nats_client)
+    journal = Journal(ECHO_JOURNAL_DIR) if ECHO_JOURNAL_DIR else None
+    emitter = Emitter(
+        nats_client,
+        codec=get_codec(ECHO_CODEC),
+        batcher=batcher,
+        journal=journal,
+        partitions=ECHO_SHARDS,
+    )
+    shards = ShardCoordinator(nats_client, ECHO_SHARDS) if ECHO_SHARDS else None
+    executor = HandlerExecutor()
+    loader = Loader(
+        nats_client,
+        trusted=ECHO_TRUST_EVENTS,
+        dedup=SeenSet(),
+        executor=executor,
+        journal=journal,
+        queue=ECHO_QUEUE_GROUP,
+        shards=shards,
+    )
+    # Downstream consumers get compact change-sets rather than whole specs
+    spec_worker.use_change_sink(lambda event: emitter.publish(event.name, event))
+    if ECHO_PARSE_PROCESSES > 0:
+        spec_worker.use_parse_pool(ProcessPoolExecutor(ECHO_PARSE_PROCESSES))
+    loop = asyncio.get_running_loop()
+
+    def emit_file_events(batch: Batch):
+        events = [
+            (
+                event_name,
+                EchoEvent(name=event_name, source="watcher", payload={"src": src_path}),
+            )
+            for event_name, src_path in batch
+        ]
+        # Block the coalescer thread until NATS has taken the batch so a slow
+        # bus pushes back on the watcher instead of piling up futures.
+        asyncio.run_coroutine_threadsafe(emitter.publish_batch(events), loop).result()
+
+    coalescer = EventCoalescer(emit_file_events)
+    watcher = WatcherManager(
+        coalescer=coalescer,
+        backend=ECHO_WATCH_BACKEND,
+        scan_interval=ECHO_SCAN_INTERVAL,
+        index_dir=".echo-scan",
+    )
+    register_gauges(executor, coalescer, batcher, nats_client)
+    metrics_server = None
+    if ECHO_METRICS_PORT:
+        metrics_server = await REGISTRY.serve(port=int(ECHO_METRICS_PORT))
 
     await loader.load_defaults()
+    if shards is not None:
+        await shards.start()
+    # Events emitted before the last shutdown that handlers never finished
+    await loader.replay()
 
     watch_path = "echoes"
     try:
@@ -39,51 +163,33 @@ async def main():
         watcher.register_path(watch_path)
 
     watcher.start_one("echoes")
-
-    async def emit_file_event(event_name: str, src_path: str):
-        event = EchoEvent(
-            name=event_name,
-            source="watcher",
-            payload={"src": src_path},
-        )
-        await emitter.publish(event_name, event)
-
-    # Monkey-patch watcher’s log adding to emit events
-    original_add_log = watcher._add_log
-    loop = asyncio.get_event_loop()
-
-    def patched_add_log(name: str, log: str):
-        original_add_log(name, log)
-
-        # Try to extract file path (e.g., "echoes/echo.yaml") from the log string
-        parts = log.split(": ")
-        if len(parts) > 1:
-            src_path = parts[1].split(" at ")[0]
-        else:
-            src_path = "unknown"
-
-        if "created" in log:
-            asyncio.run_coroutine_threadsafe(
-                emit_file_event("file.created", src_path), loop
-            )
-
-        elif "modified" in log:
-            asyncio.run_coroutine_threadsafe(
-                emit_file_event("file.modified", src_path), loop
-            )
-
-    watcher._add_log = patched_add_log
+    # Specs that existed before startup never produce events; load them now
+    await asyncio.to_thread(spec_worker.preload, watch_path)
 
     print("🚀 Controller initialized. Watching for file changes...\n")
 
     try:
         while True:
             watcher.log_active_watchers()
+            if journal is not None:
+                journal.sync()
+                journal.compact()
+            if ECHO_METRICS_FILE:
+                REGISTRY.write(ECHO_METRICS_FILE)
             await asyncio.sleep(5)
     except KeyboardInterrupt:
         print("🛑 Stopping all watchers...")
-        watcher.stop_all()
+        # Off the loop: stopping drains the coalescer, whose sink waits on it
+        await asyncio.to_thread(watcher.stop_all)
+        await emitter.flush()
+        if shards is not None:
+            await shards.stop()
         await loader.unregister_all()
+        await executor.drain()
+        if journal is not None:
+            journal.close()
+        if metrics_server is not None:
+            metrics_server.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+# (subject, payload, headers)
+Message = Tuple[str, Any, Optional[Dict[str, str]]]
+
+
+class PublishBatcher:
+    """
+    Buffers outgoing messages and publishes them in batches.
+
+    A batch goes out when it holds `max_batch` messages or `max_batch_bytes`
+    of payload, or `linger` seconds after its first message, whichever comes
+    first; the whole batch goes to the client's publish_many() (or publish()
+    per message for clients without it). Once `max_pending_bytes` are
+    buffered or in flight, `add` waits for a batch to complete, so producers
+    slow down instead of buffering without bound. Call `flush` when ordering
+    relative to other traffic matters.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_batch: int = 256,
+        max_batch_bytes: int = 64 * 1024,
+        linger: float = 0.002,
+        max_pending_bytes: int = 8 * 1024 * 1024,
+    ):
+        if max_batch <= 0 or max_batch_bytes <= 0 or max_pending_bytes <= 0:
+            raise ValueError("batch and pending limits must be positive")
+        self.client = client
+        self.max_batch = max_batch
+        self.max_batch_bytes = max_batch_bytes
+        self.linger = linger
+        self.max_pending_bytes = max_pending_bytes
+        self._buffer: List[Message] = []
+        self._buffer_bytes = 0
+        self._pending_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: Optional["asyncio.Task[None]"] = None
+        self._drained: Optional[asyncio.Event] = None
+        self.stats: Dict[str, int] = {"messages": 0, "batches": 0, "waits": 0}
+
+    @property
+    def pending_bytes(self) -> int:
+        """Payload bytes buffered or being published."""
+        return self._pending_bytes
+
+    async def add(
+        self, subject: str, data: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        size = len(data) if isinstance(data, (bytes, bytearray)) else 0
+        while (
+            self._pending_bytes and self._pending_bytes + size > self.max_pending_bytes
+        ):
+            self.stats["waits"] += 1
+            if self._drained is None:
+                self._drained = asyncio.Event()
+            self._drained.clear()
+            self._send()
+            await self._drained.wait()
+
+        self._buffer.append((subject, data, headers))
+        self._buffer_bytes += size
+        self._pending_bytes += size
+        if (
+            len(self._buffer) >= self.max_batch
+            or self._buffer_bytes >= self.max_batch_bytes
+        ):
+            self._send()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger, self._send)
+
+    def _send(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer or (self._sending and not self._sending.done()):
+            # Whatever is buffered goes out when the current batch completes
+            return
+        batch, size = self._buffer, self._buffer_bytes
+        self._buffer, self._buffer_bytes = [], 0
+        self._sending = asyncio.create_task(self._publish(batch, size))
+
+    async def _publish(self, batch: List[Message], size: int) -> None:
+        try:
+            publish_many = getattr(self.client, "publish_many", None)
+            if publish_many is not None:
+                await publish_many(batch)
+            else:
+                for subject, data, headers in batch:
+                    await self.client.publish(subject, data, headers)
+            self.stats["messages"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            print(f"Failed to publish batch of {len(batch)} messages: {e}")
+        finally:
+            self._pending_bytes -= size
+            if self._drained is not None:
+                self._drained.set()
+            if self._buffer:
+                self._sending = None
+                self._send()
+
+    async def flush(self) -> None:
+        """Publish everything buffered, then flush the client itself."""
+        while self._buffer or (self._sending and not self._sending.done()):
+            if self._sending and not self._sending.done():
+                await self._sending
+            else:
+                self._send()
+        flush = getattr(self.client, "flush", None)
+        if flush is not None:
+            await flush()
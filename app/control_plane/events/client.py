@@ -1,4 +1,4 @@
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import nats
 
 
@@ -17,12 +17,48 @@ class NATSClient:
         self.nc = await nats.connect(f"nats://{self.base_url}:{self.port}")
         print(f"Connected to NATS at nats://{self.base_url}:{self.port}")
 
-    async def publish(self, subject: str, data: Any) -> None:
+    async def publish(
+        self, subject: str, data: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
         if not self.nc:
             raise ValueError("Initialize NATS first by calling init_nats()")
-        await self.nc.publish(subject, str(data).encode())
-
-    async def subscribe_event(self, event: str, handler: Callable[[Any], Any | None]):
+        payload = data if isinstance(data, bytes) else str(data).encode()
+        await self.nc.publish(subject, payload, headers=headers)
+
+    async def publish_many(
+        self, messages: Iterable[Tuple[str, Any, Optional[Dict[str, str]]]]
+    ) -> int:
+        """
+        Publish several messages, then flush once for the whole batch.
+
+        nats-py's publish() only appends to the connection's outgoing buffer
+        (written out by its flusher task), so the batch leaves as a few large
+        writes and the flush waits for the server to have all of it.
+        """
+        if not self.nc:
+            raise ValueError("Initialize NATS first by calling init_nats()")
+        count = 0
+        for subject, data, headers in messages:
+            payload = data if isinstance(data, bytes) else str(data).encode()
+            await self.nc.publish(subject, payload, headers=headers)
+            count += 1
+        if count and self.nc.is_connected:
+            await self.nc.flush()
+        return count
+
+    async def flush(self, timeout: int = 10) -> None:
+        """Wait until the server has received everything published so far."""
+        if not self.nc:
+            raise ValueError("Initialize NATS first by calling init_nats()")
+        await self.nc.flush(timeout=timeout)
+
+    async def subscribe_event(
+        self, event: str, handler: Callable[[Any], Any | None], queue: str = ""
+    ):
+        """
+        Subscribe `handler` to `event`. Subscribers sharing a `queue` group
+        (across processes) split the messages: each goes to one of them.
+        """
         event = event.strip()
         if not event:
             raise ValueError("Event name must not be empty")
@@ -36,14 +72,22 @@ class NATSClient:
             )
 
         try:
-            subscriber = await self.nc.subscribe(event, cb=handler)
+            subscriber = await self.nc.subscribe(event, queue=queue, cb=handler)
             self.subscribers.append(subscriber)
             self.subscribed_events.append(event)
-            print(f"📡 Subscribed to '{event}'")
+            print(
+                f"📡 Subscribed to '{event}'"
+                + (f" in group '{queue}'" if queue else "")
+            )
         except Exception as e:
             print(f"Failed to subscribe to '{event}': {e}")
 
-    async def unsubscribe_event(self, event: str):
+    async def unsubscribe_event(self, event: str, drain: bool = False):
+        """
+        Stop receiving `event`. Messages already delivered but not yet
+        handled are dropped, unless `drain` is set: then they are handled
+        first and this returns once they have been.
+        """
         event = event.strip()
         if not event:
             raise ValueError("Event name must not be empty")
@@ -56,11 +100,10 @@ class NATSClient:
         except ValueError as e:
             raise ValueError(f"Event '{event}' not found in subscribed events") from e
 
-        sub = self.subscribers[idx]
+        sub = self.subscribers.pop(idx)
+        self.subscribed_events.pop(idx)
         try:
-            await self.nc.unsubscribe(sub.sid)
-            self.subscribers.pop(idx)
-            self.subscribed_events.pop(idx)
+            await (sub.drain() if drain else sub.unsubscribe())
             print(f"Unsubscribed from '{event}'")
         except Exception as e:
             print(f"Failed to unsubscribe from '{event}': {e}")
@@ -80,10 +123,10 @@ class NATSClient:
 
     async def unsubscribe_all(self):
         try:
-            for i, sub in enumerate(self.subscribers):
-                await self.nc.unsubscribe(sub.sid)
-                self.subscribers.pop(i)
-                self.subscribed_events.pop(i)
+            while self.subscribers:
+                await self.subscribers[-1].unsubscribe()
+                self.subscribers.pop()
+                self.subscribed_events.pop()
             print("Unsubscribed all events")
         except Exception as e:
             print(f"Failed to unsubscribe from : {e}")
@@ -0,0 +1,79 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+from app.common.models.echo_event import EchoEvent
+
+
+def dedup_key(event: EchoEvent) -> str:
+    """
+    Identity of the work an event triggers.
+
+    File events are keyed on subject + path + the file's current (mtime_ns,
+    size), so watchdog double-fires and several controllers watching the same
+    tree collapse even though each produced its own timestamped EchoEvent.
+    Everything else is keyed on the event hash, which catches redeliveries.
+    """
+    src = (event.payload or {}).get("path") or (event.payload or {}).get("src")
+    if not src:
+        return event.hash
+    try:
+        st = os.stat(src)
+        state = f"{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        state = "missing"
+    return f"{event.name}|{src}|{state}"
+
+
+class SeenSet:
+    """
+    Time-windowed, size-bounded set of recently handled keys.
+
+    A key counts as a duplicate for `window` seconds after it was first seen.
+    Keys are kept in insertion order, which is also expiry order, so expired
+    and overflow entries are both dropped from the front in O(1) each.
+    """
+
+    def __init__(
+        self,
+        window: float = 10.0,
+        max_entries: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if window <= 0 or max_entries <= 0:
+            raise ValueError("window and max_entries must be positive")
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def seen(self, key: str) -> bool:
+        """Record `key`; return True if it was already seen inside the window."""
+        now = self.clock()
+        self._expire(now)
+        if key in self._expiry:
+            self.stats["hits"] += 1
+            return True
+
+        self.stats["misses"] += 1
+        self._expiry[key] = now + self.window
+        if len(self._expiry) > self.max_entries:
+            self._expiry.popitem(last=False)
+            self.stats["evictions"] += 1
+        return False
+
+    def forget(self, key: str) -> None:
+        """Drop `key` so a retry of the same work is not suppressed."""
+        self._expiry.pop(key, None)
+
+    def _expire(self, now: float) -> None:
+        while self._expiry:
+            key, expiry = next(iter(self._expiry.items()))
+            if expiry > now:
+                return
+            del self._expiry[key]
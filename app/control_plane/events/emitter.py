@@ -1,12 +1,93 @@
+from typing import Iterable, Optional, Tuple, Union
+from app.control_plane.events.batcher import PublishBatcher
 from app.control_plane.events.client import NATSClient
+from app.control_plane.events.memory_bus import InMemoryBus
+from app.control_plane.events.codec import CODEC_HEADER, Codec, JsonCodec
+from app.control_plane.events.journal import OFFSET_HEADER, Journal
+from app.control_plane.events.sharding import shard_subject
+from app.control_plane.watcher.coalescer import (
+    FILE_CREATED,
+    FILE_DELETED,
+    FILE_MODIFIED,
+)
+from app.common.utils.metrics import REGISTRY
 from app.common.models.echo_event import EchoEvent
 
+EMITTED = REGISTRY.counter("echo_events_emitted", "Events published", ("subject",))
+
 
 class Emitter:
-    def __init__(self, nats_client: NATSClient):
+    def __init__(
+        self,
+        nats_client: Union[NATSClient, InMemoryBus],
+        codec: Optional[Codec] = None,
+        batcher: Optional[PublishBatcher] = None,
+        journal: Optional[Journal] = None,
+        partitions: int = 0,
+        sharded: Iterable[str] = (FILE_CREATED, FILE_MODIFIED, FILE_DELETED),
+    ):
         self.nats_client = nats_client
+        # Coalesces publishes into batches; None sends each one immediately
+        self.batcher = batcher
+        self.codec = codec or JsonCodec()
+        self.headers = {CODEC_HEADER: self.codec.name}
+        # Records every event before it is sent, so consumers can replay
+        self.journal = journal
+        # With partitions, events on `sharded` subjects go to
+        # `<subject>.<partition of the spec path>` for sharded workers
+        self.partitions = partitions
+        self.sharded = frozenset(sharded)
+        # In-process buses take the event object itself; skip encoding
+        self.zero_copy = getattr(nats_client, "passes_objects", False)
+
+    def _route(self, event_name: str, data: EchoEvent) -> str:
+        """Subject to publish on: the event name, or its shard when sharding."""
+        EMITTED.labels(event_name).inc()
+        if not self.partitions or event_name not in self.sharded:
+            return event_name
+        payload = data.payload or {}
+        key = payload.get("path") or payload.get("src")
+        if not key:
+            return event_name
+        return shard_subject(event_name, key, self.partitions)
+
+    def _encode(self, subject: str, data: EchoEvent):
+        """Message body and headers for `data`, journaling it first if enabled."""
+        if self.journal is None:
+            return (data if self.zero_copy else self.codec.encode(data)), self.headers
+        encoded = self.codec.encode(data)
+        offset = self.journal.append(subject, encoded, self.codec.name)
+        headers = {**self.headers, OFFSET_HEADER: str(offset)}
+        return (data if self.zero_copy else encoded), headers
 
     async def publish(self, event_name: str, data: EchoEvent):
-        # Serialize the EchoEvent to JSON
-        await self.nats_client.publish(subject=event_name, data=data.model_dump_json())
+        subject = self._route(event_name, data)
+        payload, headers = self._encode(subject, data)
+        if self.batcher is not None:
+            await self.batcher.add(subject, payload, headers)
+            return
+        await self.nats_client.publish(subject=subject, data=payload, headers=headers)
         print(f"📤 Emitted event '{event_name}' with hash {data.hash[:8]}")
+
+    async def publish_batch(self, events: Iterable[Tuple[str, EchoEvent]]):
+        """Publish several events in order, logging a single summary line."""
+        count = 0
+        for event_name, data in events:
+            subject = self._route(event_name, data)
+            payload, headers = self._encode(subject, data)
+            if self.batcher is not None:
+                await self.batcher.add(subject, payload, headers)
+            else:
+                await self.nats_client.publish(
+                    subject=subject, data=payload, headers=headers
+                )
+            count += 1
+        if count:
+            print(f"📤 Emitted batch of {count} events")
+
+    async def flush(self):
+        """Wait until everything emitted so far has reached the bus."""
+        if self.batcher is not None:
+            await self.batcher.flush()
+        else:
+            await self.nats_client.flush()
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from app.common.models.echo_event import EchoEvent
+from app.common.utils.metrics import REGISTRY
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "echo_handler_seconds", "Event handler run time", ("subject",)
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    "echo_handler_errors", "Event handlers that raised", ("subject",)
+)
+
+
+def _percentile(samples: Deque[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SubjectStats:
+    __slots__ = ("queued", "running", "completed", "failed", "latencies")
+
+    def __init__(self, window: int):
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        # Recent handler latencies in seconds, for p50/p99
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "p50_ms": _percentile(self.latencies, 0.50) * 1000,
+            "p99_ms": _percentile(self.latencies, 0.99) * 1000,
+        }
+
+
+class HandlerExecutor:
+    """
+    Runs event handlers as tasks instead of inline in the NATS callback.
+
+    At most `max_in_flight` handlers are queued or running in total; once that
+    is reached `submit` waits, which stalls the subscription's delivery loop
+    and pushes back on the broker. Each subject additionally runs at most
+    `concurrency` (or its `per_subject` override) handlers at once.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 1024,
+        concurrency: int = 16,
+        per_subject: Optional[Dict[str, int]] = None,
+        latency_window: int = 1024,
+    ):
+        if max_in_flight <= 0 or concurrency <= 0:
+            raise ValueError("max_in_flight and concurrency must be positive")
+        self.max_in_flight = max_in_flight
+        self.concurrency = concurrency
+        self.per_subject = dict(per_subject or {})
+        self.latency_window = latency_window
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, SubjectStats] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Handlers currently queued or running."""
+        return self._in_flight
+
+    def _subject(self, subject: str) -> SubjectStats:
+        stats = self._stats.get(subject)
+        if stats is None:
+            limit = self.per_subject.get(subject, self.concurrency)
+            self._limits[subject] = asyncio.Semaphore(limit)
+            stats = self._stats[subject] = SubjectStats(self.latency_window)
+        return stats
+
+    async def submit(
+        self,
+        subject: str,
+        handler: Callable[[EchoEvent], Awaitable[Any]],
+        event: EchoEvent,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        """Queue `handler(event)`, waiting while the in-flight bound is reached."""
+        if self._slots is None:
+            # Created lazily so the executor can be built outside a running loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        await self._slots.acquire()
+        self._in_flight += 1
+        stats = self._subject(subject)
+        stats.queued += 1
+        task = asyncio.create_task(self._run(subject, stats, handler, event, on_error))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        subject: str,
+        stats: SubjectStats,
+        handler: Callable[[EchoEvent], Awaitable[Any]],
+        event: EchoEvent,
+        on_error: Optional[Callable[[Exception], None]],
+    ) -> None:
+        try:
+            async with self._limits[subject]:
+                stats.queued -= 1
+                stats.running += 1
+                start = time.perf_counter()
+                try:
+                    await handler(event)
+                    stats.completed += 1
+                except Exception as e:
+                    stats.failed += 1
+                    HANDLER_ERRORS.labels(subject).inc()
+                    if on_error is not None:
+                        on_error(e)
+                    print(f"Error handling event on '{subject}': {e}")
+                finally:
+                    stats.running -= 1
+                    elapsed = time.perf_counter() - start
+                    stats.latencies.append(elapsed)
+                    HANDLER_SECONDS.labels(subject).observe(elapsed)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def drain(self) -> None:
+        """Wait for every queued and running handler to finish."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-subject queue depth, running count, outcomes and latency."""
+        return {subject: stats.snapshot() for subject, stats in self._stats.items()}
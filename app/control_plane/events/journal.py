@@ -0,0 +1,261 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+# body length, crc32 of body; a zero length marks the end of a segment
+_RECORD = struct.Struct("<II")
+_SUFFIX = ".seg"
+CHECKPOINTS_FILE = "checkpoints.json"
+# Message header carrying an event's journal offset to consumers
+OFFSET_HEADER = "Echo-Offset"
+
+
+class JournalRecord(NamedTuple):
+    offset: int
+    subject: str
+    codec: str
+    payload: bytes
+
+
+class _Segment:
+    """One memory-mapped segment file, named after its first offset."""
+
+    __slots__ = ("path", "base", "count", "position", "size", "_file", "_mmap")
+
+    def __init__(self, directory: str, base: int):
+        self.path = os.path.join(directory, f"{base:020d}{_SUFFIX}")
+        self.base = base
+        self.count = 0
+        self.position = 0
+        self.size = 0
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def end(self) -> int:
+        """Offset one past the last record."""
+        return self.base + self.count
+
+    def create(self, size: int) -> None:
+        self._file = open(self.path, "w+b")
+        self._file.truncate(size)
+        self.size = size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def open(self, writable: bool) -> None:
+        """Map an existing file and find its end, dropping a torn last record."""
+        self._file = open(self.path, "r+b" if writable else "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size == 0:
+            return
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._mmap = mmap.mmap(self._file.fileno(), self.size, access=access)
+        # Sealed segments were flushed whole; only the active one can be torn
+        self.position, self.count = self._scan(verify=writable)
+
+    def _scan(self, verify: bool):
+        position = count = 0
+        data = self._mmap
+        while position + _RECORD.size <= self.size:
+            length, crc = _RECORD.unpack_from(data, position)
+            start = position + _RECORD.size
+            if length == 0 or start + length > self.size:
+                break
+            if verify and zlib.crc32(data[start : start + length]) != crc:
+                print(f"[Journal] Truncating torn record in '{self.path}'")
+                break
+            position = start + length
+            count += 1
+        return position, count
+
+    def fits(self, length: int) -> bool:
+        # Leave room for the zero-length terminator
+        return self.position + 2 * _RECORD.size + length <= self.size
+
+    def append(self, body: bytes) -> None:
+        start = self.position + _RECORD.size
+        _RECORD.pack_into(self._mmap, self.position, len(body), zlib.crc32(body))
+        self._mmap[start : start + len(body)] = body
+        self.position = start + len(body)
+        self.count += 1
+        # Terminate explicitly: after recovery from a torn write, stale bytes
+        # may follow the new end
+        _RECORD.pack_into(self._mmap, self.position, 0, 0)
+
+    def records(self, skip: int = 0) -> Iterator[JournalRecord]:
+        if self._mmap is None:
+            return
+        data = self._mmap
+        position = 0
+        for index in range(self.count):
+            length, _ = _RECORD.unpack_from(data, position)
+            start = position + _RECORD.size
+            position = start + length
+            if index < skip:
+                continue
+            subject, codec, payload = data[start:position].split(b"\n", 2)
+            yield JournalRecord(
+                self.base + index, subject.decode(), codec.decode(), payload
+            )
+
+    def sync(self) -> None:
+        if self._mmap is not None and not self._mmap.closed:
+            self._mmap.flush()
+
+    def seal(self) -> None:
+        """Flush, trim the unused tail and remap read-only."""
+        self.sync()
+        self.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(self.position)
+            os.fsync(f.fileno())
+        self.open(writable=False)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Journal:
+    """
+    Local append-only log of published events, for replay after a restart.
+
+    Records go into memory-mapped segment files of `segment_bytes`; a full
+    segment is trimmed and sealed and a new one started. Dirty pages are
+    flushed at most every `fsync_interval` seconds (and on sync()/close()),
+    so a crash loses at most that window. Every record has a CRC, and a torn
+    record at the end of the last segment is dropped on open.
+
+    Offsets are global record numbers. Consumers store the offset they have
+    processed up to with commit(); compact() deletes segments that every
+    consumer has passed.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if segment_bytes <= 4 * _RECORD.size:
+            raise ValueError("segment_bytes is too small")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._segments: List[_Segment] = []
+        self._bases: List[int] = []
+        self._last_sync = clock()
+        self._checkpoints: Dict[str, int] = {}
+        self._checkpoints_dirty = False
+        self._open()
+
+    def _open(self) -> None:
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(_SUFFIX))
+        for i, name in enumerate(names):
+            segment = _Segment(self.directory, int(name[: -len(_SUFFIX)]))
+            segment.open(writable=i == len(names) - 1)
+            self._segments.append(segment)
+            self._bases.append(segment.base)
+        if not self._segments or not self._segments[-1].size:
+            if self._segments:
+                self._segments.pop().close()
+                self._bases.pop()
+            self._roll(self._segments[-1].end if self._segments else 0)
+        path = os.path.join(self.directory, CHECKPOINTS_FILE)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self._checkpoints = {k: int(v) for k, v in json.load(f).items()}
+
+    def _roll(self, base: int, min_size: int = 0) -> _Segment:
+        if self._segments:
+            self._segments[-1].seal()
+        segment = _Segment(self.directory, base)
+        segment.create(max(self.segment_bytes, min_size + 2 * _RECORD.size))
+        self._segments.append(segment)
+        self._bases.append(base)
+        return segment
+
+    @property
+    def next_offset(self) -> int:
+        return self._segments[-1].end
+
+    @property
+    def first_offset(self) -> int:
+        return self._segments[0].base
+
+    def append(self, subject: str, payload: bytes, codec: str = "json") -> int:
+        """Append one event body; returns its offset."""
+        body = b"%s\n%s\n%s" % (subject.encode(), codec.encode(), payload)
+        segment = self._segments[-1]
+        if not segment.fits(len(body)):
+            segment = self._roll(segment.end, len(body))
+        offset = segment.end
+        segment.append(body)
+        if self.clock() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        return offset
+
+    def read(self, start: int = 0) -> Iterator[JournalRecord]:
+        """Records from offset `start` (clamped to what is retained) onwards."""
+        start = max(start, self.first_offset)
+        index = max(0, bisect.bisect_right(self._bases, start) - 1)
+        for segment in self._segments[index:]:
+            if segment.end <= start:
+                continue
+            yield from segment.records(skip=max(0, start - segment.base))
+
+    def sync(self) -> None:
+        self._segments[-1].sync()
+        if self._checkpoints_dirty:
+            self._save_checkpoints()
+        self._last_sync = self.clock()
+
+    def checkpoint(self, consumer: str) -> int:
+        """Offset `consumer` should resume from (0 if it never committed)."""
+        return self._checkpoints.get(consumer, 0)
+
+    def commit(self, consumer: str, offset: int) -> None:
+        """Record that `consumer` has processed everything before `offset`."""
+        if offset > self._checkpoints.get(consumer, -1):
+            self._checkpoints[consumer] = offset
+            self._checkpoints_dirty = True
+
+    def _save_checkpoints(self) -> None:
+        path = os.path.join(self.directory, CHECKPOINTS_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self._checkpoints, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+        self._checkpoints_dirty = False
+
+    def compact(self) -> int:
+        """Delete sealed segments every consumer has passed; returns how many."""
+        if not self._checkpoints:
+            return 0
+        low = min(self._checkpoints.values())
+        removed = 0
+        while len(self._segments) > 1 and self._segments[0].end <= low:
+            segment = self._segments.pop(0)
+            self._bases.pop(0)
+            segment.close()
+            os.remove(segment.path)
+            removed += 1
+        return removed
+
+    def close(self) -> None:
+        self.sync()
+        for segment in self._segments:
+            segment.close()
@@ -1,13 +1,99 @@
-from typing import Any, Awaitable, Callable, Dict, List
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 from app.control_plane.events.client import NATSClient
+from app.control_plane.events.memory_bus import InMemoryBus
+from app.control_plane.events.codec import CODEC_HEADER, codec_for_headers
+from app.control_plane.events.dedup import SeenSet, dedup_key
+from app.control_plane.events.executor import (
+    HANDLER_ERRORS,
+    HANDLER_SECONDS,
+    HandlerExecutor,
+)
+from app.control_plane.events.journal import OFFSET_HEADER, Journal
+from app.control_plane.events.memory_bus import BusMessage
+from app.control_plane.events.sharding import ShardCoordinator
 from app.common.models.echo_event import EchoEvent
-from app.worker.spec_worker import handle_file_created, handle_file_modified
-import json
+from app.common.utils.metrics import REGISTRY
+from app.worker.spec_worker import (
+    handle_file_created,
+    handle_file_deleted,
+    handle_file_modified,
+)
+
+# Queue group the controller's loader and standalone workers join by default,
+# so each file event is handled once between them
+DEFAULT_QUEUE_GROUP = "echo-workers"
+
+RECEIVED = REGISTRY.counter("echo_events_received", "Events received", ("subject",))
+EMIT_TO_RECEIVE = REGISTRY.histogram(
+    "echo_emit_to_receive_seconds",
+    "Time from an event's creation (EchoEvent.timestamp) to its delivery",
+)
+DECODE = REGISTRY.histogram("echo_decode_seconds", "Event decode time")
+
+
+def subject_matches(pattern: str, subject: str) -> bool:
+    """NATS subject matching: `*` is one token, a trailing `>` the rest."""
+    if pattern == subject:
+        return True
+    tokens = subject.split(".")
+    for i, token in enumerate(pattern.split(".")):
+        if token == ">":
+            return len(tokens) > i
+        if i >= len(tokens) or token not in ("*", tokens[i]):
+            return False
+    return len(pattern.split(".")) == len(tokens)
+
+
+class _Progress:
+    """
+    Journal offsets a consumer has started but not finished. Offsets arrive
+    in increasing order, so the first pending one is the oldest and the
+    checkpoint is just before it.
+    """
+
+    __slots__ = ("pending", "next")
+
+    def __init__(self, start: int):
+        self.pending: Dict[int, None] = {}
+        self.next = start
+
+    def start(self, offset: int) -> None:
+        self.pending[offset] = None
+        self.next = max(self.next, offset + 1)
+
+    def finish(self, offset: int) -> int:
+        """Mark `offset` handled; returns the offset to resume from."""
+        self.pending.pop(offset, None)
+        return next(iter(self.pending), self.next)
 
 
 class Loader:
-    def __init__(self, nats_client: NATSClient):
+    def __init__(
+        self,
+        nats_client: Union[NATSClient, InMemoryBus],
+        trusted: bool = False,
+        dedup: Optional[SeenSet] = None,
+        executor: Optional[HandlerExecutor] = None,
+        journal: Optional[Journal] = None,
+        queue: str = "",
+        shards: Optional[ShardCoordinator] = None,
+    ):
         self.nats_client = nats_client
+        # Skip pydantic validation on decode; only for producers we control
+        self.trusted = trusted
+        # Drops events whose work was already done inside the dedup window
+        self.dedup = dedup
+        # Runs handlers as bounded tasks instead of inline in the callback
+        self.executor = executor
+        # Each subject checkpoints the events it has handled, so a restart
+        # replays only what came after
+        self.journal = journal
+        self._progress: Dict[str, _Progress] = {}
+        # Workers sharing a queue group split the events between them
+        self.queue = queue
+        # Sharded mode: handle only `<subject>.<partition>` for owned partitions
+        self.shards = shards
         self.handlers: Dict[str, Callable[[EchoEvent], Awaitable[None]]] = {}
         self.subscribed_subjects: List[str] = []
 
@@ -20,28 +106,150 @@ class Loader:
             return
 
         async def wrapper(msg: Any):
-            try:
-                data = json.loads(msg.data.decode())
-                event = EchoEvent(**data)
-                await handler(event)
-            except Exception as e:
-                print(f"Error handling event on '{subject}': {e}")
+            await self._dispatch(subject, handler, msg)
 
-        await self.nats_client.subscribe_event(subject, handler=wrapper)
+        if self.shards is not None:
+            await self.shards.add_subject(subject, wrapper)
+        else:
+            await self.nats_client.subscribe_event(
+                subject, handler=wrapper, queue=self.queue
+            )
         self.handlers[subject] = handler
         self.subscribed_subjects.append(subject)
         print(f"Registered handler for '{subject}'")
 
+    async def _dispatch(
+        self,
+        subject: str,
+        handler: Callable[[EchoEvent], Awaitable[None]],
+        msg: Any,
+        replayed: bool = False,
+    ):
+        key = None
+        RECEIVED.labels(subject).inc()
+        offset = self._offset(msg)
+        if offset is not None:
+            self._started(subject, offset)
+        try:
+            # Set by the in-memory bus, which hands over the object itself
+            event = getattr(msg, "event", None)
+            if event is None:
+                start = time.perf_counter()
+                codec = codec_for_headers(msg.headers)
+                event = codec.decode(msg.data, trusted=self.trusted)
+                DECODE.observe(time.perf_counter() - start)
+            if not replayed:
+                EMIT_TO_RECEIVE.observe(time.time() - event.timestamp.timestamp())
+            if self.dedup is not None:
+                key = dedup_key(event)
+                if self.dedup.seen(key):
+                    return
+            if self.executor is not None:
+                on_error = (lambda _: self.dedup.forget(key)) if key else None
+                if offset is not None:
+                    handler = self._tracked(subject, handler, offset)
+                    offset = None  # finished by the task
+                await self.executor.submit(subject, handler, event, on_error)
+                return
+            start = time.perf_counter()
+            try:
+                await handler(event)
+            finally:
+                HANDLER_SECONDS.labels(subject).observe(time.perf_counter() - start)
+        except Exception as e:
+            if key is not None:
+                self.dedup.forget(key)
+            HANDLER_ERRORS.labels(subject).inc()
+            print(f"Error handling event on '{subject}': {e}")
+        finally:
+            if offset is not None:
+                self._finished(subject, offset)
+
+    def _offset(self, msg: Any) -> Optional[int]:
+        if self.journal is None or not msg.headers:
+            return None
+        value = msg.headers.get(OFFSET_HEADER)
+        if value is None:
+            return None
+        try:
+            offset = int(value)
+        except (TypeError, ValueError):
+            offset = -1
+        if offset < 0:
+            # Not written by a journaling Emitter: handle it, untracked
+            print(f"Ignoring invalid {OFFSET_HEADER} header: {value!r}")
+            return None
+        return offset
+
+    def _started(self, subject: str, offset: int) -> None:
+        progress = self._progress.get(subject)
+        if progress is None:
+            progress = self._progress[subject] = _Progress(
+                self.journal.checkpoint(subject)
+            )
+        progress.start(offset)
+
+    def _finished(self, subject: str, offset: int) -> None:
+        # Failed handlers count as done too: nothing retries them live either
+        self.journal.commit(subject, self._progress[subject].finish(offset))
+
+    def _tracked(
+        self, subject: str, handler: Callable[[EchoEvent], Awaitable[None]], offset: int
+    ) -> Callable[[EchoEvent], Awaitable[None]]:
+        async def run(event: EchoEvent):
+            try:
+                await handler(event)
+            finally:
+                self._finished(subject, offset)
+
+        return run
+
+    async def replay(self) -> int:
+        """
+        Re-dispatch journaled events each registered subject has not yet
+        handled, oldest first; returns how many were dispatched.
+        """
+        if self.journal is None or not self.handlers:
+            return 0
+        start = min(self.journal.checkpoint(subject) for subject in self.handlers)
+        replayed = 0
+        for record in self.journal.read(start):
+            for subject, handler in self.handlers.items():
+                if record.offset < self.journal.checkpoint(
+                    subject
+                ) or not self._replays(subject, record.subject):
+                    continue
+                headers = {
+                    CODEC_HEADER: record.codec,
+                    OFFSET_HEADER: str(record.offset),
+                }
+                msg = BusMessage(record.subject, record.payload, headers, None)
+                await self._dispatch(subject, handler, msg, replayed=True)
+                replayed += 1
+        if replayed:
+            print(f"🔁 Replayed {replayed} journaled events")
+        return replayed
+
+    def _replays(self, subject: str, record_subject: str) -> bool:
+        if self.shards is None:
+            return subject_matches(subject, record_subject)
+        base, _, partition = record_subject.rpartition(".")
+        return (
+            base == subject and partition.isdigit() and self.shards.owns(int(partition))
+        )
+
     async def unregister_all(self):
         """Unsubscribe all subjects and clear registry."""
         await self.nats_client.unsubscribe_all()
+        if self.journal is not None:
+            self.journal.sync()
         self.handlers.clear()
         self.subscribed_subjects.clear()
         print("Cleared all subscriptions.")
 
     async def load_defaults(self):
         """Register default handlers for core system events."""
-        # Register both subjects
         await self.register_handler("file.created", handle_file_created)
         await self.register_handler("file.modified", handle_file_modified)
+        await self.register_handler("file.deleted", handle_file_deleted)
         print("📡 Default file event handlers loaded.")
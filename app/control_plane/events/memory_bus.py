@@ -0,0 +1,231 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.common.models.echo_event import EchoEvent
+
+
+class BusMessage:
+    """
+    What subscribers receive; mirrors the parts of a NATS Msg the handlers use.
+    Events published as objects arrive as `event` and are not copied, so
+    subscribers must treat them as read-only.
+    """
+
+    __slots__ = ("subject", "data", "headers", "event")
+
+    def __init__(
+        self,
+        subject: str,
+        data: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        event: Optional[EchoEvent],
+    ):
+        self.subject = subject
+        self.data = data
+        self.headers = headers
+        self.event = event
+
+
+class _Subscription:
+    __slots__ = ("pattern", "handler", "group", "queue", "task")
+
+    def __init__(
+        self,
+        pattern: str,
+        handler: Callable[[Any], Any],
+        max_pending: int,
+        group: str = "",
+    ):
+        self.pattern = pattern
+        self.handler = handler
+        # Queue group name; "" receives every matching message
+        self.group = group
+        self.queue: "asyncio.Queue[BusMessage]" = asyncio.Queue(max_pending)
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    async def run(self) -> None:
+        # One consumer per subscription keeps delivery in publish order
+        while True:
+            msg = await self.queue.get()
+            try:
+                await self.handler(msg)
+            except Exception as e:
+                print(f"Error in handler for '{self.pattern}': {e}")
+            finally:
+                self.queue.task_done()
+
+
+class _Node:
+    __slots__ = ("children", "subscriptions")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.subscriptions: List[_Subscription] = []
+
+
+class InMemoryBus:
+    """
+    Single-process stand-in for NATSClient with the same publish / subscribe /
+    observe surface.
+
+    Subscriptions live in a trie keyed by subject token, where `*` matches
+    one token and `>` one or more trailing tokens, as in NATS. Matches are
+    cached per subject until the subscriptions change. Each subscription has
+    a bounded queue drained by its own task; a full queue makes `publish`
+    wait, so a slow subscriber pushes back on publishers. Subscriptions in a
+    queue group take turns: each message goes to one member of each group.
+    """
+
+    # Lets the Emitter publish EchoEvent objects instead of encoded bytes
+    passes_objects = True
+
+    def __init__(self, max_pending: int = 1024):
+        if max_pending <= 0:
+            raise ValueError("max_pending must be positive")
+        self.max_pending = max_pending
+        self._root = _Node()
+        # subject -> (plain subscriptions, members of each queue group)
+        self._matches: Dict[
+            str, Tuple[Tuple[_Subscription, ...], Tuple[Tuple[_Subscription, ...], ...]]
+        ] = {}
+        self._turns: Dict[str, int] = {}
+        self.subscribers: List[_Subscription] = []
+        self.subscribed_events: List[str] = []
+
+    async def init_nats(self) -> None:
+        """Nothing to connect to; kept for NATSClient compatibility."""
+
+    async def publish(
+        self, subject: str, data: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        if isinstance(data, EchoEvent):
+            msg = BusMessage(subject, None, headers, data)
+        else:
+            payload = data if isinstance(data, bytes) else str(data).encode()
+            msg = BusMessage(subject, payload, headers, None)
+        matches = self._matches.get(subject)
+        if matches is None:
+            matches = self._matches[subject] = self._plan(subject)
+        plain, groups = matches
+        for subscription in plain:
+            try:
+                subscription.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                await subscription.queue.put(msg)
+        for members in groups:
+            group = members[0].group
+            turn = self._turns[group] = self._turns.get(group, -1) + 1
+            subscription = members[turn % len(members)]
+            try:
+                subscription.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                await subscription.queue.put(msg)
+
+    async def flush(self) -> None:
+        """Wait until every queued message has been handled."""
+        for subscription in list(self.subscribers):
+            await subscription.queue.join()
+
+    def _plan(self, subject: str):
+        plain, groups = [], {}
+        for subscription in self._match(subject):
+            if subscription.group:
+                groups.setdefault(subscription.group, []).append(subscription)
+            else:
+                plain.append(subscription)
+        return tuple(plain), tuple(tuple(members) for members in groups.values())
+
+    def _match(self, subject: str) -> List[_Subscription]:
+        tokens = subject.split(".")
+        found: List[_Subscription] = []
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth == len(tokens):
+                found.extend(node.subscriptions)
+                continue
+            tail = node.children.get(">")
+            if tail is not None:
+                found.extend(tail.subscriptions)
+            for key in (tokens[depth], "*"):
+                child = node.children.get(key)
+                if child is not None:
+                    stack.append((child, depth + 1))
+        # Stable delivery order regardless of trie layout
+        found.sort(key=self.subscribers.index)
+        return found
+
+    def _add(
+        self, pattern: str, handler: Callable[[Any], Any], group: str = ""
+    ) -> None:
+        tokens = pattern.split(".")
+        if any(not token for token in tokens) or ">" in tokens[:-1]:
+            raise ValueError(f"Invalid subject '{pattern}'")
+        subscription = _Subscription(pattern, handler, self.max_pending, group)
+        node = self._root
+        for token in tokens:
+            node = node.children.setdefault(token, _Node())
+        node.subscriptions.append(subscription)
+        subscription.task = asyncio.create_task(subscription.run())
+        self.subscribers.append(subscription)
+        self.subscribed_events.append(pattern)
+        self._matches.clear()
+
+    def _remove(self, index: int, stop: bool = True) -> _Subscription:
+        subscription = self.subscribers.pop(index)
+        self.subscribed_events.pop(index)
+        path = [self._root]
+        for token in subscription.pattern.split("."):
+            path.append(path[-1].children[token])
+        path[-1].subscriptions.remove(subscription)
+        # Prune empty branches bottom-up
+        tokens = subscription.pattern.split(".")
+        for depth in range(len(tokens), 0, -1):
+            node = path[depth]
+            if node.children or node.subscriptions:
+                break
+            del path[depth - 1].children[tokens[depth - 1]]
+        if stop and subscription.task is not None:
+            subscription.task.cancel()
+        self._matches.clear()
+        return subscription
+
+    async def subscribe_event(
+        self, event: str, handler: Callable[[Any], Any | None], queue: str = ""
+    ):
+        event = event.strip()
+        if not event:
+            raise ValueError("Event name must not be empty")
+        if event in self.subscribed_events:
+            raise ValueError(
+                f"'{event}' already subscribed. Unsubscribe first or use a different subject."
+            )
+        self._add(event, handler, queue)
+        print(f"📡 Subscribed to '{event}'" + (f" in group '{queue}'" if queue else ""))
+
+    async def unsubscribe_event(self, event: str, drain: bool = False):
+        event = event.strip()
+        if not event:
+            raise ValueError("Event name must not be empty")
+        try:
+            index = self.subscribed_events.index(event)
+        except ValueError as e:
+            raise ValueError(f"Event '{event}' not found in subscribed events") from e
+        subscription = self._remove(index, stop=not drain)
+        if drain:
+            # Out of the trie, so nothing new is queued; finish what is
+            await subscription.queue.join()
+            subscription.task.cancel()
+        print(f"Unsubscribed from '{event}'")
+
+    async def observe(self, subject_pattern: str, handler: Callable[[Any], Any]):
+        if subject_pattern in self.subscribed_events:
+            print(f"Already observing '{subject_pattern}'")
+            return
+        self._add(subject_pattern, handler)
+        print(f"Observing pattern '{subject_pattern}'")
+
+    async def unsubscribe_all(self):
+        while self.subscribers:
+            self._remove(len(self.subscribers) - 1)
+        print("Unsubscribed all events")
@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+
+# Membership traffic between the workers of one deployment
+MEMBERS_SUBJECT = "echo.shards.members"
+# Shard subscriptions join this group, so two owners never both get a message
+SHARD_QUEUE = "echo-shards"
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), "big"
+    )
+
+
+def partition_for(key: str, partitions: int) -> int:
+    """Stable partition of `key` (a spec path), the same in every process."""
+    return _hash(key) % partitions
+
+
+def shard_subject(subject: str, key: str, partitions: int) -> str:
+    return f"{subject}.{partition_for(key, partitions)}"
+
+
+def owner(partition: int, members: Iterable[str]) -> str:
+    """
+    Rendezvous hashing: the member with the highest score for `partition`.
+    When a member joins or leaves, only the partitions it wins or held move.
+    """
+    return max(members, key=lambda member: _hash(f"{member}/{partition}"))
+
+
+class ShardCoordinator:
+    """
+    Gives this worker a stable slice of `partitions` and keeps its
+    subscriptions to `<subject>.<partition>` in line with that slice.
+
+    Workers announce themselves on MEMBERS_SUBJECT every `heartbeat` seconds;
+    one not heard from for `ttl` seconds is dropped. Every worker computes
+    ownership from the same member list, so no coordination beyond that is
+    needed.
+
+    Hand-over is make-before-break. A joining worker subscribes to its slice
+    and only then announces itself as "alive"; since that announcement goes
+    out on the same connection after its subscriptions, the broker already
+    routes to it by the time the previous owner hears it. The previous owner
+    keeps a lost partition until the new owner is alive and at least `grace`
+    seconds have passed, then drains it. In between both are in one queue
+    group, so each message still goes to exactly one of them.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        partitions: int = 64,
+        member_id: Optional[str] = None,
+        heartbeat: float = 1.0,
+        ttl: float = 3.5,
+        grace: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if partitions <= 0:
+            raise ValueError("partitions must be positive")
+        if ttl <= heartbeat:
+            raise ValueError("ttl must be longer than heartbeat")
+        self.client = client
+        self.partitions = partitions
+        self.member_id = member_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat = heartbeat
+        self.ttl = ttl
+        self.grace = grace
+        self.clock = clock
+        # member id -> last time it was heard from
+        self.members: Dict[str, float] = {self.member_id: clock()}
+        # Members subscribed to their slice
+        self.ready: Set[str] = set()
+        self.owned: Set[int] = set()
+        self._subjects: Dict[str, Handler] = {}
+        self._subscribed: Set[int] = set()
+        self._releases: Dict[int, "asyncio.Task[None]"] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._started = False
+
+    def owns(self, partition: int) -> bool:
+        return partition in self.owned
+
+    async def start(self) -> None:
+        """Join: announce, give peers one heartbeat to answer, then take a slice."""
+        await self.client.observe(MEMBERS_SUBJECT, self._on_member)
+        await self._announce("join")
+        await asyncio.sleep(self.heartbeat)
+        self._started = True
+        self.ready.add(self.member_id)
+        await self.rebalance()
+        await self._announce("alive")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Leave: peers take over at once, and shard subscriptions are drained
+        once the new owners are alive (or `ttl` has passed).
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._started = False
+        self.ready.discard(self.member_id)
+        others = [m for m in self.members if m != self.member_id]
+        successors = {owner(p, others) for p in self.owned} if others else set()
+        left = self.clock()
+        await self._announce("leave")
+        deadline = left + self.ttl
+        while self.clock() < deadline and any(
+            self.members.get(m, left) <= left for m in successors
+        ):
+            await asyncio.sleep(self.heartbeat / 4)
+        for task in self._releases.values():
+            task.cancel()
+        self._releases.clear()
+        for partition in sorted(self._subscribed):
+            await self._unsubscribe(partition)
+        self.owned.clear()
+
+    async def add_subject(self, subject: str, handler: Handler) -> None:
+        """Shard `subject`: subscribe to its owned partitions now and later."""
+        self._subjects[subject] = handler
+        for partition in sorted(self._subscribed):
+            await self.client.subscribe_event(
+                f"{subject}.{partition}", handler=handler, queue=SHARD_QUEUE
+            )
+
+    async def rebalance(self) -> None:
+        live = list(self.members)
+        target = {p for p in range(self.partitions) if owner(p, live) == self.member_id}
+        gained, lost = target - self.owned, self.owned - target
+        self.owned = target
+        for partition in sorted(gained):
+            release = self._releases.pop(partition, None)
+            if release is not None:
+                release.cancel()
+            if partition not in self._subscribed:
+                await self._subscribe(partition)
+        for partition in sorted(lost):
+            self._releases[partition] = asyncio.create_task(self._release(partition))
+        if gained or lost:
+            print(
+                f"[Shards] {self.member_id} owns {len(target)}/{self.partitions} "
+                f"partitions ({len(live)} members, +{len(gained)} -{len(lost)})"
+            )
+        if gained and self._started:
+            # Tells previous owners they can let go
+            await self._announce("alive")
+
+    async def _subscribe(self, partition: int) -> None:
+        self._subscribed.add(partition)
+        for subject, handler in self._subjects.items():
+            await self.client.subscribe_event(
+                f"{subject}.{partition}", handler=handler, queue=SHARD_QUEUE
+            )
+
+    async def _unsubscribe(self, partition: int) -> None:
+        self._subscribed.discard(partition)
+        for subject in self._subjects:
+            try:
+                # Handle what was already delivered; dropping it would lose it
+                await self.client.unsubscribe_event(
+                    f"{subject}.{partition}", drain=True
+                )
+            except ValueError as e:
+                print(f"[Shards] {e}")
+
+    async def _release(self, partition: int) -> None:
+        await asyncio.sleep(self.grace)
+        while owner(partition, list(self.members)) not in self.ready:
+            await asyncio.sleep(self.heartbeat / 4)
+        self._releases.pop(partition, None)
+        if partition not in self.owned:
+            await self._unsubscribe(partition)
+
+    async def _announce(self, state: str) -> None:
+        data = json.dumps({"member": self.member_id, "state": state}).encode()
+        await self.client.publish(MEMBERS_SUBJECT, data)
+
+    async def _on_member(self, msg: Any) -> None:
+        try:
+            message = json.loads(msg.data)
+            member, state = message["member"], message["state"]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[Shards] Ignoring bad membership message: {e}")
+            return
+        if member == self.member_id:
+            return
+        known = member in self.members
+        if state == "leave":
+            self.members.pop(member, None)
+            self.ready.discard(member)
+        else:
+            self.members[member] = self.clock()
+            if state == "alive":
+                self.ready.add(member)
+            elif state == "join":
+                # Let the newcomer see us before it settles on a slice
+                await self._announce("alive" if self._started else "hello")
+        if self._started and known != (member in self.members):
+            await self.rebalance()
+
+    def _expire(self) -> bool:
+        now = self.clock()
+        self.members[self.member_id] = now
+        stale = [m for m, seen in self.members.items() if now - seen > self.ttl]
+        for member in stale:
+            del self.members[member]
+            self.ready.discard(member)
+        return bool(stale)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                await self._announce("alive")
+                if self._expire():
+                    await self.rebalance()
+            except Exception as e:
+                print(f"[Shards] Heartbeat failed: {e}")
@@ -0,0 +1,192 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from app.common.models.watcher import EventKind
+from app.common.utils.metrics import REGISTRY
+
+FILE_CREATED = EventKind.CREATED.subject
+FILE_MODIFIED = EventKind.MODIFIED.subject
+FILE_DELETED = EventKind.DELETED.subject
+
+# (event name, path) pairs handed to the sink in emission order
+Batch = List[Tuple[str, str]]
+
+WATCH_TO_EMIT = REGISTRY.histogram(
+    "echo_watch_to_emit_seconds",
+    "Time from a path's first filesystem event to its file event being emitted",
+)
+
+
+def _merge(previous: str, current: str) -> str:
+    # A delete wins over whatever came before it in the window. Otherwise a
+    # file that was created inside the window is still "created" no matter
+    # how many times it is modified afterwards; a re-create wins as well.
+    if current == FILE_DELETED:
+        return FILE_DELETED
+    if FILE_CREATED in (previous, current):
+        return FILE_CREATED
+    return current
+
+
+class _Pending:
+    __slots__ = ("kind", "first_seen", "deadline")
+
+    def __init__(self, kind: str, first_seen: float, deadline: float):
+        self.kind = kind
+        self.first_seen = first_seen
+        self.deadline = deadline
+
+
+class EventCoalescer:
+    """
+    Per-path debounce stage between the filesystem watcher and the emitter.
+
+    Every submitted (event, path) is parked until no further event for that
+    path has arrived for `debounce` seconds (or `max_wait` seconds have passed
+    since the first one), then handed to `sink` in batches of up to
+    `max_batch`. At most `max_pending` distinct paths are held; once full,
+    `submit` blocks the watcher thread until the sink catches up.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Batch], None],
+        debounce: float = 0.2,
+        max_wait: float = 2.0,
+        max_pending: int = 10_000,
+        max_batch: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if debounce < 0 or max_wait < debounce:
+            raise ValueError("debounce must be >= 0 and max_wait >= debounce")
+        if max_pending <= 0 or max_batch <= 0:
+            raise ValueError("max_pending and max_batch must be positive")
+        self.sink = sink
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.clock = clock
+
+        self._pending: Dict[str, _Pending] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.events_in = 0
+        self.events_out = 0
+        self.batches_out = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, kind: str, path: str, timeout: Optional[float] = None) -> bool:
+        """Queue an event. Returns False if the queue stayed full for `timeout`."""
+        with self._cond:
+            self.events_in += 1
+            now = self.clock()
+            pending = self._pending.get(path)
+            if pending is not None:
+                pending.kind = _merge(pending.kind, kind)
+                pending.deadline = min(
+                    now + self.debounce, pending.first_seen + self.max_wait
+                )
+                return True
+
+            if len(self._pending) >= self.max_pending:
+                if (
+                    not self._cond.wait_for(
+                        lambda: len(self._pending) < self.max_pending
+                        or not self._running,
+                        timeout=timeout,
+                    )
+                    or len(self._pending) >= self.max_pending
+                ):
+                    self.dropped += 1
+                    return False
+                now = self.clock()
+
+            self._pending[path] = _Pending(kind, now, now + self.debounce)
+            if len(self._pending) == 1:
+                # New deadlines are never earlier than existing ones, so the
+                # flusher only needs waking when it is idle.
+                self._cond.notify_all()
+            return True
+
+    def take_due(self, now: Optional[float] = None, force: bool = False) -> Batch:
+        """Remove and return up to `max_batch` events whose window has closed."""
+        with self._cond:
+            if now is None:
+                now = self.clock()
+            batch: Batch = []
+            for path, pending in self._pending.items():
+                if force or pending.deadline <= now:
+                    batch.append((pending.kind, path))
+                    WATCH_TO_EMIT.observe(now - pending.first_seen)
+                    if len(batch) >= self.max_batch:
+                        break
+            for _, path in batch:
+                del self._pending[path]
+            if batch:
+                self.events_out += len(batch)
+                self.batches_out += 1
+                self._cond.notify_all()
+            return batch
+
+    def flush(self) -> None:
+        """Emit everything still pending, ignoring the debounce window."""
+        while True:
+            batch = self.take_due(force=True)
+            if not batch:
+                return
+            self.sink(batch)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="echo-coalescer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, flush: bool = True) -> None:
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush()
+
+    def _next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return min(p.deadline for p in self._pending.values())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    deadline = self._next_deadline()
+                    if deadline is None:
+                        self._cond.wait()
+                        continue
+                    delay = deadline - self.clock()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(timeout=delay)
+                if not self._running:
+                    return
+
+            batch = self.take_due()
+            if batch:
+                try:
+                    self.sink(batch)
+                except Exception as e:
+                    print(f"Coalescer sink failed for {len(batch)} events: {e}")
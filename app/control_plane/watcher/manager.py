@@ -5,40 +5,101 @@ from unittest.loader import VALID_MODULE_NAME
 from typing_extensions import override
 from watchdog.events import (
     DirCreatedEvent,
+    DirDeletedEvent,
     DirModifiedEvent,
     FileCreatedEvent,
+    FileDeletedEvent,
     FileModifiedEvent,
 )
 from watchdog.observers import Observer
 from os.path import basename
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import ValidationError
 from watchdog.events import FileSystemEventHandler
-from app.common.models.watcher import WatcherConfig
+from app.common.models.watcher import EventKind, WatcherConfig
+from app.control_plane.watcher.coalescer import EventCoalescer
+from app.control_plane.watcher.registry import WatcherRegistry
+from app.control_plane.watcher.scanner import ScanWatch, TreeScanner
+
+# Change detection: watchdog (inotify and friends) or periodic stat scans
+BACKENDS = ("watchdog", "scan")
+# Share of fs.inotify.max_user_instances in use at which to warn
+INOTIFY_WARN_RATIO = 0.9
+
+
+def _inotify_usage() -> Optional[Tuple[int, int]]:
+    """(inotify instances open in this process, per-user limit), Linux only."""
+    try:
+        with open("/proc/sys/fs/inotify/max_user_instances") as f:
+            limit = int(f.read())
+        fds = os.listdir("/proc/self/fd")
+    except (OSError, ValueError):
+        return None
+    used = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}") == "anon_inode:inotify":
+                used += 1
+        except OSError:
+            continue
+    return used, limit
 
 
 class WatcherManager(FileSystemEventHandler):
-    def __init__(self):
-        self.watchers: List[WatcherConfig] = []
+    def __init__(
+        self,
+        coalescer: Optional[EventCoalescer] = None,
+        observer_pool_size: int = 0,
+        backend: str = "watchdog",
+        scan_interval: float = 2.0,
+        index_dir: Optional[str] = None,
+    ):
+        if observer_pool_size < 0:
+            raise ValueError("observer_pool_size must be >= 0")
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        self.registry = WatcherRegistry()
         self.observers: Dict[str, Any] = {}
+        # Optional debounce stage that turns raw inotify events into file events
+        self.coalescer = coalescer
+        # 0 keeps one Observer per watcher; otherwise every watch path is
+        # scheduled on a fixed pool of shared Observers. That saves a thread
+        # per root, but watchdog still opens an emitter thread and an inotify
+        # instance per watch; many roots want the "scan" backend instead.
+        self.observer_pool_size = observer_pool_size
+        self._inotify_warned = False
+        self._pool: List[Any] = []
+        self._watches: Dict[str, Tuple[Any, Any]] = {}
+        # "scan": each root is rescanned every `scan_interval` seconds, with
+        # its index kept in `index_dir` so offline changes are picked up
+        self.backend = backend
+        self.scan_interval = scan_interval
+        self.index_dir = index_dir
+        self._scans: Dict[str, ScanWatch] = {}
+
+    @property
+    def watchers(self) -> List[WatcherConfig]:
+        return list(self.registry)
 
     def register_path(self, path: str):
         if not os.path.exists(os.path.abspath(path)):
             raise FileNotFoundError(
                 f"Path does not exist: {path}, {os.path.abspath(path)}"
             )
-        if not any(w.watch_path == path for w in self.watchers):
-            print("Path already exists in watcher")
 
         folder_name = basename(path.rstrip("/"))
         watcher = WatcherConfig(
             name=folder_name,
             watch_path=path,
             duration=datetime.datetime.now(),
-            logs=[],
             active=False,
         )
-        self.watchers.append(watcher)
+        try:
+            # Rejects duplicate names and duplicate paths
+            self.registry.add(watcher)
+        except ValueError as e:
+            print(e)
+            return
         print(f"Path '{path}' registered successfully. {os.path.abspath(path)}")
 
     def add_watcher(self, watcher_data):
@@ -49,58 +110,45 @@ class WatcherManager(FileSystemEventHandler):
             else:
                 watcher = WatcherConfig(**watcher_data)
 
-            # Check for duplicate paths
-            if any(w.watch_path == watcher.watch_path for w in self.watchers):
-                print(f"Watcher for path '{watcher.watch_path}' already exists.")
-                return
-
-            # Check for duplicate names
-            if any(w.name == watcher.name for w in self.watchers):
-                print(f"Watcher '{watcher.name}' already exists.")
-                return
-
-            self.watchers.append(watcher)
+            # Rejects duplicate names and duplicate paths
+            self.registry.add(watcher)
             print(f"Registered watcher '{watcher.name}' successfully.")
 
         except ValidationError as e:
             print(f"Invalid watcher config: {e}")
+        except ValueError as e:
+            print(e)
         except Exception as e:
             print(f"Unexpected error: {e}")
 
     @override
     def on_created(self, event: DirCreatedEvent | FileCreatedEvent):
-        watcher_name = self._get_watcher_for_path(
-            os.fsdecode(event.src_path)
-            if isinstance(event.src_path, bytes)
-            else event.src_path
-        )
-        if watcher_name:
-            log_entry = f"File created: {event.src_path} at {datetime.datetime.now()}"
-            self._add_log(watcher_name, log_entry)
+        self._record(EventKind.CREATED, event)
 
     @override
     def on_modified(
         self, event: DirModifiedEvent | FileModifiedEvent
     ):  # Override for modifications
-        watcher_name = self._get_watcher_for_path(
-            os.fsdecode(event.src_path)
-            if isinstance(event.src_path, bytes)
-            else event.src_path
-        )
-        if watcher_name:
-            log_entry = f"File modified: {event.src_path} at {datetime.datetime.now()}"
-            self._add_log(watcher_name, log_entry)
-
-    def _get_watcher_for_path(self, path: str) -> Optional[str]:
-        for w in self.watchers:
-            if w.watch_path and path.startswith(w.watch_path):
-                return w.name
-        return None
+        self._record(EventKind.MODIFIED, event)
 
-    def _add_log(self, name: str, log: str):
-        watcher = next((w for w in self.watchers if w.name == name), None)
-        if watcher:
-            watcher.logs.append(log)
+    @override
+    def on_deleted(self, event: DirDeletedEvent | FileDeletedEvent):
+        self._record(EventKind.DELETED, event)
+
+    def _record(self, kind: EventKind, event: Any):
+        src_path = event.src_path
+        if isinstance(src_path, bytes):
+            src_path = os.fsdecode(src_path)
+        self._record_path(kind, src_path, event.is_directory)
+
+    def _record_path(self, kind: EventKind, src_path: str, is_directory: bool = False):
+        watcher = self.registry.match(src_path)
+        if watcher is None:
+            return
+        watcher.logs.append(kind, src_path)
+        # Directory events only echo the file events inside them
+        if self.coalescer is not None and not is_directory:
+            self.coalescer.submit(kind.subject, src_path)
 
     def start_all(self):
         for watcher in self.watchers:
@@ -109,13 +157,22 @@ class WatcherManager(FileSystemEventHandler):
         print("All watchers started.")
 
     def start_one(self, name: str):
-        watcher = next((w for w in self.watchers if w.name == name), None)
+        watcher = self.registry.get(name)
         if watcher:
             watcher.active = True
             self._start_watcher(watcher)
             print(f"Watcher '{name}' started.")
 
     def _start_watcher(self, watcher: WatcherConfig):
+        if self.coalescer is not None:
+            self.coalescer.start()
+        if self.backend == "scan":
+            self._start_scan(watcher)
+            return
+        self._check_inotify()
+        if self.observer_pool_size:
+            self._schedule_shared(watcher)
+            return
         observer = Observer()
         event_handler = self  # This class handles events
         if watcher.watch_path:
@@ -123,13 +180,73 @@ class WatcherManager(FileSystemEventHandler):
         observer.start()
         self.observers[watcher.name] = observer
 
+    def _check_inotify(self):
+        if self._inotify_warned:
+            return
+        usage = _inotify_usage()
+        if usage is None:
+            return
+        used, limit = usage
+        if used + 1 >= limit * INOTIFY_WARN_RATIO:
+            self._inotify_warned = True
+            print(
+                f"[Watcher] Warning: {used} of {limit} inotify instances in use "
+                f"(fs.inotify.max_user_instances); every watchdog root takes "
+                f"one, even with a shared observer pool. Use the 'scan' backend "
+                f"(ECHO_WATCH_BACKEND=scan) for this many roots."
+            )
+
+    def _start_scan(self, watcher: WatcherConfig):
+        if watcher.name in self._scans or not watcher.watch_path:
+            return
+        index_path = None
+        if self.index_dir:
+            os.makedirs(self.index_dir, exist_ok=True)
+            index_path = os.path.join(self.index_dir, f"{watcher.name}.scan-index")
+        scan = ScanWatch(
+            TreeScanner(watcher.watch_path, index_path),
+            self._record_path,
+            self.scan_interval,
+        )
+        scan.start()
+        self._scans[watcher.name] = scan
+
+    def _schedule_shared(self, watcher: WatcherConfig):
+        if watcher.name in self._watches or not watcher.watch_path:
+            return
+        if len(self._pool) < self.observer_pool_size:
+            observer = Observer()
+            observer.start()
+            self._pool.append(observer)
+        else:
+            # Least-loaded observer keeps the pool balanced as roots come and go
+            observer = min(self._pool, key=lambda o: len(o.emitters))
+        watch = observer.schedule(self, watcher.watch_path, recursive=True)
+        self._watches[watcher.name] = (observer, watch)
+
+    def _unschedule_shared(self, name: str):
+        scheduled = self._watches.pop(name, None)
+        if scheduled:
+            observer, watch = scheduled
+            observer.unschedule(watch)
+
     def stop_all(self):
         for _, observer in self.observers.items():
             observer.stop()
             observer.join()
         self.observers.clear()
+        for observer in self._pool:
+            observer.stop()
+            observer.join()
+        self._pool.clear()
+        self._watches.clear()
+        for scan in self._scans.values():
+            scan.stop()
+        self._scans.clear()
         for watcher in self.watchers:
             watcher.active = False
+        if self.coalescer is not None:
+            self.coalescer.stop()
         print("All watchers stopped.")
 
     def stop_one(self, name: str):
@@ -138,7 +255,11 @@ class WatcherManager(FileSystemEventHandler):
             observer.stop()
             observer.join()
             del self.observers[name]
-        watcher = next((w for w in self.watchers if w.name == name), None)
+        self._unschedule_shared(name)
+        scan = self._scans.pop(name, None)
+        if scan is not None:
+            scan.stop()
+        watcher = self.registry.get(name)
         if watcher:
             watcher.active = False
         print(f"Watcher '{name}' stopped.")
@@ -158,7 +279,11 @@ class WatcherManager(FileSystemEventHandler):
             print(f"🟢 Active: {watcher.active}")
             print("🧾 Logs:")
             if watcher.logs:
-                for log in watcher.logs[-5:]:  # last 5 logs
-                    print(f"   • {log}")
+                now = time.monotonic()
+                for entry in watcher.logs.last(5):
+                    age = now - entry.timestamp
+                    print(
+                        f"   • {entry.kind.name.lower()}: {entry.path} ({age:.1f}s ago)"
+                    )
             else:
                 print("   (no logs yet)")
@@ -0,0 +1,93 @@
+import os
+from typing import Dict, Iterator, List, Optional
+
+from app.common.models.watcher import WatcherConfig
+
+
+def _components(path: str) -> List[str]:
+    return [part for part in os.path.abspath(path).split(os.sep) if part]
+
+
+class _Node:
+    __slots__ = ("children", "name")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.name: Optional[str] = None
+
+
+class WatcherRegistry:
+    """
+    Indexed set of watchers: a name -> watcher dict plus a trie over absolute
+    path components, so routing an event to its watcher is a longest-prefix
+    walk (O(path depth)) instead of a scan over every registered root.
+    """
+
+    def __init__(self):
+        self._by_name: Dict[str, WatcherConfig] = {}
+        self._root = _Node()
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __iter__(self) -> Iterator[WatcherConfig]:
+        return iter(list(self._by_name.values()))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def get(self, name: str) -> Optional[WatcherConfig]:
+        return self._by_name.get(name)
+
+    def get_by_path(self, path: str) -> Optional[WatcherConfig]:
+        """Return the watcher whose root is exactly `path`."""
+        node = self._root
+        for part in _components(path):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return self._by_name.get(node.name) if node.name else None
+
+    def add(self, watcher: WatcherConfig) -> None:
+        if watcher.name in self._by_name:
+            raise ValueError(f"Watcher '{watcher.name}' already exists.")
+        if watcher.watch_path:
+            if self.get_by_path(watcher.watch_path) is not None:
+                raise ValueError(
+                    f"Watcher for path '{watcher.watch_path}' already exists."
+                )
+            node = self._root
+            for part in _components(watcher.watch_path):
+                node = node.children.setdefault(part, _Node())
+            node.name = watcher.name
+        self._by_name[watcher.name] = watcher
+
+    def remove(self, name: str) -> Optional[WatcherConfig]:
+        watcher = self._by_name.pop(name, None)
+        if watcher is None or not watcher.watch_path:
+            return watcher
+
+        # Unset the root and prune now-empty branches on the way back up
+        trail = [self._root]
+        parts = _components(watcher.watch_path)
+        for part in parts:
+            trail.append(trail[-1].children[part])
+        trail[-1].name = None
+        for depth in range(len(parts), 0, -1):
+            node = trail[depth]
+            if node.children or node.name:
+                break
+            del trail[depth - 1].children[parts[depth - 1]]
+        return watcher
+
+    def match(self, path: str) -> Optional[WatcherConfig]:
+        """Return the watcher with the longest root that contains `path`."""
+        node = self._root
+        best = node.name
+        for part in _components(path):
+            node = node.children.get(part)
+            if node is None:
+                break
+            if node.name is not None:
+                best = node.name
+        return self._by_name.get(best) if best else None
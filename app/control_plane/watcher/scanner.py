@@ -0,0 +1,300 @@
+import marshal
+import os
+import stat
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.common.models.watcher import EventKind
+
+# (kind, absolute path) in the order they were found
+Changes = List[Tuple[EventKind, str]]
+
+INDEX_VERSION = 1
+
+
+class _Dir:
+    """
+    One directory in the index: its own mtime, its subdirectories, and its
+    files with their (inode, mtime_ns, size) in parallel typed arrays.
+    """
+
+    __slots__ = ("mtime_ns", "subdirs", "names", "inodes", "mtimes", "sizes")
+
+    def __init__(self, mtime_ns: int, subdirs: Tuple[str, ...], names: Tuple[str, ...]):
+        self.mtime_ns = mtime_ns
+        self.subdirs = subdirs
+        self.names = names
+        self.inodes = array("q")
+        self.mtimes = array("q")
+        self.sizes = array("q")
+
+    def to_record(self) -> tuple:
+        return (
+            self.mtime_ns,
+            self.subdirs,
+            self.names,
+            self.inodes.tobytes(),
+            self.mtimes.tobytes(),
+            self.sizes.tobytes(),
+        )
+
+    @classmethod
+    def from_record(cls, record: tuple) -> "_Dir":
+        mtime_ns, subdirs, names, inodes, mtimes, sizes = record
+        entry = cls(mtime_ns, subdirs, names)
+        entry.inodes.frombytes(inodes)
+        entry.mtimes.frombytes(mtimes)
+        entry.sizes.frombytes(sizes)
+        return entry
+
+
+class TreeScanner:
+    """
+    Change detection for a directory tree by comparing stat snapshots, for
+    filesystems where inotify is unreliable (network mounts, bind mounts) or
+    trees too large for per-directory watches.
+
+    Each scan() stats every indexed directory and lists (scandir) only those
+    whose mtime changed, i.e. where entries were added, removed or renamed;
+    files in unchanged directories are stat'ed to catch in-place writes,
+    unless `stat_files` is off (then only directory-level changes, including
+    atomic-rename saves, are seen, and cost follows the changed directories).
+    Directories are processed level by level on `workers` threads, since
+    stat and scandir release the GIL.
+
+    The index can be saved to `index_path` (marshal of per-directory
+    records), so the first scan after a restart reports what changed while
+    nothing was watching.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        index_path: Optional[str] = None,
+        workers: int = 8,
+        stat_files: bool = True,
+    ):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        self.workers = workers
+        self.stat_files = stat_files
+        # Paths relative to root ("" for the root itself)
+        self._dirs: Dict[str, _Dir] = {}
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="echo-scan")
+        self.stats = {"scans": 0, "listed": 0, "stat_files": 0}
+        self.loaded = self._load()
+        # The in-memory index differs from what is saved
+        self._dirty = False
+        self._building = False
+
+    def __len__(self) -> int:
+        """Files in the index."""
+        return sum(len(entry.names) for entry in self._dirs.values())
+
+    def _abs(self, rel: str, name: str = "") -> str:
+        path = os.path.join(self.root, rel) if rel else self.root
+        return os.path.join(path, name) if name else path
+
+    @staticmethod
+    def _join(rel: str, name: str) -> str:
+        return f"{rel}{os.sep}{name}" if rel else name
+
+    def _load(self) -> bool:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, "rb") as f:
+                version, root, records = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            print(f"[Scanner] Ignoring unreadable index '{self.index_path}': {e}")
+            return False
+        if version != INDEX_VERSION or root != self.root:
+            return False
+        self._dirs = {rel: _Dir.from_record(record) for rel, record in records.items()}
+        return True
+
+    def save(self) -> None:
+        """Write the index atomically to `index_path`, if it changed."""
+        if not self.index_path or not self._dirty:
+            return
+        records = {rel: entry.to_record() for rel, entry in self._dirs.items()}
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump((INDEX_VERSION, self.root, records), f)
+        os.replace(tmp, self.index_path)
+        self._dirty = False
+
+    def scan(self, emit: bool = True) -> Changes:
+        """
+        Bring the index up to date and return what changed since the last
+        scan; with `emit=False` (or on a first scan without an index) only
+        the index is built.
+        """
+        first = not self._dirs
+        # Nothing to compare against: skip building the change list
+        self._building = first or not emit
+        changes: Changes = []
+        seen = set()
+        level = [""]
+        while level:
+            results = self._pool.map(self._scan_dir, level, chunksize=16)
+            next_level = []
+            for rel, entry, dir_changes in results:
+                if entry is None:
+                    continue
+                seen.add(rel)
+                if entry is not self._dirs.get(rel):
+                    self.stats["listed"] += 1
+                    self._dirty = True
+                elif self.stat_files:
+                    self.stats["stat_files"] += len(entry.names)
+                self._dirs[rel] = entry
+                changes.extend(dir_changes)
+                next_level.extend(self._join(rel, name) for name in entry.subdirs)
+            level = next_level
+
+        # Directories that disappeared, along with everything under them
+        for rel in [rel for rel in self._dirs if rel not in seen]:
+            self._dirty = True
+            entry = self._dirs.pop(rel)
+            changes.extend(
+                (EventKind.DELETED, self._abs(rel, name)) for name in entry.names
+            )
+        self.stats["scans"] += 1
+        if changes:
+            self._dirty = True
+        return changes if emit and not first else []
+
+    def _scan_dir(self, rel: str) -> Tuple[str, Optional[_Dir], Changes]:
+        path = self._abs(rel)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return rel, None, []
+        old = self._dirs.get(rel)
+        if old is not None and old.mtime_ns == mtime_ns:
+            if self.stat_files:
+                return rel, old, self._check_files(rel, old)
+            return rel, old, []
+        return rel, *self._list_dir(rel, mtime_ns, old)
+
+    def _check_files(self, rel: str, entry: _Dir) -> Changes:
+        """Stat the files of an unchanged directory, updating them in place."""
+        changes: Changes = []
+        inodes, mtimes, sizes = entry.inodes, entry.mtimes, entry.sizes
+        base = os.path.join(self._abs(rel), "")
+        for i, name in enumerate(entry.names):
+            path = base + name
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Gone without the directory changing: caught on the next listing
+                continue
+            if (
+                st.st_mtime_ns != mtimes[i]
+                or st.st_size != sizes[i]
+                or st.st_ino != inodes[i]
+            ):
+                inodes[i], mtimes[i], sizes[i] = st.st_ino, st.st_mtime_ns, st.st_size
+                changes.append((EventKind.MODIFIED, path))
+        return changes
+
+    def _list_dir(
+        self, rel: str, mtime_ns: int, old: Optional[_Dir]
+    ) -> Tuple[_Dir, Changes]:
+        files: List[Tuple[str, int, int, int]] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(self._abs(rel)) as it:
+                for dirent in it:
+                    try:
+                        if dirent.is_dir(follow_symlinks=False):
+                            subdirs.append(dirent.name)
+                            continue
+                        st = dirent.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISREG(st.st_mode):
+                        files.append(
+                            (dirent.name, st.st_ino, st.st_mtime_ns, st.st_size)
+                        )
+        except OSError:
+            pass
+        files.sort()
+        subdirs.sort()
+
+        entry = _Dir(mtime_ns, tuple(subdirs), tuple(f[0] for f in files))
+        entry.inodes.extend(f[1] for f in files)
+        entry.mtimes.extend(f[2] for f in files)
+        entry.sizes.extend(f[3] for f in files)
+
+        changes: Changes = []
+        if self._building:
+            return entry, changes
+        previous = {}
+        if old is not None:
+            previous = {
+                name: (old.inodes[i], old.mtimes[i], old.sizes[i])
+                for i, name in enumerate(old.names)
+            }
+        for name, inode, mtime, size in files:
+            before = previous.pop(name, None)
+            if before is None:
+                changes.append((EventKind.CREATED, self._abs(rel, name)))
+            elif before != (inode, mtime, size):
+                changes.append((EventKind.MODIFIED, self._abs(rel, name)))
+        changes.extend((EventKind.DELETED, self._abs(rel, name)) for name in previous)
+        return entry, changes
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class ScanWatch:
+    """Runs a TreeScanner every `interval` seconds on its own thread."""
+
+    def __init__(
+        self,
+        scanner: TreeScanner,
+        on_change: Callable[[EventKind, str], None],
+        interval: float = 2.0,
+    ):
+        self.scanner = scanner
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="echo-scan-watch", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        # A saved index makes the first pass report offline changes
+        emit = self.scanner.loaded
+        while True:
+            try:
+                for kind, path in self.scanner.scan(emit=emit):
+                    self.on_change(kind, path)
+                self.scanner.save()
+            except Exception as e:
+                print(f"[Scanner] Scan of '{self.scanner.root}' failed: {e}")
+            emit = True
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.scanner.close()
@@ -0,0 +1,63 @@
+"""
+Standalone worker process: handles the file events the controller publishes
+without watching anything itself. Workers and the controller join the same
+queue group by default, so running several splits spec parsing between them;
+set ECHO_QUEUE_GROUP or ECHO_SHARDS the same way on every process to change it.
+
+    python -m app.worker.main
+"""
+
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+from app.control_plane.events.client import NATSClient
+from app.control_plane.events.dedup import SeenSet
+from app.control_plane.events.executor import HandlerExecutor
+from app.control_plane.events.loader import DEFAULT_QUEUE_GROUP, Loader
+from app.control_plane.events.sharding import ShardCoordinator
+
+load_dotenv()
+
+NATS_BASE_URL = os.getenv("NATS_BASE_URL")
+NATS_BASE_PORT = os.getenv("NATS_BASE_PORT")
+ECHO_QUEUE_GROUP = os.getenv("ECHO_QUEUE_GROUP", DEFAULT_QUEUE_GROUP)
+ECHO_SHARDS = int(os.getenv("ECHO_SHARDS", "0"))
+# Events come from the broker, so they are validated unless explicitly trusted
+# (as for the controller, see ECHO_TRUST_EVENTS there)
+ECHO_TRUST_EVENTS = os.getenv("ECHO_TRUST_EVENTS", "") == "1"
+
+
+async def main():
+    nats_client = NATSClient(base_url=NATS_BASE_URL, port=NATS_BASE_PORT)
+    await nats_client.init_nats()
+
+    shards = ShardCoordinator(nats_client, ECHO_SHARDS) if ECHO_SHARDS else None
+    executor = HandlerExecutor()
+    loader = Loader(
+        nats_client,
+        trusted=ECHO_TRUST_EVENTS,
+        dedup=SeenSet(),
+        executor=executor,
+        queue=ECHO_QUEUE_GROUP,
+        shards=shards,
+    )
+    await loader.load_defaults()
+    if shards is not None:
+        await shards.start()
+    print("🛠️ Worker ready.")
+
+    try:
+        while True:
+            await asyncio.sleep(5)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("🛑 Stopping worker...")
+        if shards is not None:
+            await shards.stop()
+        await loader.unregister_all()
+        await executor.drain()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,322 @@
+import asyncio
+import contextlib
+import hashlib
+import inspect
+import itertools
+import mmap
+import os
+import tempfile
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Union
+
+Chunks = Union[Iterable[bytes], AsyncIterator[bytes]]
+# Largest output as_text() reads for a handle without a store (e.g. unpickled)
+TEXT_BYTES = 1024 * 1024
+
+
+class OutputHandle:
+    """
+    A step output kept in a BlobStore. Later steps receive the handle in
+    place of the data (whole-value `${{ step.output }}` references pass it
+    through untouched) and read it as a zero-copy memoryview over an mmap
+    (`view()`), as async chunks (`chunks()`), or from `path`. Equality and
+    hashing use the content digest, so they cost nothing for large outputs.
+    """
+
+    __slots__ = ("digest", "size", "path", "text", "_store")
+
+    def __init__(
+        self,
+        digest: str,
+        size: int,
+        path: str,
+        text: bool = False,
+        store: Optional["BlobStore"] = None,
+    ):
+        self.digest = digest
+        self.size = size
+        self.path = path
+        # Produced as a str; as_text() gives it back
+        self.text = text
+        self._store = store
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, OutputHandle) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"<OutputHandle {self.digest[:12]} {self.size} bytes>"
+
+    def __reduce__(self):
+        # Copies (pickles, cache entries) do not own a reference
+        return OutputHandle, (self.digest, self.size, self.path, self.text)
+
+    @contextlib.contextmanager
+    def view(self) -> Iterator[memoryview]:
+        """Read-only memoryview of the content; slices must not outlive it."""
+        if self.size == 0:
+            yield memoryview(b"")
+            return
+        with (
+            open(self.path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+    def windows(self, size: Optional[int] = None) -> Iterator[memoryview]:
+        """
+        Zero-copy memoryviews over consecutive `size`-byte windows of the
+        content. Pages of a window are dropped from this process once the
+        next one is requested, so resident memory stays at about one window.
+        """
+        if size is None:
+            size = self._store.chunk_bytes if self._store else 1024 * 1024
+        size = -(-size // mmap.PAGESIZE) * mmap.PAGESIZE
+        with self.view() as view:
+            mapped = view.obj
+            for start in range(0, self.size, size):
+                window = view[start : start + size]
+                try:
+                    yield window
+                finally:
+                    window.release()
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+                    mapped.madvise(
+                        mmap.MADV_DONTNEED, start, min(size, self.size - start)
+                    )
+
+    async def chunks(self, size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """The content in chunks of `size` (the store's chunk_bytes) bytes."""
+        if size is None:
+            size = self._store.chunk_bytes if self._store else 1024 * 1024
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def read(self) -> bytes:
+        """The whole content in memory; prefer view() or chunks()."""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def as_text(self) -> str:
+        """
+        The content decoded as UTF-8, e.g. for a `${{ }}` string template.
+        Raises ValueError past the store's `text_bytes` rather than reading a
+        large output into memory whole.
+        """
+        limit = self._store.text_bytes if self._store else TEXT_BYTES
+        if self.size > limit:
+            raise ValueError(
+                f"Output {self.digest[:12]} is {self.size} bytes, more than the "
+                f"{limit} (text_bytes) that can be embedded in a string; "
+                f"reference it on its own as '${{{{ <step>.output }}}}' to pass "
+                f"the handle instead"
+            )
+        return self.read().decode("utf-8", errors="replace")
+
+    def release(self) -> None:
+        """Drop this handle's reference; the blob goes with the last one."""
+        store, self._store = self._store, None
+        if store is not None:
+            store.release(self.digest)
+
+
+class _Writer:
+    """One blob being written: a temp file, hashed as it fills."""
+
+    __slots__ = ("store", "path", "file", "hasher", "size")
+
+    def __init__(self, store: "BlobStore"):
+        self.store = store
+        self.path = os.path.join(store.directory, f".tmp-{next(store._names)}")
+        self.file = open(self.path, "wb")
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: Any) -> None:
+        size = memoryview(data).nbytes
+        self.store._reserve(size)
+        self.size += size
+        self.hasher.update(data)
+        self.file.write(data)
+
+    def write_all(self, chunks: Iterable[bytes]) -> None:
+        for chunk in chunks:
+            self.write(chunk)
+
+    def abort(self) -> None:
+        self.file.close()
+        self.store._reserve(-self.size)
+        with contextlib.suppress(OSError):
+            os.remove(self.path)
+
+
+class BlobStore:
+    """
+    Local content-addressed store for large step outputs.
+
+    `adopt()` turns a tool's return value into what later steps see: bytes
+    or str up to `inline_bytes` stay inline, larger ones are written to
+    `directory` under their sha256, and (async) iterators of bytes are
+    streamed there `chunk_bytes` at a time. Identical outputs share one file;
+    each handle holds a reference and the file is removed when the last is
+    released. Writes beyond `max_disk_bytes` fail the producing step.
+
+    Memory held per output is thus at most `inline_bytes` for inline values
+    and about `chunk_bytes` while streaming in or out; mmap views are backed
+    by the page cache rather than the heap. The exception is an output
+    embedded in a string template, which is read whole; outputs larger than
+    `text_bytes` fail the step that embeds them.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        inline_bytes: int = 64 * 1024,
+        chunk_bytes: int = 1024 * 1024,
+        max_disk_bytes: int = 16 * 1024**3,
+        text_bytes: int = TEXT_BYTES,
+    ):
+        if inline_bytes < 0 or chunk_bytes <= 0 or max_disk_bytes <= 0:
+            raise ValueError(
+                "inline_bytes must not be negative, chunk_bytes and "
+                "max_disk_bytes must be positive"
+            )
+        if text_bytes < 0:
+            raise ValueError("text_bytes must not be negative")
+        self.directory = directory or tempfile.mkdtemp(prefix="echo-blobs-")
+        self.inline_bytes = inline_bytes
+        self.chunk_bytes = chunk_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.text_bytes = text_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self.disk_bytes = 0
+        self._refs: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        self._names = itertools.count()
+        # Writers run on worker threads
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "inline": 0,
+            "stored": 0,
+            "deduplicated": 0,
+            "removed": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    async def adopt(self, value: Any) -> Any:
+        """`value` as later steps should see it: inline, or an OutputHandle."""
+        if isinstance(value, OutputHandle):
+            return value
+        if isinstance(value, str):
+            # Sized in characters, a lower bound on the encoded size
+            if len(value) <= self.inline_bytes:
+                self.stats["inline"] += 1
+                return value
+            return await self.put(value.encode(), text=True)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            if memoryview(value).nbytes <= self.inline_bytes:
+                self.stats["inline"] += 1
+                return value
+            return await self.put(value)
+        if hasattr(value, "__aiter__") or inspect.isgenerator(value):
+            return await self.write(value)
+        return value
+
+    async def put(self, data: Any, text: bool = False) -> OutputHandle:
+        """Store `data` (any bytes-like object) off the event loop."""
+        return await asyncio.to_thread(self._put, data, text)
+
+    def _put(self, data: Any, text: bool) -> OutputHandle:
+        writer = _Writer(self)
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        return self._commit(writer, text)
+
+    async def write(self, chunks: Chunks, text: bool = False) -> OutputHandle:
+        """
+        Stream `chunks` into the store. Async iterators are consumed on the
+        loop, with small chunks gathered into writes of `chunk_bytes`; plain
+        iterators are consumed on a worker thread.
+        """
+        writer = _Writer(self)
+        try:
+            if hasattr(chunks, "__aiter__"):
+                pending = bytearray()
+                async for chunk in chunks:
+                    if not pending and len(chunk) >= self.chunk_bytes:
+                        await asyncio.to_thread(writer.write, chunk)
+                        continue
+                    pending += chunk
+                    if len(pending) >= self.chunk_bytes:
+                        await asyncio.to_thread(writer.write, pending)
+                        pending = bytearray()
+                if pending:
+                    await asyncio.to_thread(writer.write, pending)
+            else:
+                await asyncio.to_thread(writer.write_all, chunks)
+        except BaseException:
+            writer.abort()
+            raise
+        return self._commit(writer, text)
+
+    def _reserve(self, size: int) -> None:
+        with self._lock:
+            if size > 0 and self.disk_bytes + size > self.max_disk_bytes:
+                raise ValueError(
+                    f"Blob store '{self.directory}' is full "
+                    f"(max_disk_bytes={self.max_disk_bytes})"
+                )
+            self.disk_bytes += size
+
+    def _commit(self, writer: _Writer, text: bool) -> OutputHandle:
+        writer.file.close()
+        digest = writer.hasher.hexdigest()
+        path = os.path.join(self.directory, digest)
+        with self._lock:
+            if digest in self._refs:
+                self._refs[digest] += 1
+                self.disk_bytes -= writer.size
+                self.stats["deduplicated"] += 1
+                duplicate = True
+            else:
+                os.replace(writer.path, path)
+                self._refs[digest] = 1
+                self._sizes[digest] = writer.size
+                self.stats["stored"] += 1
+                duplicate = False
+        if duplicate:
+            with contextlib.suppress(OSError):
+                os.remove(writer.path)
+        return OutputHandle(digest, writer.size, path, text, self)
+
+    def release(self, digest: str) -> None:
+        with self._lock:
+            refs = self._refs.get(digest)
+            if refs is None:
+                return
+            if refs > 1:
+                self._refs[digest] = refs - 1
+                return
+            del self._refs[digest]
+            self.disk_bytes -= self._sizes.pop(digest)
+            self.stats["removed"] += 1
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(self.directory, digest))
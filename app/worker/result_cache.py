@@ -0,0 +1,221 @@
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from app.common.models.echo_event import canonical_json
+
+MISSING = object()
+
+
+def pure_tool(version: str = "1"):
+    """
+    Mark a tool as deterministic so its results may be cached. Bump `version`
+    whenever the tool's behaviour changes; it is part of the cache key.
+    """
+
+    def mark(tool):
+        tool.pure = True
+        tool.version = version
+        return tool
+
+    return mark
+
+
+def is_pure(tool: Any) -> bool:
+    return getattr(tool, "pure", False) is True
+
+
+def _by_digest(value: Any) -> Any:
+    # Blob-store outputs (OutputHandle) are keyed by content, never read
+    digest = getattr(value, "digest", None)
+    if isinstance(digest, str):
+        return {"blob": digest}
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class _Entry:
+    __slots__ = ("expires", "size", "data", "path")
+
+    def __init__(self, expires: float, size: int, data: Optional[bytes], path: str):
+        self.expires = expires
+        self.size = size
+        # Pickled result, or None when it was spilled to `path`
+        self.data = data
+        self.path = path
+
+
+class ResultCache:
+    """
+    Content-addressed cache of tool results.
+
+    Keys are the sha256 of the canonical JSON (as used by EchoEvent.hash) of
+    (tool, version, resolved arguments). Results are stored pickled, so every
+    hit hands out a fresh copy; results larger than `spill_bytes` are written
+    to `directory` and only their path is kept in memory. Entries expire after
+    `ttl` seconds and are evicted LRU-first once `max_entries`, `max_bytes`
+    (in memory) or `max_disk_bytes` (spilled) is exceeded. Results spilled by
+    an earlier process are adopted from `directory` on start, aged by mtime.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        ttl: float = 3600.0,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        spill_bytes: int = 256 * 1024,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if ttl <= 0 or max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("ttl, max_entries and max_bytes must be positive")
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_bytes = spill_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "spills": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "uncacheable": 0,
+        }
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._adopt()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(tool: str, version: str, args: Mapping[str, Any]) -> Optional[str]:
+        """Cache key for a call, or None if `args` is not JSON-serialisable."""
+        try:
+            encoded = canonical_json([tool, version, args], default=_by_digest)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return default
+        if entry.expires <= self.clock():
+            self._discard(key)
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return default
+        try:
+            data = entry.data
+            if data is None:
+                with open(entry.path, "rb") as f:
+                    data = f.read()
+            value = pickle.loads(data)
+        except (OSError, pickle.UnpicklingError) as e:
+            print(f"[Cache] Dropping unreadable entry {key[:12]}: {e}")
+            self._discard(key)
+            self.stats["misses"] += 1
+            return default
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store `value`; returns False if it cannot be pickled or spilled."""
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.stats["uncacheable"] += 1
+            return False
+
+        path = ""
+        if self.directory and len(data) > self.spill_bytes:
+            path = os.path.join(self.directory, key)
+            try:
+                with open(f"{path}.tmp", "wb") as f:
+                    f.write(data)
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                print(f"[Cache] Could not spill {key[:12]}: {e}")
+                self.stats["uncacheable"] += 1
+                return False
+            self.stats["spills"] += 1
+
+        self._discard(key)
+        entry = _Entry(self.clock() + self.ttl, len(data), None if path else data, path)
+        self._entries[key] = entry
+        if path:
+            self._disk_bytes += entry.size
+        else:
+            self._bytes += entry.size
+        self.stats["stores"] += 1
+        self._evict()
+        return True
+
+    def invalidate(self, key: str) -> None:
+        self._discard(key)
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._discard(key)
+
+    def _adopt(self) -> None:
+        """Index (or, if expired, delete) blobs left in `directory`."""
+        found = []
+        for dirent in os.scandir(self.directory):
+            try:
+                if not dirent.is_file(follow_symlinks=False):
+                    continue
+                st = dirent.stat(follow_symlinks=False)
+                age = time.time() - st.st_mtime
+                # Interrupted spills, and results that have outlived the TTL
+                if dirent.name.endswith(".tmp") or age >= self.ttl:
+                    os.remove(dirent.path)
+                    continue
+            except OSError:
+                continue
+            found.append((age, dirent.name, dirent.path, st.st_size))
+
+        # Oldest first, so they are also the first to be evicted
+        now = self.clock()
+        for age, key, path, size in sorted(found, reverse=True):
+            self._entries[key] = _Entry(now + self.ttl - age, size, None, path)
+            self._disk_bytes += size
+        self._evict()
+        if found:
+            print(f"[Cache] Adopted {len(self._entries)} spilled results")
+
+    def _evict(self) -> None:
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or self._bytes > self.max_bytes
+            or self._disk_bytes > self.max_disk_bytes
+        ):
+            key = next(iter(self._entries))
+            self._discard(key)
+            self.stats["evictions"] += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.path:
+            self._disk_bytes -= entry.size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        else:
+            self._bytes -= entry.size
@@ -0,0 +1,198 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from app.common.models.echo import Echo
+from app.worker.outputs import BlobStore, OutputHandle
+from app.worker.result_cache import MISSING, ResultCache, is_pure
+
+# A tool receives the step's rendered `with` arguments
+Tool = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+OK = "ok"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class PlanResult:
+    """Outcome of one plan run; every mapping follows the plan's compiled order."""
+
+    __slots__ = ("outputs", "status", "errors", "returns", "elapsed")
+
+    def __init__(self):
+        self.outputs: Dict[str, Any] = {}
+        self.status: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        # Rendered `returns`, or None when any step did not complete
+        self.returns: Optional[Dict[str, Any]] = None
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(status == OK for status in self.status.values())
+
+    def release(self) -> None:
+        """
+        Release outputs that hold resources: blobs spilled to a BlobStore and
+        anything else with a release() method, such as git.clone checkouts.
+        """
+        for value in self.outputs.values():
+            release = getattr(value, "release", None)
+            if callable(release):
+                release()
+
+
+class PlanScheduler:
+    """
+    Runs a spec's step DAG, starting each step as soon as the steps it reads
+    from have finished.
+
+    At most `concurrency` steps run at once overall, and at most
+    `tool_concurrency` (or the `per_tool` override) per tool. Only tools listed
+    in the spec's `permissions.tools` may be used. When a step fails, every
+    step depending on it, directly or not, is cancelled; independent branches
+    keep running.
+
+    With a `cache`, results of tools marked with @pure_tool are looked up by
+    (tool, version, rendered arguments) before the tool is called.
+
+    With a `store`, large bytes/str results and results streamed as
+    (async) iterators of bytes are kept in the BlobStore, and dependents get
+    an OutputHandle instead; call PlanResult.release() when done with them.
+    """
+
+    def __init__(
+        self,
+        tools: Mapping[str, Tool],
+        concurrency: int = 16,
+        tool_concurrency: int = 4,
+        per_tool: Optional[Dict[str, int]] = None,
+        cache: Optional[ResultCache] = None,
+        store: Optional[BlobStore] = None,
+    ):
+        if concurrency <= 0 or tool_concurrency <= 0:
+            raise ValueError("concurrency and tool_concurrency must be positive")
+        self.tools = tools
+        self.concurrency = concurrency
+        self.tool_concurrency = tool_concurrency
+        self.per_tool = dict(per_tool or {})
+        self.cache = cache
+        self.store = store
+
+    def check(self, echo: Echo) -> None:
+        """Raise ValueError if a step uses a tool that is not permitted or known."""
+        permitted = set(echo.permissions.tools)
+        for step in echo.compiled.steps.values():
+            if step.use not in permitted:
+                raise ValueError(
+                    f"Step '{step.id}' uses '{step.use}', which is not in "
+                    f"permissions.tools"
+                )
+            if step.use not in self.tools:
+                raise ValueError(f"Step '{step.id}' uses unknown tool '{step.use}'")
+
+    async def run(self, echo: Echo, inputs: Mapping[str, Any]) -> PlanResult:
+        self.check(echo)
+        plan = echo.compiled
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        limits = {
+            tool: asyncio.Semaphore(self.per_tool.get(tool, self.tool_concurrency))
+            for tool in echo.permissions.tools
+        }
+
+        outputs: Dict[str, Any] = {}
+        status: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        waiting = {step_id: len(step.deps) for step_id, step in plan.steps.items()}
+        position = {step_id: i for i, step_id in enumerate(plan.order)}
+        running: Dict["asyncio.Task[Any]", str] = {}
+
+        async def run_step(step_id: str) -> Any:
+            step = plan.steps[step_id]
+            args = step.render_args(inputs, outputs)
+            tool = self.tools[step.use]
+            key = None
+            if self.cache is not None and is_pure(tool):
+                key = self.cache.key(step.use, getattr(tool, "version", ""), args)
+                if key is not None:
+                    cached = self.cache.get(key)
+                    if cached is not MISSING:
+                        return cached
+            async with slots, limits[step.use]:
+                if inspect.iscoroutinefunction(tool):
+                    value = await tool(args)
+                elif inspect.isasyncgenfunction(tool):
+                    value = tool(args)
+                else:
+                    value = await asyncio.to_thread(tool, args)
+                if self.store is not None:
+                    # Streamed outputs are produced while holding the slot
+                    value = await self.store.adopt(value)
+            # A cached copy would not hold a reference to the blob
+            if key is not None and not isinstance(value, OutputHandle):
+                self.cache.put(key, value)
+            return value
+
+        def start(step_id: str) -> None:
+            running[asyncio.create_task(run_step(step_id))] = step_id
+
+        def cancel_dependents(step_id: str) -> None:
+            stack = list(plan.dependents[step_id])
+            while stack:
+                dependent = stack.pop()
+                if dependent in status:
+                    continue
+                status[dependent] = CANCELLED
+                errors[dependent] = f"upstream step '{step_id}' failed"
+                stack.extend(plan.dependents[dependent])
+
+        for step_id in plan.order:
+            if waiting[step_id] == 0:
+                start(step_id)
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=lambda t: position[running[t]]):
+                    step_id = running.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        status[step_id] = FAILED
+                        errors[step_id] = f"{type(error).__name__}: {error}"
+                        print(f"[Scheduler] Step '{step_id}' failed: {error}")
+                        cancel_dependents(step_id)
+                        continue
+                    status[step_id] = OK
+                    outputs[step_id] = task.result()
+                    # Start newly ready dependents in plan order
+                    ready = []
+                    for dependent in plan.dependents[step_id]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0 and dependent not in status:
+                            ready.append(dependent)
+                    for dependent in sorted(ready, key=position.__getitem__):
+                        start(dependent)
+        finally:
+            for task in running:
+                task.cancel()
+
+        result = PlanResult()
+        for step_id in plan.order:
+            result.status[step_id] = status.get(step_id, CANCELLED)
+            if step_id in outputs:
+                result.outputs[step_id] = outputs[step_id]
+            if step_id in errors:
+                result.errors[step_id] = errors[step_id]
+        if result.ok:
+            try:
+                result.returns = plan.render_returns(inputs, outputs)
+            except BaseException:
+                # e.g. an output too large to embed; nobody gets the handles
+                result.release()
+                raise
+        result.elapsed = time.perf_counter() - started
+        return result
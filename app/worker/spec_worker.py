@@ -1,6 +1,208 @@
+from concurrent.futures import Executor
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+from app.common.models.echo import Echo
 from app.common.models.echo_event import EchoEvent
-from app.common.utils.loader import load
+from app.common.utils.bulk import bulk_load_paths, iter_spec_paths
+from app.common.utils.capability_index import CapabilityIndex, dump_terms, echo_terms
+from app.common.utils.snapshot import SpecSnapshot, decode_dump, encode_echo
+from app.common.utils.spec_diff import diff_echo
+from app.common.utils.spec_registry import SpecRegistry
+from app.worker.tool_registry import ToolRegistry
+import hashlib
 import os
+import threading
+
+# Shared across handlers so repeated events for an unchanged file skip parsing.
+registry = SpecRegistry()
+# Tools this worker can run; plugins are imported on first use.
+tools = ToolRegistry.builtin()
+# Accepted specs by capability, tool, permission and input, for agents
+capabilities = CapabilityIndex()
+# Digest of the version of each spec (by absolute path) that passed every
+# check; reconciliation diffs against it.
+accepted: Dict[str, str] = {}
+# preload() fills `accepted` (and primes the registry) from a worker thread
+# while handlers reconcile on the loop; each update to the pair holds this.
+_accepted_lock = threading.Lock()
+# Receives a compact "spec.changed" event whenever an accepted spec changes.
+change_sink: Optional[Callable[[EchoEvent], Awaitable[None]]] = None
+# Where YAML parsing + validation runs; None means the loop's thread pool.
+parse_pool: Optional[Executor] = None
+
+
+def use_parse_pool(pool: Optional[Executor]):
+    """Offload spec parsing to `pool` (e.g. a ProcessPoolExecutor)."""
+    global parse_pool
+    parse_pool = pool
+
+
+def use_change_sink(sink: Optional[Callable[[EchoEvent], Awaitable[None]]]):
+    """Publish spec change-sets through `sink` (e.g. an Emitter)."""
+    global change_sink
+    change_sink = sink
+
+
+def check_tools(echo: Echo, src: str) -> bool:
+    """Reject specs whose permissions name tools this worker does not have."""
+    missing = tools.missing(echo)
+    if missing:
+        print(f"[Loader] {src} declares unknown tools: {', '.join(missing)}")
+        return False
+    return True
+
+
+def preload(root: str, workers: Optional[int] = None, snapshot: bool = True):
+    """
+    Load every existing spec under `root` into the registry (cold start).
+
+    With `snapshot`, specs whose (mtime_ns, size) or content digest still match
+    the tree's on-disk snapshot are primed lazily from it and never re-parsed;
+    only new or changed files go through the bulk loader, after which the
+    snapshot is rewritten. Specs that reload() accepted while this ran are
+    newer than what it read, and are left alone.
+    """
+    snap = SpecSnapshot.for_tree(root) if snapshot else None
+    with _accepted_lock:
+        started = dict(accepted)
+    fresh, stale = [], []
+    for path in iter_spec_paths(root):
+        entry = snap.entry(path) if snap is not None else None
+        if entry is None:
+            stale.append(path)
+            continue
+        try:
+            st = os.stat(path)
+            if st.st_mtime_ns != entry.mtime_ns or st.st_size != entry.size:
+                with open(path, "rb") as stream:
+                    if hashlib.sha256(stream.read()).hexdigest() != entry.digest:
+                        stale.append(path)
+                        continue
+        except OSError:
+            stale.append(path)
+            continue
+        fresh.append((path, entry.digest, st.st_mtime_ns, st.st_size))
+
+    records, terms = [], []
+    loaded, failed = 0, 0
+    for path, digest, mtime_ns, size in fresh:
+        blob = snap.blob(path)
+        # Checked and indexed from the raw dump so the Echo itself stays unbuilt
+        dump = decode_dump(blob)
+        if any(tool not in tools for tool in dump["permissions"]["tools"]):
+            # A tool left the manifest since the snapshot was written; the
+            # bulk loader re-checks (and reports) the spec
+            stale.append(path)
+            continue
+        key = os.path.abspath(path)
+        with _accepted_lock:
+            if accepted.get(key) != started.get(key):
+                continue
+            registry.prime_lazy(path, partial(snap.load, path), digest, mtime_ns, size)
+            accepted[key] = digest
+        terms.append((key, digest, dump_terms(dump)))
+        records.append((path, blob, digest, mtime_ns, size))
+        loaded += 1
+    primed = loaded
+
+    for result in bulk_load_paths(stale, workers=workers):
+        if result.echo is None:
+            failed += 1
+            print(f"[Loader] Failed to load {result.path}: {result.error}")
+            continue
+        if not check_tools(result.echo, result.path):
+            failed += 1
+            continue
+        key = os.path.abspath(result.path)
+        with _accepted_lock:
+            if accepted.get(key) != started.get(key):
+                continue
+            registry.prime(
+                result.path, result.echo, result.digest, result.mtime_ns, result.size
+            )
+            accepted[key] = result.digest
+        terms.append((key, result.digest, echo_terms(result.echo)))
+        records.append(
+            (
+                result.path,
+                encode_echo(result.echo),
+                result.digest,
+                result.mtime_ns,
+                result.size,
+            )
+        )
+        loaded += 1
+    with _accepted_lock:
+        # Not for specs a reload() has since replaced and indexed itself
+        capabilities.update(
+            (key, spec_terms)
+            for key, digest, spec_terms in terms
+            if accepted.get(key) == digest
+        )
+
+    if snap is not None and (stale or len(fresh) != len(snap)):
+        try:
+            SpecSnapshot.write(snap.path, records)
+        except OSError as e:
+            print(f"[Loader] Could not write snapshot '{snap.path}': {e}")
+    print(
+        f"[Loader] Preloaded {loaded} specs from '{root}' "
+        f"({primed} from snapshot, {failed} failed)"
+    )
+    return loaded, failed
+
+
+async def reload(src: str) -> Optional[Echo]:
+    """
+    Load `src` and reconcile it against its previously accepted version.
+
+    Only what the structural diff touches is redone: tools are re-checked
+    only if permissions changed, and the compiled plan is shared with the
+    previous version unless steps, inputs or returns changed. A compact
+    change-set (not the spec itself) is sent to the change sink.
+    """
+    key = os.path.abspath(src)
+    with _accepted_lock:
+        baseline = registry.digest(src) == accepted.get(key)
+        old = registry.peek(src) if baseline else None
+    echo = await registry.aget(src, parse_pool)
+    if echo is None:
+        with _accepted_lock:
+            accepted.pop(key, None)
+        capabilities.discard(key)
+        return None
+    if echo is old:
+        return echo
+
+    diff = diff_echo(old, echo)
+    if diff.affects_tools and not check_tools(echo, src):
+        with _accepted_lock:
+            accepted.pop(key, None)
+        capabilities.discard(key)
+        return None
+    if old is not None and not diff.affects_plan:
+        echo.reuse_compiled(old)
+    digest = registry.digest(src)
+    with _accepted_lock:
+        accepted[key] = digest
+    if diff.affects_index or key not in capabilities:
+        capabilities.add_echo(key, echo)
+
+    if diff and change_sink is not None:
+        payload = {"path": src, "digest": digest, "changes": diff.to_payload()}
+        await change_sink(
+            EchoEvent(name="spec.changed", source="spec_worker", payload=payload)
+        )
+    return echo
+
+
+def forget(src: str) -> None:
+    """Drop a spec that no longer exists from the registry and the index."""
+    key = os.path.abspath(src)
+    with _accepted_lock:
+        registry.invalidate(key)
+        accepted.pop(key, None)
+    capabilities.discard(key)
 
 
 async def handle_file_created(event: EchoEvent):
@@ -20,12 +222,15 @@ async def handle_file_created(event: EchoEvent):
         if src.endswith((".tmp", ".swp", "~")):
             return
 
-        loaded_file = load(src)
-        if loaded_file:
-            print(f"[Loader] Loaded new file: {src}")
-            return True
+        echo = await reload(src)
+        if echo is None:
+            raise ValueError(f"Spec '{src}' was not accepted")
+        print(f"[Loader] Loaded new file: {src}")
+        return echo
     except Exception as e:
         print(f"Error in handle_file_created: {e}")
+        # Let the Loader see the failure, so a redelivery is not deduplicated
+        raise
 
 
 async def handle_file_modified(event: EchoEvent):
@@ -34,7 +239,11 @@ async def handle_file_modified(event: EchoEvent):
             return
 
         src = event.payload.get("path") or event.payload.get("src")
-        if not src or not os.path.exists(src):
+        if not src:
+            return
+        if not os.path.exists(src):
+            # Deleted since: stop offering it to agents
+            forget(src)
             return
 
         # Ignore directories and non-YAML files
@@ -45,9 +254,30 @@ async def handle_file_modified(event: EchoEvent):
         if src.endswith((".tmp", ".swp", "~")):
             return
 
-        loaded_file = load(src)
-        if loaded_file:
-            print(f"[Loader] Reloaded modified file: {src}")
-            return True
+        echo = await reload(src)
+        if echo is None:
+            raise ValueError(f"Spec '{src}' was not accepted")
+        print(f"[Loader] Reloaded modified file: {src}")
+        return echo
     except Exception as e:
         print(f"Error in handle_file_modified: {e}")
+        # Let the Loader see the failure, so a redelivery is not deduplicated
+        raise
+
+
+async def handle_file_deleted(event: EchoEvent):
+    try:
+        if not event or not event.payload:
+            return
+
+        src = event.payload.get("path") or event.payload.get("src")
+        # Re-created since: the created/modified event that follows reloads it
+        if not src or os.path.exists(src):
+            return
+
+        if os.path.abspath(src) in accepted:
+            print(f"[Loader] Removed deleted file: {src}")
+        forget(src)
+    except Exception as e:
+        print(f"Error in handle_file_deleted: {e}")
+        raise
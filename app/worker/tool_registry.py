@@ -0,0 +1,133 @@
+import importlib
+import os
+from importlib import metadata
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple
+
+import yaml
+
+from app.common.models.echo import Echo
+from app.worker.result_cache import pure_tool
+
+BUILTIN_MANIFEST = os.path.join(os.path.dirname(__file__), "tools", "manifest.yaml")
+# Third-party packages register tools as `name = "module:callable"`
+ENTRY_POINT_GROUP = "echo.tools"
+
+
+class ToolSpec(NamedTuple):
+    name: str
+    target: str  # "package.module:callable"
+    pure: bool = False
+    version: str = "1"
+    description: str = ""
+
+
+class ToolRegistry(Mapping[str, Callable[..., Any]]):
+    """
+    Index of available tools built from metadata only.
+
+    Membership, iteration and spec validation never import anything; a tool's
+    module is imported the first time the tool itself is looked up, so worker
+    startup does not pay for plugins (and their dependencies) a spec never
+    uses.
+    """
+
+    def __init__(self, specs: Iterable[ToolSpec] = ()):
+        self._specs: Dict[str, ToolSpec] = {}
+        self._loaded: Dict[str, Callable[..., Any]] = {}
+        for spec in specs:
+            self.register(spec)
+
+    @classmethod
+    def from_manifest(cls, path: str) -> "ToolRegistry":
+        registry = cls()
+        registry.load_manifest(path)
+        return registry
+
+    @classmethod
+    def builtin(cls, entry_points: bool = False) -> "ToolRegistry":
+        """The built-in tools, plus installed `echo.tools` entry points if asked."""
+        registry = cls.from_manifest(BUILTIN_MANIFEST)
+        if entry_points:
+            registry.load_entry_points()
+        return registry
+
+    def load_manifest(self, path: str) -> None:
+        with open(path, "r") as stream:
+            manifest = yaml.safe_load(stream) or {}
+        for name, fields in (manifest.get("tools") or {}).items():
+            if not isinstance(fields, dict) or "target" not in fields:
+                raise ValueError(f"Tool '{name}' in '{path}' needs a 'target'")
+            self.register(
+                ToolSpec(
+                    name,
+                    fields["target"],
+                    bool(fields.get("pure", False)),
+                    str(fields.get("version", "1")),
+                    fields.get("description", ""),
+                )
+            )
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        for entry_point in metadata.entry_points(group=group):
+            self.register(ToolSpec(entry_point.name, entry_point.value))
+
+    def register(self, spec: ToolSpec) -> None:
+        if ":" not in spec.target:
+            raise ValueError(f"Tool '{spec.name}' target must be 'module:callable'")
+        self._specs[spec.name] = spec
+        self._loaded.pop(spec.name, None)
+
+    def register_tool(self, name: str, tool: Callable[..., Any]) -> None:
+        """Add an already imported tool (tests, embedding)."""
+        module = getattr(tool, "__module__", "")
+        qualname = getattr(tool, "__qualname__", "")
+        self._specs[name] = ToolSpec(name, f"{module}:{qualname}")
+        self._loaded[name] = tool
+
+    def spec(self, name: str) -> ToolSpec:
+        return self._specs[name]
+
+    @property
+    def loaded(self) -> List[str]:
+        """Names of the tools imported so far."""
+        return list(self._loaded)
+
+    def __getitem__(self, name: str) -> Callable[..., Any]:
+        tool = self._loaded.get(name)
+        if tool is None:
+            tool = self._loaded[name] = self._import(self._specs[name])
+        return tool
+
+    def _import(self, spec: ToolSpec) -> Callable[..., Any]:
+        module_name, _, attr = spec.target.partition(":")
+        try:
+            tool: Any = importlib.import_module(module_name)
+            for part in attr.split("."):
+                tool = getattr(tool, part)
+        except (ImportError, AttributeError) as e:
+            raise ImportError(
+                f"Cannot load tool '{spec.name}' ({spec.target}): {e}"
+            ) from e
+        if spec.pure:
+            tool = pure_tool(spec.version)(tool)
+        return tool
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def missing(self, echo: Echo) -> List[str]:
+        """Tools in `echo.permissions.tools` that this registry does not know."""
+        return [tool for tool in echo.permissions.tools if tool not in self._specs]
+
+    def check(self, echo: Echo) -> None:
+        missing = self.missing(echo)
+        if missing:
+            raise ValueError(
+                f"Spec '{echo.capability}' declares unknown tools: {', '.join(missing)}"
+            )
@@ -0,0 +1 @@
+# Built-in tool plugins, indexed by manifest.yaml and imported on first use
@@ -0,0 +1,40 @@
+import asyncio
+import shutil
+import tempfile
+from typing import Any, Dict
+
+
+class Checkout(str):
+    """Path of a clone; release() removes it (PlanResult.release() calls it)."""
+
+    __slots__ = ()
+
+    def release(self) -> None:
+        shutil.rmtree(self, ignore_errors=True)
+
+
+async def clone(args: Dict[str, Any]) -> Checkout:
+    """Shallow-clone `repo_url` and return the checkout path."""
+    repo_url = args.get("repo_url")
+    if not repo_url:
+        raise ValueError("git.clone requires 'repo_url'")
+    target = Checkout(tempfile.mkdtemp(prefix="echo-clone-"))
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            "clone",
+            "--depth",
+            "1",
+            "--",
+            str(repo_url),
+            target,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"git clone failed: {stderr.decode().strip()}")
+    except BaseException:
+        target.release()
+        raise
+    return target
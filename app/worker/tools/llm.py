@@ -0,0 +1,23 @@
+import os
+from typing import Any, Dict
+
+# Heavy (openai pulls in httpx, pydantic models, ...); only imported once a
+# plan actually runs this tool.
+from openai import AsyncOpenAI
+
+_client = None
+
+
+async def summarize(args: Dict[str, Any]) -> str:
+    """Send `prompt` to a chat model and return its reply."""
+    global _client
+    prompt = args.get("prompt")
+    if not prompt:
+        raise ValueError("llm.summarize requires 'prompt'")
+    if _client is None:
+        _client = AsyncOpenAI()
+    response = await _client.chat.completions.create(
+        model=args.get("model") or os.getenv("ECHO_LLM_MODEL", "gpt-4o-mini"),
+        messages=[{"role": "user", "content": str(prompt)}],
+    )
+    return response.choices[0].message.content
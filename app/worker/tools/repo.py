@@ -0,0 +1,35 @@
+import os
+from typing import Any, Dict
+
+
+def stats(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Count files, bytes and lines per extension under `path`."""
+    root = args.get("path")
+    if not root or not os.path.isdir(root):
+        raise ValueError(f"repo.stats requires an existing 'path', got {root!r}")
+    metrics: Dict[str, Dict[str, int]] = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                ext = os.path.splitext(entry.name)[1] or entry.name
+                counts = metrics.setdefault(ext, {"files": 0, "bytes": 0, "lines": 0})
+                counts["files"] += 1
+                counts["bytes"] += entry.stat().st_size
+                with open(entry.path, "rb") as f:
+                    counts["lines"] += sum(
+                        chunk.count(b"\n")
+                        for chunk in iter(lambda: f.read(1 << 16), b"")
+                    )
+    return {
+        "files": sum(m["files"] for m in metrics.values()),
+        "metrics": metrics,
+    }
@@ -0,0 +1,72 @@
+"""
+Publish throughput to a local stand-in NATS server: Emitter.publish per event
+vs. the batching publisher.
+
+    python -m benchmarks.bench_batching [--events 50000] [--batch 256]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.batcher import PublishBatcher
+from app.control_plane.events.client import NATSClient
+from app.control_plane.events.emitter import Emitter
+from benchmarks.nats_stub import StubNatsServer
+
+
+async def run(events, batcher_args):
+    server = await StubNatsServer().start()
+    client = NATSClient(base_url=server.host, port=str(server.port))
+    with contextlib.redirect_stdout(io.StringIO()):
+        await client.init_nats()
+        batcher = PublishBatcher(client, **batcher_args) if batcher_args else None
+        emitter = Emitter(client, batcher=batcher)
+        start = time.perf_counter()
+        for event in events:
+            await emitter.publish(event.name, event)
+        await emitter.flush()
+        await server.wait_for(len(events))
+        elapsed = time.perf_counter() - start
+    await client.nc.close()
+    await server.stop()
+    return elapsed, server.reads, batcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--max-pending", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    events = [
+        EchoEvent(
+            name="file.modified", source="watcher", payload={"src": f"/s/{i}.yaml"}
+        )
+        for i in range(args.events)
+    ]
+    for event in events:
+        _ = event.hash  # precompute so both runs pay only for publishing
+
+    unbatched, reads, _ = asyncio.run(run(events, None))
+    print(
+        f"{'unbatched':<10} {args.events / unbatched:>9.0f} msgs/s  "
+        f"{reads} server reads"
+    )
+    batched, reads, batcher = asyncio.run(
+        run(events, {"max_batch": args.batch, "max_pending_bytes": args.max_pending})
+    )
+    print(
+        f"{'batched':<10} {args.events / batched:>9.0f} msgs/s  "
+        f"{reads} server reads  {batcher.stats['batches']} batches, "
+        f"{batcher.stats['waits']} backpressure waits  "
+        f"{unbatched / batched:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Cold-start wall time for loading a spec tree, serial load() vs. bulk_load()
+across worker counts.
+
+    python -m benchmarks.bench_bulk_load [--specs 5000] [--workers 1 2 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from app.common.utils.bulk import bulk_load, iter_spec_paths
+from app.common.utils.loader import load
+from benchmarks.corpus import write_spec_tree
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--specs", type=int, default=5_000)
+    parser.add_argument("--inputs", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, cpus}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        write_spec_tree(root, args.specs, inputs=args.inputs)
+        print(f"{args.specs} specs, {cpus} cores")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # load() prints every spec
+            serial = sum(load(p) is not None for p in iter_spec_paths(root))
+        baseline = time.perf_counter() - start
+        print(f"{'serial load()':<18} {baseline:>7.2f}s  {serial} ok")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            first = None
+            ok = 0
+            for result in bulk_load(root, workers=workers, chunk_size=args.chunk_size):
+                if first is None:
+                    first = time.perf_counter() - start
+                ok += result.echo is not None
+            elapsed = time.perf_counter() - start
+            print(
+                f"{'bulk, ' + str(workers) + ' workers':<18} {elapsed:>7.2f}s  {ok} ok  "
+                f"first result {first * 1000:.0f} ms  speedup {baseline / elapsed:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
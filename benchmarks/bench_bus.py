@@ -0,0 +1,114 @@
+"""
+Event delivery latency and throughput, Emitter -> bus -> Loader handler:
+the in-memory bus vs. NATS (or, without a server, the codec work the NATS
+path adds on top of the network).
+
+    python -m benchmarks.bench_bus [--events 20000] [--nats localhost:4222]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.client import NATSClient
+from app.control_plane.events.codec import JsonCodec
+from app.control_plane.events.emitter import Emitter
+from app.control_plane.events.loader import Loader
+from app.control_plane.events.memory_bus import InMemoryBus
+
+
+def make_event(i: int) -> EchoEvent:
+    return EchoEvent(
+        name="file.modified", source="watcher", payload={"src": f"/specs/{i}.yaml"}
+    )
+
+
+async def measure(bus, events: int, samples: int):
+    done = asyncio.Event()
+    received = 0
+    target = 0
+    arrival = 0.0
+
+    async def handler(event):
+        nonlocal received, arrival
+        received += 1
+        arrival = time.perf_counter()
+        if received == target:
+            done.set()
+
+    loader = Loader(bus, trusted=True)
+    emitter = Emitter(bus)
+    await loader.register_handler("file.*", handler)
+    batch = [make_event(i) for i in range(max(events, samples))]
+
+    # Latency: one event in flight at a time
+    latencies = []
+    for event in batch[:samples]:
+        target = received + 1
+        done.clear()
+        start = time.perf_counter()
+        await emitter.publish("file.modified", event)
+        await done.wait()
+        latencies.append(arrival - start)
+
+    # Throughput: publish everything, wait for the last delivery
+    target = received + events
+    done.clear()
+    start = time.perf_counter()
+    await emitter.publish_batch(("file.modified", event) for event in batch[:events])
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await loader.unregister_all()
+    return statistics.median(latencies), sorted(latencies)[int(samples * 0.99)], elapsed
+
+
+def report(label, p50, p99, elapsed, events):
+    print(
+        f"{label:<10} p50 {p50 * 1e6:>7.1f} µs  p99 {p99 * 1e6:>7.1f} µs  "
+        f"{events / elapsed:>9.0f} events/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, default=2_000)
+    parser.add_argument("--nats", help="host:port of a NATS server to compare with")
+    args = parser.parse_args()
+
+    async def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            memory = await measure(InMemoryBus(), args.events, args.samples)
+        report("memory", *memory, args.events)
+
+        if args.nats:
+            host, port = args.nats.split(":")
+            client = NATSClient(base_url=host, port=port)
+            with contextlib.redirect_stdout(io.StringIO()):
+                await client.init_nats()
+                nats = await measure(client, args.events, args.samples)
+            report("nats", *nats, args.events)
+            return
+
+        # No server: the serialisation round trip the NATS path always pays
+        codec = JsonCodec()
+        events = [make_event(i) for i in range(args.events)]
+        start = time.perf_counter()
+        for event in events:
+            codec.decode(codec.encode(event), trusted=True)
+        per_event = (time.perf_counter() - start) / args.events
+        print(
+            f"{'nats':<10} no server given; encode+decode alone costs "
+            f"{per_event * 1e6:.1f} µs/event ({1 / per_event:.0f} events/s max) "
+            f"before any network"
+        )
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
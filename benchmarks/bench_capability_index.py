@@ -0,0 +1,152 @@
+"""
+Capability index at scale: build, query latency for single terms and
+compound AND/OR queries, and incremental updates, against a linear scan.
+
+    python -m benchmarks.bench_capability_index [--specs 100000] [--repeat 200]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.common.utils.capability_index import (
+    AllOf,
+    AnyOf,
+    CapabilityIndex,
+    Term,
+    dump_terms,
+)
+
+NETWORK = ("none", "read-only", "write")
+FILESYSTEM = ("none", "ephemeral", "persistent", "db")
+TYPES = ("string", "number", "boolean", "object", "array")
+
+
+def make_specs(count: int, rng: random.Random) -> list:
+    """Dumped specs with a few common tools and inputs and a long tail."""
+    tools = [f"tool_{t}.run" for t in range(500)]
+    inputs = [f"input_{i}" for i in range(80)]
+    weights = [1 / (rank + 1) for rank in range(len(tools))]
+    specs = []
+    for n in range(count):
+        specs.append(
+            {
+                "capability": f"capability_{n % (count // 4 or 1)}",
+                "permissions": {
+                    "network": rng.choice(NETWORK),
+                    "filesystem": rng.choice(FILESYSTEM),
+                    "tools": sorted(set(rng.choices(tools, weights, k=4))),
+                },
+                "inputs": {
+                    name: {"type": rng.choice(TYPES)}
+                    for name in rng.sample(inputs, rng.randint(1, 4))
+                },
+            }
+        )
+    return specs
+
+
+def linear_scan(specs: list, tool: str, network: str) -> list:
+    return [
+        n
+        for n, spec in enumerate(specs)
+        if spec["permissions"]["network"] == network
+        and tool in spec["permissions"]["tools"]
+    ]
+
+
+def latency(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--specs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    specs = make_specs(args.specs, rng)
+    paths = [f"/specs/team_{n % 100}/spec_{n}.yaml" for n in range(args.specs)]
+
+    index = CapabilityIndex()
+    start = time.perf_counter()
+    index.update(
+        (path, dump_terms(spec)) for path, spec in zip(paths, specs, strict=True)
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"build     {args.specs} specs in {elapsed:.2f}s "
+        f"({elapsed / args.specs * 1e6:.1f} us/spec), "
+        f"{len(index._postings)} terms"
+    )
+
+    queries = {
+        "term, common": Term("tool", "tool_0.run"),
+        "term, rare": Term("tool", "tool_400.run"),
+        "AND, 2 terms": Term("tool", "tool_3.run") & Term("network", "write"),
+        "OR, 3 terms": Term("tool", "tool_7.run")
+        | Term("tool", "tool_8.run")
+        | Term("tool", "tool_9.run"),
+        "nested": AllOf(
+            Term("network", "write"),
+            AnyOf(Term("input", "input_1"), Term("input_type", "object")),
+            AnyOf(Term("filesystem", "ephemeral"), Term("filesystem", "db")),
+            Term("tool", "tool_2.run"),
+        ),
+    }
+    print(
+        f"{'query':<16}{'matches':>8}{'count p50/p99 us':>22}"
+        f"{'first 50 p50/p99 us':>25}{'all paths p50 us':>20}"
+    )
+    for label, query in queries.items():
+        c50, c99, matches = latency(lambda q=query: index.count(q), args.repeat)
+        l50, l99, _ = latency(lambda q=query: index.query(q, limit=50), args.repeat)
+        a50, _, _ = latency(lambda q=query: index.query(q), max(args.repeat // 10, 5))
+        print(
+            f"{label:<16}{matches:>8}{c50:>12.1f} /{c99:>7.1f}"
+            f"{l50:>15.1f} /{l99:>7.1f}{a50:>20.0f}"
+        )
+
+    l50, _, found = latency(
+        lambda: linear_scan(specs, "tool_3.run", "write"), max(args.repeat // 20, 3)
+    )
+    print(
+        f"linear scan of dumps, AND of 2 terms: {l50:>10.0f} us ({len(found)} matches)"
+    )
+
+    # Edits: a spec changes network and one tool, then is deleted and re-added
+    edited = [
+        dict(spec, permissions=dict(spec["permissions"])) for spec in specs[:1000]
+    ]
+    for spec in edited:
+        spec["permissions"]["network"] = "write"
+        spec["permissions"]["tools"] = spec["permissions"]["tools"][:-1] + [
+            "tool_499.run"
+        ]
+    terms = [dump_terms(spec) for spec in edited]
+    edited_paths = paths[: len(terms)]
+    start = time.perf_counter()
+    for path, spec_terms in zip(edited_paths, terms, strict=True):
+        index.add(path, spec_terms)
+    update = (time.perf_counter() - start) / len(terms) * 1e6
+    start = time.perf_counter()
+    for path in edited_paths:
+        index.discard(path)
+    discard = (time.perf_counter() - start) / len(terms) * 1e6
+    start = time.perf_counter()
+    for path, spec_terms in zip(edited_paths, terms, strict=True):
+        index.add(path, spec_terms)
+    add = (time.perf_counter() - start) / len(terms) * 1e6
+    print(f"update    {update:.1f} us/edit, {discard:.1f} us/discard, {add:.1f} us/add")
+
+
+if __name__ == "__main__":
+    main()
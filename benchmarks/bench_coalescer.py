@@ -0,0 +1,100 @@
+"""
+Events in vs. events out for a burst of file writes through the coalescer.
+
+    python -m benchmarks.bench_coalescer [--writes 10000] [--files 2500] [--fs]
+
+Without --fs the burst is submitted synthetically (create + repeated modifies
+per file, interleaved the way a bulk checkout produces them). With --fs the
+files are really written into a temp dir watched by WatcherManager.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from app.control_plane.watcher.coalescer import (
+    FILE_CREATED,
+    FILE_MODIFIED,
+    EventCoalescer,
+)
+from app.control_plane.watcher.manager import WatcherManager
+
+
+class _CountingSink:
+    def __init__(self):
+        self.events = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        with self.lock:
+            self.events += len(batch)
+            self.batches += 1
+
+
+def synthetic(writes: int, files: int, debounce: float) -> None:
+    sink = _CountingSink()
+    coalescer = EventCoalescer(sink, debounce=debounce, max_wait=10 * debounce)
+    coalescer.start()
+    paths = [f"echoes/spec_{i}.yaml" for i in range(files)]
+
+    start = time.perf_counter()
+    for i in range(writes):
+        path = paths[i % files]
+        coalescer.submit(FILE_CREATED if i < files else FILE_MODIFIED, path)
+    submitted = time.perf_counter() - start
+    coalescer.stop(flush=True)
+    total = time.perf_counter() - start
+
+    _report("synthetic", coalescer, sink, submitted, total)
+
+
+def filesystem(writes: int, files: int, debounce: float) -> None:
+    sink = _CountingSink()
+    coalescer = EventCoalescer(sink, debounce=debounce, max_wait=10 * debounce)
+    with tempfile.TemporaryDirectory() as root:
+        manager = WatcherManager(coalescer=coalescer)
+        manager.register_path(root)
+        manager.start_all()
+
+        start = time.perf_counter()
+        for i in range(writes):
+            with open(os.path.join(root, f"spec_{i % files}.yaml"), "a") as f:
+                f.write("x\n")
+        submitted = time.perf_counter() - start
+        time.sleep(1.0)  # let inotify drain
+        manager.stop_all()
+        total = time.perf_counter() - start
+
+    _report("filesystem", coalescer, sink, submitted, total)
+
+
+def _report(mode, coalescer, sink, submitted, total):
+    ratio = coalescer.events_in / max(sink.events, 1)
+    print(f"mode:        {mode}")
+    print(f"events in:   {coalescer.events_in}")
+    print(f"events out:  {sink.events} in {sink.batches} batches")
+    print(f"dropped:     {coalescer.dropped}")
+    print(f"reduction:   {ratio:.1f}x")
+    print(
+        f"submit time: {submitted * 1000:.1f} ms ({coalescer.events_in / submitted:,.0f} ev/s)"
+    )
+    print(f"total time:  {total * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writes", type=int, default=10_000)
+    parser.add_argument("--files", type=int, default=2_500)
+    parser.add_argument("--debounce", type=float, default=0.05)
+    parser.add_argument("--fs", action="store_true", help="write real files")
+    args = parser.parse_args()
+
+    run = filesystem if args.fs else synthetic
+    run(args.writes, args.files, args.debounce)
+
+
+if __name__ == "__main__":
+    main()
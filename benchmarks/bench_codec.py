@@ -0,0 +1,73 @@
+"""
+Encode/decode throughput of the EchoEvent wire codecs.
+
+    python -m benchmarks.bench_codec [--events 20000] [--payload-keys 4]
+
+"legacy" is the pre-codec path: model_dump_json() on send, then
+json.loads + EchoEvent(**data) on receive.
+"""
+
+import argparse
+import json
+import time
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import JsonCodec, msgpack, get_codec
+
+
+def _rate(n, seconds):
+    return f"{n / seconds:>10,.0f}/s"
+
+
+def bench(label, encode, decode, events):
+    start = time.perf_counter()
+    bodies = [encode(e) for e in events]
+    enc = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for body in bodies:
+        decode(body)
+    dec = time.perf_counter() - start
+
+    size = sum(len(b) for b in bodies) / len(bodies)
+    print(
+        f"{label:<18} encode {_rate(len(events), enc)}  decode {_rate(len(events), dec)}  {size:>6.0f} B/msg"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--payload-keys", type=int, default=4)
+    args = parser.parse_args()
+
+    events = [
+        EchoEvent(
+            name="file.modified",
+            source="watcher",
+            payload={
+                "src": f"echoes/spec_{i}.yaml",
+                **{f"k{j}": j for j in range(args.payload_keys)},
+            },
+        )
+        for i in range(args.events)
+    ]
+
+    bench(
+        "legacy",
+        lambda e: e.model_dump_json().encode(),
+        lambda b: EchoEvent(**json.loads(b.decode())),
+        events,
+    )
+    json_codec = JsonCodec()
+    bench("json", json_codec.encode, json_codec.decode, events)
+    if msgpack is None:
+        print("msgpack            (not installed)")
+        return
+    mp = get_codec("msgpack")
+    bench("msgpack", mp.encode, mp.decode, events)
+    bench("msgpack (trusted)", mp.encode, lambda b: mp.decode(b, trusted=True), events)
+
+
+if __name__ == "__main__":
+    main()
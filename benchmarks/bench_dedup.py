@@ -0,0 +1,100 @@
+"""
+Dedup effectiveness under a replayed, duplicate-heavy file event trace.
+
+    python -m benchmarks.bench_dedup [--files 500] [--edits 4] [--controllers 3]
+
+Each real edit to a spec produces one event per controller watching the tree,
+watchdog double-fires a share of them, and NATS redelivers a share of the
+messages. The trace is replayed through Loader._dispatch with and without the
+dedup stage; the handler counts how many loads would have happened.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import JsonCodec
+from app.control_plane.events.dedup import SeenSet
+from app.control_plane.events.loader import Loader
+
+
+def build_trace(root, files, edits, controllers, double_fire, redeliver, rng):
+    """Yield (action, payload) steps: either a file write or a message."""
+    codec = JsonCodec()
+    paths = [os.path.join(root, f"spec_{i}.yaml") for i in range(files)]
+    steps = []
+    for edit in range(edits):
+        for path in rng.sample(paths, len(paths)):
+            steps.append(("write", (path, f"edit {edit}\n")))
+            for _ in range(controllers):
+                copies = 2 if rng.random() < double_fire else 1
+                for _ in range(copies):
+                    event = EchoEvent(
+                        name="file.modified", source="watcher", payload={"src": path}
+                    )
+                    msg = SimpleNamespace(data=codec.encode(event), headers=None)
+                    steps.append(("msg", msg))
+                    if rng.random() < redeliver:
+                        steps.append(("msg", msg))
+    return steps
+
+
+async def replay(steps, dedup):
+    loads = 0
+
+    async def handler(event):
+        nonlocal loads
+        loads += 1
+
+    loader = Loader(nats_client=None, dedup=dedup)
+    messages = 0
+    start = time.perf_counter()
+    for action, item in steps:
+        if action == "write":
+            path, content = item
+            with open(path, "w") as f:
+                f.write(content)
+        else:
+            messages += 1
+            await loader._dispatch("file.modified", handler, item)
+    return messages, loads, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--edits", type=int, default=4)
+    parser.add_argument("--controllers", type=int, default=3)
+    parser.add_argument("--double-fire", type=float, default=0.5)
+    parser.add_argument("--redeliver", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        steps = build_trace(
+            root,
+            args.files,
+            args.edits,
+            args.controllers,
+            args.double_fire,
+            args.redeliver,
+            random.Random(args.seed),
+        )
+        writes = sum(1 for action, _ in steps if action == "write")
+        print(f"trace: {writes} real edits")
+        for label, dedup in (("no dedup", None), ("dedup", SeenSet())):
+            messages, loads, elapsed = asyncio.run(replay(steps, dedup))
+            line = f"{label:<9} messages {messages:>6}  loads {loads:>6}  {messages / elapsed:>9,.0f} msg/s"
+            if dedup is not None:
+                s = dedup.stats
+                line += f"  hits {s['hits']} misses {s['misses']} ({s['hits'] / messages:.0%} suppressed)"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Events/sec through the per-event hashing done on the publish path, for large
+payloads: serialise (hash is a computed field), log line, str().
+
+    python -m benchmarks.bench_event_hash [--events 2000] [--payload-kb 64]
+"""
+
+import argparse
+import hashlib
+import time
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import JsonCodec, get_codec, msgpack
+
+
+def make_events(n, payload_kb):
+    blob = "x" * 1024
+    return [
+        EchoEvent(
+            name="file.modified",
+            source="watcher",
+            payload={"src": f"echoes/spec_{i}.yaml", "chunks": [blob] * payload_kb},
+        )
+        for i in range(n)
+    ]
+
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {n / elapsed:>10,.0f} events/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=2_000)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    args = parser.parse_args()
+    n = args.events
+    print(f"{n} events, ~{args.payload_kb} KiB payload each")
+
+    def publish_path(events, reset):
+        for e in events:
+            for _ in range(3):  # model_dump_json, emitter log line, str()
+                if reset:
+                    e.invalidate_hash()  # what every access used to cost
+                _ = e.hash
+
+    events = make_events(n, args.payload_kb)
+    timed("sha256, recomputed per access", n, lambda: publish_path(events, True))
+    events = make_events(n, args.payload_kb)
+    timed("sha256, memoised", n, lambda: publish_path(events, False))
+
+    events = make_events(n, args.payload_kb)
+    timed(
+        "sha256 digest only",
+        n,
+        lambda: [hashlib.sha256(e._canonical()).digest() for e in events],
+    )
+
+    codec = JsonCodec()
+    bodies = [codec.encode(e) for e in make_events(n, args.payload_kb)]
+    timed("receive + rehash", n, lambda: [codec.decode(b).hash for b in bodies])
+    if msgpack is None:
+        return
+    # Only the msgpack codec keeps the sent hash, and only when trusted
+    codec = get_codec("msgpack")
+    bodies = [codec.encode(e) for e in make_events(n, args.payload_kb)]
+    timed(
+        "msgpack, trust sent hash",
+        n,
+        lambda: [codec.decode(b, trusted=True).hash for b in bodies],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Load test: event loop responsiveness while 1k large specs are parsed.
+
+    python -m benchmarks.bench_executor [--specs 1000] [--inputs 150] [--processes 4]
+
+Every spec gets one file.created event pushed through Loader._dispatch while
+a ticker coroutine measures how late the loop wakes it up. Compared modes:
+
+  inline     handler parses synchronously inside the callback (old behaviour)
+  threads    HandlerExecutor + parsing on the loop's default thread pool
+  processes  HandlerExecutor + parsing on a ProcessPoolExecutor
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from app.common.models.echo_event import EchoEvent
+from app.common.utils.spec_registry import SpecRegistry
+from app.control_plane.events.codec import JsonCodec
+from app.control_plane.events.executor import HandlerExecutor
+from app.control_plane.events.loader import Loader
+
+TICK = 0.005
+
+
+def write_specs(root, count, inputs):
+    body = "".join(
+        f"  in_{i}:\n    type: string\n    description: input number {i}\n    required: false\n"
+        for i in range(inputs)
+    )
+    paths = []
+    for n in range(count):
+        path = os.path.join(root, f"spec_{n}.yaml")
+        with open(path, "w") as f:
+            f.write(
+                f'version: "0.1"\ncapability: cap_{n}\ndescription: spec {n}\n'
+                f"inputs:\n{body}"
+                "permissions:\n  network: none\n  filesystem: ephemeral\n  tools: [git.clone]\n"
+                "returns:\n  summary: x\n"
+            )
+        paths.append(path)
+    return paths
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(mode, paths, pool):
+    registry = SpecRegistry()
+    loaded = 0
+
+    async def handle(event):
+        nonlocal loaded
+        src = event.payload["src"]
+        if mode == "inline":
+            echo = registry.get(src)
+        else:
+            echo = await registry.aget(src, pool)
+        loaded += echo is not None
+
+    executor = None if mode == "inline" else HandlerExecutor(concurrency=32)
+    loader = Loader(nats_client=None, executor=executor)
+    codec = JsonCodec()
+    msgs = [
+        SimpleNamespace(
+            data=codec.encode(
+                EchoEvent(name="file.created", source="bench", payload={"src": p})
+            ),
+            headers=None,
+        )
+        for p in paths
+    ]
+
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    for msg in msgs:
+        await loader._dispatch("file.created", handle, msg)
+        await asyncio.sleep(0)  # the NATS client yields between deliveries
+    if executor is not None:
+        await executor.drain()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+
+    lags.sort()
+    p99 = lags[int(0.99 * (len(lags) - 1))] if lags else 0.0
+    print(
+        f"{mode:<10} {elapsed:>7.2f}s  loaded {loaded:>5}  "
+        f"loop lag p99 {p99 * 1000:>8.1f} ms  max {lags[-1] * 1000 if lags else 0:>8.1f} ms  "
+        f"ticks {len(lags)}"
+    )
+    if executor is not None:
+        m = executor.metrics()["file.created"]
+        print(f"{'':<10} handler p50 {m['p50_ms']:.1f} ms  p99 {m['p99_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--specs", type=int, default=1_000)
+    parser.add_argument("--inputs", type=int, default=150)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = write_specs(root, args.specs, args.inputs)
+        size = sum(os.path.getsize(p) for p in paths) / len(paths) / 1024
+        print(f"{args.specs} specs, {size:.0f} KiB each")
+        asyncio.run(run("inline", paths, None))
+        asyncio.run(run("threads", paths, None))
+        with ProcessPoolExecutor(args.processes) as pool:
+            asyncio.run(run("processes", paths, pool))
+
+
+if __name__ == "__main__":
+    main()
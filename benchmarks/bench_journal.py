@@ -0,0 +1,72 @@
+"""
+Event journal throughput: appending encoded events, then replaying them
+from a reopened journal as a restarted controller would.
+
+    python -m benchmarks.bench_journal [--events 1000000] [--segment-mb 64]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import get_codec
+from app.control_plane.events.journal import Journal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--segment-mb", type=int, default=64)
+    parser.add_argument("--codec", default="json")
+    args = parser.parse_args()
+
+    codec = get_codec(args.codec)
+    # A few distinct bodies; encoding cost is the codec's, not the journal's
+    payloads = [
+        codec.encode(
+            EchoEvent(
+                name="file.modified", source="watcher", payload={"src": f"/s/{i}.yaml"}
+            )
+        )
+        for i in range(1024)
+    ]
+    directory = tempfile.mkdtemp(prefix="echo-journal-")
+    try:
+        journal = Journal(directory, segment_bytes=args.segment_mb * 1024 * 1024)
+        start = time.perf_counter()
+        for i in range(args.events):
+            journal.append("file.modified", payloads[i & 1023], codec.name)
+        journal.sync()
+        appended = time.perf_counter() - start
+        size = sum(s.position for s in journal._segments)
+        journal.close()
+
+        start = time.perf_counter()
+        journal = Journal(directory, segment_bytes=args.segment_mb * 1024 * 1024)
+        opened = time.perf_counter() - start
+        count = sum(1 for _ in journal.read(0))
+        replayed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        half = sum(1 for _ in journal.read(args.events // 2))
+        tail = time.perf_counter() - start
+        journal.close()
+    finally:
+        shutil.rmtree(directory)
+
+    assert count == args.events and half == args.events - args.events // 2
+    print(
+        f"append  {args.events / appended:>10.0f} events/s  "
+        f"{size / appended / 1e6:.0f} MB/s  ({size / 1e6:.0f} MB)"
+    )
+    print(
+        f"replay  {args.events / replayed:>10.0f} events/s  "
+        f"{replayed:.2f}s total, {opened * 1000:.0f} ms to open and scan"
+    )
+    print(f"replay from midpoint checkpoint  {tail:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Thread count and RSS of WatcherManager at 10/100/1000 watch roots, with one
+Observer per watcher vs. a shared Observer pool.
+
+    python -m benchmarks.bench_observers [--roots 10 100 1000] [--pool 1]
+
+Each configuration runs in a fresh interpreter so RSS is not polluted by the
+previous one. watchdog still gives every scheduled watch its own emitter
+thread and inotify instance, so sharing the Observer removes the per-root
+dispatcher thread but not the instance cost; at high root counts both modes
+can hit fs.inotify.max_user_instances, which is reported rather than hidden.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(roots: int, pool: int) -> None:
+    from app.control_plane.watcher.manager import WatcherManager
+
+    result = {"roots": roots, "pool": pool, "error": None}
+    with tempfile.TemporaryDirectory() as base:
+        manager = WatcherManager(observer_pool_size=pool)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(roots):
+                path = os.path.join(base, f"tenant{i}")
+                os.mkdir(path)
+                manager.register_path(path)
+            baseline_threads = threading.active_count()
+            baseline_rss = _rss_kb()
+            try:
+                for watcher in manager.watchers:
+                    manager.start_one(watcher.name)
+            except OSError as e:
+                result["error"] = str(e)
+            result["threads"] = threading.active_count() - baseline_threads
+            result["rss_kb"] = _rss_kb() - baseline_rss
+            manager.stop_all()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--roots", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--pool", type=int, default=1)
+    parser.add_argument("--child", nargs=2, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'roots':>6} {'mode':>14} {'threads':>8} {'rss MiB':>8}  error")
+    for roots in args.roots:
+        for pool in (0, args.pool):
+            out = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_observers",
+                    "--child",
+                    str(roots),
+                    str(pool),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            mode = "per-watcher" if pool == 0 else f"shared({pool})"
+            print(
+                f"{roots:>6} {mode:>14} {r['threads']:>8} "
+                f"{r['rss_kb'] / 1024:>8.1f}  {r['error'] or ''}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-run cost of resolving a plan's ${{ }} templates: precompiled accessors vs.
+regex substitution on every run.
+
+    python -m benchmarks.bench_plan [--steps 20] [--runs 20000]
+"""
+
+import argparse
+import re
+import time
+
+from app.common.models.echo import Echo
+from app.common.models.plan import TEMPLATE
+
+
+def build_echo(steps: int) -> Echo:
+    plan = [{"id": "s0", "use": "tool.a", "with": {"q": "${{ inputs.url }}"}}]
+    for i in range(1, steps):
+        plan.append(
+            {
+                "id": f"s{i}",
+                "use": "tool.b",
+                "with": {
+                    "path": f"${{{{ s{i - 1}.output.path }}}}",
+                    "prompt": f"Step {i} of ${{{{ inputs.url }}}}: "
+                    f"${{{{ s{i - 1}.output.summary }}}}",
+                    "limit": 10,
+                },
+            }
+        )
+    return Echo(
+        version="0.1",
+        capability="bench",
+        description="bench",
+        inputs={"url": {"type": "string", "description": "url"}},
+        permissions={"network": "none", "filesystem": "none", "tools": []},
+        plan=plan,
+        returns={"out": f"${{{{ s{steps - 1}.output }}}}"},
+    )
+
+
+def naive_render(value, inputs, outputs):
+    """What the worker would do without a compile stage."""
+    if isinstance(value, dict):
+        return {k: naive_render(v, inputs, outputs) for k, v in value.items()}
+    if not isinstance(value, str):
+        return value
+
+    def lookup(match: re.Match):
+        head, *path = match.group(1).split(".")
+        current = inputs[path.pop(0)] if head == "inputs" else outputs[head]
+        for part in path[1:] if head != "inputs" else path:
+            current = current[part]
+        return str(current)
+
+    return TEMPLATE.sub(lookup, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=20_000)
+    args = parser.parse_args()
+
+    echo = build_echo(args.steps)
+    inputs = {"url": "https://example.com/repo"}
+    outputs = {
+        f"s{i}": {"path": f"/tmp/{i}", "summary": "fine"} for i in range(args.steps)
+    }
+    steps = [(step.id, step.with_) for step in echo.plan]
+    compiled = echo.compiled
+
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        for _, raw in steps:
+            naive_render(raw, inputs, outputs)
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        for step_id in compiled.order:
+            compiled.steps[step_id].render_args(inputs, outputs)
+    fast = time.perf_counter() - start
+
+    per_run = 1e6 / args.runs
+    print(f"{args.steps} steps, {args.runs} runs")
+    print(f"{'regex per run':<16} {naive * per_run:>8.1f} µs/run")
+    print(f"{'compiled':<16} {fast * per_run:>8.1f} µs/run  {naive / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
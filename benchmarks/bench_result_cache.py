@@ -0,0 +1,50 @@
+"""
+Repeated plan runs with a slow deterministic tool, with and without the
+content-addressed result cache.
+
+    python -m benchmarks.bench_result_cache [--runs 20] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.worker.result_cache import ResultCache, pure_tool
+from app.worker.scheduler import PlanScheduler
+from benchmarks.bench_scheduler import build_echo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+
+    @pure_tool(version="1")
+    async def tool(step_args):
+        await asyncio.sleep(args.latency)
+        return {"blob": "x" * 4096, "args": step_args}
+
+    echo = build_echo(args.width, args.depth)
+    for label, cache in (("no cache", None), ("cache", ResultCache())):
+        scheduler = PlanScheduler({"tool.io": tool}, cache=cache)
+
+        async def runs(scheduler=scheduler):
+            for _ in range(args.runs):
+                await scheduler.run(echo, {})
+
+        start = time.perf_counter()
+        asyncio.run(runs())
+        elapsed = time.perf_counter() - start
+        stats = (
+            f"  {cache.stats['hits']} hits / {cache.stats['misses']} misses"
+            if cache
+            else ""
+        )
+        print(f"{label:<10} {elapsed * 1000 / args.runs:>8.1f} ms/run{stats}")
+
+
+if __name__ == "__main__":
+    main()
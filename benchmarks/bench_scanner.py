@@ -0,0 +1,129 @@
+"""
+Stat-snapshot scanner on a large tree: index build, rescans with nothing
+and with 0.1% changed, index save/load, against a plain os.walk + stat.
+
+    python -m benchmarks.bench_scanner [--files 500000] [--per-dir 500] [--workers 8]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from app.control_plane.watcher.scanner import TreeScanner
+
+
+def build_tree(root: str, files: int, per_dir: int) -> list:
+    paths = []
+    dirs = (files + per_dir - 1) // per_dir
+    fanout = max(1, int(dirs**0.5))
+    for d in range(dirs):
+        directory = os.path.join(root, f"top_{d // fanout}", f"dir_{d}")
+        os.makedirs(directory, exist_ok=True)
+        for f in range(min(per_dir, files - d * per_dir)):
+            path = os.path.join(directory, f"spec_{f}.yaml")
+            with open(path, "w") as fh:
+                fh.write("v: 1\n")
+            paths.append(path)
+    return paths
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def full_walk(root: str) -> int:
+    count = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            os.stat(os.path.join(directory, name))
+            count += 1
+    return count
+
+
+def apply_changes(paths: list, rate: float, rng: random.Random) -> int:
+    """Modify in place, create next to, and delete a third of `rate` each."""
+    chosen = rng.sample(paths, max(3, int(len(paths) * rate)))
+    stamp = time.time_ns() + 10**9
+    for i, path in enumerate(chosen):
+        if i % 3 == 0:
+            with open(path, "a") as fh:
+                fh.write("v: 2\n")
+            os.utime(path, ns=(stamp, stamp))
+        elif i % 3 == 1:
+            with open(path + ".new.yaml", "w") as fh:
+                fh.write("v: 1\n")
+        else:
+            os.remove(path)
+            paths.remove(path)
+    return len(chosen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=500_000)
+    parser.add_argument("--per-dir", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.001)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="echo-scan-")
+    index = os.path.join(root, "..", os.path.basename(root) + ".index")
+    rng = random.Random(3)
+    try:
+        elapsed, paths = timed(lambda: build_tree(root, args.files, args.per_dir))
+        print(f"tree      {len(paths)} files written in {elapsed:.1f}s")
+
+        elapsed, count = timed(lambda: full_walk(root))
+        print(f"os.walk   full walk + stat of {count} files     {elapsed:6.2f}s")
+
+        for workers in sorted({1, args.workers}):
+            scanner = TreeScanner(root, index_path=index, workers=workers)
+            elapsed, _ = timed(lambda s=scanner: s.scan(emit=False))
+            print(
+                f"index     build, {workers} worker(s)                {elapsed:6.2f}s"
+            )
+            elapsed, changes = timed(scanner.scan)
+            print(
+                f"rescan    no changes, {workers} worker(s)           {elapsed:6.2f}s"
+            )
+            scanner.close()
+
+        elapsed, _ = timed(scanner.save)
+        size = os.path.getsize(index)
+        print(f"index     save {size / 1e6:.1f} MB                   {elapsed:6.2f}s")
+        elapsed, scanner = timed(
+            lambda: TreeScanner(root, index_path=index, workers=args.workers)
+        )
+        print(f"index     load                            {elapsed:6.2f}s")
+
+        dir_only = TreeScanner(root, workers=args.workers, stat_files=False)
+        dir_only.scan(emit=False)
+
+        changed = apply_changes(paths, args.rate, rng)
+        listed = scanner.stats["listed"]
+        elapsed, changes = timed(scanner.scan)
+        print(
+            f"rescan    {changed} changed ({args.rate:.1%})              {elapsed:6.2f}s  "
+            f"{len(changes)} events, {scanner.stats['listed'] - listed} dirs listed"
+        )
+        listed = dir_only.stats["listed"]
+        elapsed, dir_changes = timed(dir_only.scan)
+        print(
+            f"rescan    same, directories only             {elapsed:6.2f}s  "
+            f"{len(dir_changes)} events, {dir_only.stats['listed'] - listed} dirs listed"
+        )
+        scanner.close()
+        dir_only.close()
+    finally:
+        shutil.rmtree(root)
+        if os.path.exists(index):
+            os.remove(index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Plan wall time with stub tools of known latency: serial execution vs. the DAG
+scheduler, against the plan's critical path.
+
+    python -m benchmarks.bench_scheduler [--width 8] [--depth 4] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.common.models.echo import Echo
+from app.worker.scheduler import PlanScheduler
+
+
+def build_echo(width: int, depth: int) -> Echo:
+    """`depth` layers of `width` steps, each reading one step of the layer above."""
+    plan = [{"id": "fetch", "use": "tool.io"}]
+    previous = ["fetch"]
+    for layer in range(depth):
+        current = []
+        for i in range(width):
+            step_id = f"l{layer}_{i}"
+            parent = previous[i % len(previous)]
+            plan.append(
+                {
+                    "id": step_id,
+                    "use": "tool.io",
+                    "with": {"x": f"${{{{ {parent}.output }}}}"},
+                }
+            )
+            current.append(step_id)
+        previous = current
+    return Echo(
+        version="0.1",
+        capability="bench",
+        description="bench",
+        permissions={"network": "none", "filesystem": "none", "tools": ["tool.io"]},
+        plan=plan,
+        returns={},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    async def tool(step_args):
+        await asyncio.sleep(args.latency)
+        return "done"
+
+    echo = build_echo(args.width, args.depth)
+    plan = echo.compiled
+
+    async def serial():
+        outputs = {}
+        for step_id in plan.order:
+            outputs[step_id] = await tool(plan.steps[step_id].render_args({}, outputs))
+
+    start = time.perf_counter()
+    asyncio.run(serial())
+    serial_time = time.perf_counter() - start
+
+    scheduler = PlanScheduler({"tool.io": tool}, concurrency=64, tool_concurrency=64)
+    result = asyncio.run(scheduler.run(echo, {}))
+    critical = (args.depth + 1) * args.latency
+
+    print(f"{len(plan)} steps, {args.latency * 1000:.0f} ms each")
+    print(f"{'critical path':<14} {critical * 1000:>7.0f} ms")
+    print(f"{'serial':<14} {serial_time * 1000:>7.0f} ms")
+    print(
+        f"{'scheduler':<14} {result.elapsed * 1000:>7.0f} ms  "
+        f"{serial_time / result.elapsed:.1f}x faster than serial"
+    )
+
+
+if __name__ == "__main__":
+    main()
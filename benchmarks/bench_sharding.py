@@ -0,0 +1,184 @@
+"""
+Spreading spec parsing over worker processes through a local stand-in NATS
+broker: every worker gets every event, a shared queue group, or sharding by
+spec path (including a worker joining halfway through).
+
+    python -m benchmarks.bench_sharding [--workers 4] [--specs 2000] [--events 20000]
+
+Each worker keeps an LRU of parsed specs sized for a 1/workers slice of the
+corpus (plus slack), so path affinity shows up as cache hits.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+
+from app.common.models.echo_event import EchoEvent
+from app.common.utils.loader import parse_echo
+from app.control_plane.events.client import NATSClient
+from app.control_plane.events.emitter import Emitter
+from app.control_plane.events.loader import Loader
+from app.control_plane.events.sharding import ShardCoordinator
+from app.control_plane.watcher.coalescer import FILE_MODIFIED
+from benchmarks.corpus import write_spec_tree
+from benchmarks.nats_stub import StubNatsServer
+
+PARTITIONS = 64
+
+
+async def worker_main(port, mode, capacity, handled, ready, stop, results):
+    cache = OrderedDict()
+    stats = {"events": 0, "parses": 0}
+
+    async def handler(event):
+        path = event.payload["src"]
+        stats["events"] += 1
+        if path in cache:
+            cache.move_to_end(path)
+        else:
+            with open(path, "rb") as f:
+                cache[path] = parse_echo(f.read())
+            stats["parses"] += 1
+            if len(cache) > capacity:
+                cache.popitem(last=False)
+        with handled.get_lock():
+            handled.value += 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = NATSClient(base_url="127.0.0.1", port=str(port))
+        await client.init_nats()
+        shards = None
+        if mode == "sharded":
+            # Busy workers sharing few cores answer heartbeats late; a long
+            # ttl keeps them from expiring each other mid-run
+            shards = ShardCoordinator(
+                client, PARTITIONS, heartbeat=0.2, ttl=5.0, grace=0.5
+            )
+        loader = Loader(
+            client,
+            trusted=True,
+            queue="workers" if mode == "queue" else "",
+            shards=shards,
+        )
+        await loader.register_handler(FILE_MODIFIED, handler)
+        if shards is not None:
+            await shards.start()
+        await client.flush()
+        ready.release()
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        if shards is not None:
+            shards.grace = 0
+            await shards.stop()
+        await client.nc.close()
+    results.put(stats)
+
+
+def run_worker(*args):
+    asyncio.run(worker_main(*args))
+
+
+async def run_mode(mode, args, paths, join=False):
+    ctx = multiprocessing.get_context("fork")
+    server = await StubNatsServer().start()
+    handled = ctx.Value("q", 0)
+    ready = ctx.Semaphore(0)
+    stop = ctx.Event()
+    results = ctx.Queue()
+    capacity = int(len(paths) / args.workers * 1.25)
+
+    def spawn():
+        process = ctx.Process(
+            target=run_worker,
+            args=(server.port, mode, capacity, handled, ready, stop, results),
+        )
+        process.start()
+        return process
+
+    initial = args.workers - 1 if join else args.workers
+    processes = [spawn() for _ in range(initial)]
+    for _ in processes:
+        while not ready.acquire(block=False):
+            await asyncio.sleep(0.01)
+    # Let membership settle so shards are assigned before events flow
+    await asyncio.sleep(0.5 if mode == "sharded" else 0.05)
+
+    rng = random.Random(7)
+    events = [
+        EchoEvent(
+            name=FILE_MODIFIED, source="bench", payload={"src": rng.choice(paths)}
+        )
+        for _ in range(args.events)
+    ]
+    expected = args.events * (args.workers if mode == "broadcast" else 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = NATSClient(base_url="127.0.0.1", port=str(server.port))
+        await client.init_nats()
+        emitter = Emitter(client, partitions=PARTITIONS if mode == "sharded" else 0)
+        start = time.perf_counter()
+        half = len(events) // 2
+        for i, event in enumerate(events):
+            if join and i == half:
+                processes.append(spawn())
+            await emitter.publish(FILE_MODIFIED, event)
+            if i % 256 == 0:
+                await client.flush()
+        await client.flush()
+        deadline = time.monotonic() + 120
+        while handled.value < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        await client.nc.close()
+
+    stop.set()
+    # Off the loop: stopping workers still talk to the broker running on it
+    stats = [await asyncio.to_thread(results.get, timeout=60) for _ in processes]
+    for process in processes:
+        await asyncio.to_thread(process.join)
+    await server.stop()
+    return elapsed, handled.value, expected, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--specs", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="echo-shards-")
+    try:
+        paths = write_spec_tree(root, args.specs)
+        print(f"{args.workers} workers, {args.specs} specs, {args.events} events")
+        for mode, join in (
+            ("broadcast", False),
+            ("queue", False),
+            ("sharded", False),
+            ("sharded", True),
+        ):
+            elapsed, handled, expected, stats = asyncio.run(
+                run_mode(mode, args, paths, join)
+            )
+            parses = sum(s["parses"] for s in stats)
+            spread = "/".join(str(s["events"]) for s in stats)
+            label = mode + (" +join" if join else "")
+            lost = "" if handled == expected else f"  MISSING {expected - handled}"
+            print(
+                f"{label:<15} {args.events / elapsed:>8.0f} events/s  "
+                f"{handled:>6} handled  {parses:>6} parses "
+                f"({1 - parses / max(handled, 1):.0%} cache hits)  per worker {spread}"
+                f"{lost}"
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
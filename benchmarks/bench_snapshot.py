@@ -0,0 +1,68 @@
+"""
+Controller restart time: preload() cold, warm from the snapshot, and warm with
+a fraction of the specs edited.
+
+    python -m benchmarks.bench_snapshot [--specs 5000] [--touched 0.01]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from app.common.utils.bulk import iter_spec_paths
+from app.common.utils.snapshot import snapshot_path
+from app.worker import spec_worker
+from benchmarks.corpus import corpus_tool_registry, write_spec_tree
+
+
+def _preload(root, workers):
+    spec_worker.registry.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded, _ = spec_worker.preload(root, workers=workers)
+    elapsed = time.perf_counter() - start
+    # Lazily primed entries are only deserialised on first use
+    start = time.perf_counter()
+    for path in iter_spec_paths(root):
+        spec_worker.registry.peek(path)
+    return elapsed, time.perf_counter() - start, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--specs", type=int, default=5_000)
+    parser.add_argument("--inputs", type=int, default=3)
+    parser.add_argument("--touched", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    spec_worker.tools = corpus_tool_registry()
+    with tempfile.TemporaryDirectory() as scratch:
+        # The snapshot is written beside the tree
+        root = os.path.join(scratch, "echoes")
+        write_spec_tree(root, args.specs, inputs=args.inputs)
+        paths = list(iter_spec_paths(root))
+
+        def report(label, elapsed, materialise, loaded):
+            print(
+                f"{label:<22} {elapsed * 1000:>8.0f} ms  {loaded} specs  "
+                f"(+{materialise * 1000:.0f} ms to materialise all)"
+            )
+
+        report("cold", *_preload(root, args.workers))
+        size = os.path.getsize(snapshot_path(root))
+        print(f"{'snapshot':<22} {size / 1024:>8.0f} KiB")
+        report("warm", *_preload(root, args.workers))
+
+        for path in random.sample(paths, max(1, int(len(paths) * args.touched))):
+            with open(path, "a") as f:
+                f.write("\n# edited\n")
+        report(f"warm, {args.touched:.0%} edited", *_preload(root, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Reconciling small spec edits: full rebuild of derived state vs. a structural
+diff that only rebuilds what changed.
+
+    python -m benchmarks.bench_spec_diff [--specs 2000] [--edits 10000]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from app.common.models.echo import Echo
+from app.common.models.plan import compile_plan
+from app.common.utils.loader import _safe_load
+from app.common.utils.spec_diff import diff_echo
+from benchmarks.corpus import corpus_tool_registry, render_spec
+
+
+def edit(data, kind, n):
+    """Apply one small edit of `kind` to a spec dict, in place."""
+    if kind == "description":
+        data["description"] = f"edited {n}"
+    elif kind == "input":
+        data["inputs"]["in_0"]["description"] = f"edited {n}"
+    elif kind == "step":
+        data["plan"][0]["with"]["value"] = f"edited {n}"
+    else:  # permissions
+        data["permissions"]["network"] = "none" if n % 2 else "read-only"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--specs", type=int, default=2_000)
+    parser.add_argument("--edits", type=int, default=10_000)
+    parser.add_argument("--steps", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    tools = corpus_tool_registry()
+    sources = [_safe_load(render_spec(n, steps=args.steps)) for n in range(args.specs)]
+    current = [Echo(**data) for data in sources]
+
+    # Prepare every edited version up front; parsing costs the same either way
+    edits = []
+    for n in range(args.edits):
+        index = rng.randrange(args.specs)
+        data = json.loads(json.dumps(sources[index]))
+        edit(data, rng.choice(("description", "input", "step", "permissions")), n)
+        new = Echo(**data)
+        edits.append((current[index], new))
+        current[index] = new
+
+    start = time.perf_counter()
+    full_bytes = 0
+    for _, new in edits:
+        compile_plan(new.plan, new.inputs, new.returns)
+        tools.missing(new)
+        full_bytes += len(new.model_dump_json())
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    delta_bytes = rebuilt = 0
+    for old, new in edits:
+        diff = diff_echo(old, new)
+        if diff.affects_plan:
+            compile_plan(new.plan, new.inputs, new.returns)
+            rebuilt += 1
+        if diff.affects_tools:
+            tools.missing(new)
+        delta_bytes += len(json.dumps(diff.to_payload()))
+    incremental = time.perf_counter() - start
+
+    per_edit = 1e6 / args.edits
+    print(f"{args.edits} edits over {args.specs} specs ({args.steps} steps each)")
+    print(
+        f"{'full rebuild':<12} {full * per_edit:>7.1f} µs/edit  "
+        f"{full_bytes / args.edits:>6.0f} B/event"
+    )
+    print(
+        f"{'incremental':<12} {incremental * per_edit:>7.1f} µs/edit  "
+        f"{delta_bytes / args.edits:>6.0f} B/event  "
+        f"plans rebuilt {rebuilt}/{args.edits}"
+    )
+
+
+if __name__ == "__main__":
+    main()
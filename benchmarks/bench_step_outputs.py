@@ -0,0 +1,163 @@
+"""
+Passing large outputs between plan steps: held in memory as bytes, against
+streamed through a BlobStore and read back as chunks or an mmap view.
+
+    python -m benchmarks.bench_step_outputs [--gb 2] [--inline-mb 512] [--chunk-kb 1024]
+
+Each run is a three-step plan (produce -> transform -> digest) in a fresh
+process; peak RSS is that process's high-water mark. A whole-output view is an mmap whose pages
+count towards RSS as they are read (page cache, not heap); windows() drops
+them behind the reader.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+
+from app.common.models.echo import Echo
+from app.worker.outputs import BlobStore
+from app.worker.scheduler import PlanScheduler
+
+MB = 1024 * 1024
+
+
+def make_echo() -> Echo:
+    return Echo(
+        version="0.1",
+        capability="bench",
+        description="bench",
+        inputs={},
+        permissions={
+            "network": "none",
+            "filesystem": "ephemeral",
+            "tools": ["produce", "transform", "digest"],
+        },
+        plan=[
+            {"id": "produce", "use": "produce"},
+            {
+                "id": "transform",
+                "use": "transform",
+                "with": {"data": "${{ produce.output }}"},
+            },
+            {
+                "id": "digest",
+                "use": "digest",
+                "with": {"data": "${{ transform.output }}"},
+            },
+        ],
+        returns={"digest": "${{ digest.output }}"},
+    )
+
+
+def inline_tools(size: int, chunk: bytes):
+    async def produce(args):
+        return chunk * (size // len(chunk))
+
+    async def transform(args):
+        return args["data"].upper()
+
+    async def digest(args):
+        return hashlib.sha256(args["data"]).hexdigest()
+
+    return {"produce": produce, "transform": transform, "digest": digest}
+
+
+def streaming_tools(size: int, chunk: bytes, reader: str):
+    async def produce(args):
+        for _ in range(size // len(chunk)):
+            yield chunk
+
+    async def transform(args):
+        async for part in args["data"].chunks():
+            yield part.upper()
+
+    async def digest(args):
+        hasher = hashlib.sha256()
+        if reader == "view":
+            with args["data"].view() as view:
+                # sha256 releases the GIL for large buffers; no copy is made
+                await asyncio.to_thread(hasher.update, view)
+        elif reader == "windows":
+            for window in args["data"].windows(64 * MB):
+                await asyncio.to_thread(hasher.update, window)
+        else:
+            async for part in args["data"].chunks():
+                hasher.update(part)
+        return hasher.hexdigest()
+
+    return {"produce": produce, "transform": transform, "digest": digest}
+
+
+def run(mode: str, size: int, chunk_bytes: int, directory: str, results) -> None:
+    chunk = bytes(range(97, 123)) * (chunk_bytes // 26) + b"\n" * (chunk_bytes % 26)
+    store = None
+    if mode == "inline":
+        tools = inline_tools(size, chunk)
+    else:
+        store = BlobStore(
+            directory, chunk_bytes=chunk_bytes, max_disk_bytes=3 * size + MB
+        )
+        tools = streaming_tools(size, chunk, mode.split("-")[1])
+    start = time.perf_counter()
+    result = asyncio.run(PlanScheduler(tools, store=store).run(make_echo(), {}))
+    elapsed = time.perf_counter() - start
+    assert result.ok, result.errors
+    if store is not None:
+        result.release()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results.put((elapsed, peak, result.returns["digest"]))
+
+
+def measure(mode: str, size: int, chunk_bytes: int) -> tuple:
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    directory = tempfile.mkdtemp(prefix="echo-bench-blobs-")
+    try:
+        process = ctx.Process(
+            target=run, args=(mode, size, chunk_bytes, directory, results)
+        )
+        process.start()
+        outcome = results.get()
+        process.join()
+        return outcome
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--gb", type=float, default=2.0)
+    parser.add_argument("--inline-mb", type=int, default=512)
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    args = parser.parse_args()
+    chunk_bytes = args.chunk_kb * 1024
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    print(f"interpreter baseline RSS {baseline / MB:.0f} MB, chunk {args.chunk_kb} KB")
+    runs = [
+        ("inline", args.inline_mb * MB),
+        ("store-chunks", args.inline_mb * MB),
+        ("store-view", args.inline_mb * MB),
+        ("store-windows", args.inline_mb * MB),
+        ("store-chunks", int(args.gb * 1024) * MB),
+        ("store-view", int(args.gb * 1024) * MB),
+        ("store-windows", int(args.gb * 1024) * MB),
+    ]
+    digests = {}
+    for mode, size in runs:
+        elapsed, peak, digest = measure(mode, size, chunk_bytes)
+        same = digests.setdefault(size, digest) == digest
+        print(
+            f"{mode:<14} {size / MB:>7.0f} MB per output  {elapsed:6.2f}s  "
+            f"{size * 2 / MB / elapsed:7.0f} MB/s moved  peak RSS {peak / MB:6.0f} MB"
+            f"{'' if same else '  DIGEST MISMATCH'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Worker import time with the lazy tool registry vs. importing every plugin at
+boot, and the latency of a tool's first and later lookups.
+
+    python -m benchmarks.bench_tool_registry [--repeat 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from app.worker.tool_registry import ToolRegistry
+
+LAZY = "import app.worker.spec_worker"
+EAGER = (
+    "import app.worker.spec_worker as w\n"
+    "for name in w.tools:\n"
+    "    try:\n"
+    "        w.tools[name]\n"
+    "    except ImportError:\n"
+    "        pass\n"
+)
+
+
+def import_profile(code: str):
+    """Run `code` under -X importtime; return (total µs, heaviest imports)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), name[1:].rstrip()))
+    # Nested imports are indented under their parent
+    top_level = sum(us for us, name in rows if not name.startswith(" "))
+    return top_level, sorted(rows, reverse=True)[:5]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, code in (("lazy", LAZY), ("eager", EAGER)):
+        totals = []
+        for _ in range(args.repeat):
+            total, heaviest = import_profile(code)
+            totals.append(total)
+        print(
+            f"{label:<6} imports {statistics.median(totals) / 1000:>7.1f} ms (median)"
+        )
+        for us, name in heaviest:
+            print(f"         {us / 1000:>7.1f} ms  {name.strip()}")
+
+    # First-step latency: the first lookup pays for the plugin import
+    registry = ToolRegistry.builtin()
+    for attempt in ("first", "second"):
+        start = time.perf_counter()
+        tool = registry["repo.stats"]
+        lookup = time.perf_counter() - start
+        tool({"path": "app"})
+        elapsed = time.perf_counter() - start
+        print(
+            f"repo.stats {attempt} step: lookup {lookup * 1000:.3f} ms, "
+            f"total {elapsed * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Synthetic spec trees for benchmarks."""
+
+import os
+from typing import Any, Dict, List
+
+from app.worker.tool_registry import ToolRegistry, ToolSpec
+
+# render_spec / write_spec_tree shapes: a typical spec and a very large one
+SPEC_SIZES: Dict[str, Dict[str, int]] = {
+    "small": {"inputs": 3, "tools": 3, "steps": 3},
+    "huge": {"inputs": 300, "tools": 40, "steps": 300},
+}
+
+
+def corpus_tools(tools: int = 3) -> List[str]:
+    return [f"tool_{t}.run" for t in range(tools)]
+
+
+def corpus_tool_registry(tools: int = 3) -> ToolRegistry:
+    """A registry knowing the corpus tools, all backed by `noop_tool`."""
+    return ToolRegistry(
+        ToolSpec(name, "benchmarks.corpus:noop_tool") for name in corpus_tools(tools)
+    )
+
+
+async def noop_tool(args: Dict[str, Any]) -> Dict[str, Any]:
+    return args
+
+
+def render_spec(n: int, inputs: int = 3, tools: int = 3, steps: int = 3) -> str:
+    """A valid Echo spec whose size grows with `inputs`, `tools` and `steps`."""
+    input_block = "".join(
+        f"  in_{i}:\n    type: string\n    description: input number {i}\n    required: false\n"
+        for i in range(inputs)
+    )
+    names = corpus_tools(tools)
+    tool_block = "".join(f"    - {name}\n" for name in names)
+    # A chain of steps ending in `summarize`, each reading the previous output
+    ids = [f"step_{s}" for s in range(steps - 1)] + ["summarize"]
+    plan_block = ""
+    for s, step_id in enumerate(ids):
+        source = f"${{{{ {ids[s - 1]}.output }}}}" if s else "start"
+        plan_block += (
+            f"  - id: {step_id}\n"
+            f"    use: {names[s % len(names)]}\n"
+            f"    with:\n      value: {source}\n"
+            f"    output: out_{s}\n"
+        )
+    return (
+        f'version: "0.1"\n'
+        f"capability: cap_{n}\n"
+        f"description: synthetic spec {n}\n"
+        f"inputs:\n{input_block or '  {}'}\n"
+        "permissions:\n"
+        "  network: read-only\n"
+        "  filesystem: ephemeral\n"
+        f"  tools:\n{tool_block}"
+        f"plan:\n{plan_block}"
+        "returns:\n"
+        "  summary: ${{ summarize.output }}\n"
+    )
+
+
+def write_spec_tree(
+    root: str,
+    count: int,
+    inputs: int = 3,
+    tools: int = 3,
+    per_dir: int = 100,
+    steps: int = 3,
+) -> List[str]:
+    """Write `count` specs under `root`, `per_dir` per subdirectory."""
+    paths = []
+    for n in range(count):
+        directory = os.path.join(root, f"group_{n // per_dir}")
+        if n % per_dir == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"spec_{n}.yaml")
+        with open(path, "w") as f:
+            f.write(render_spec(n, inputs, tools, steps))
+        paths.append(path)
+    return paths
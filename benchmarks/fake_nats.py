@@ -0,0 +1,96 @@
+"""
+In-process stand-in for a NATS connection, so the real NATSClient (and the
+Emitter/Loader code above it) runs without a server: messages are encoded
+bytes with headers, as on the wire, and are delivered by awaiting each
+matching subscriber's callback inside publish(). Queue groups take turns.
+"""
+
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.control_plane.events.client import NATSClient
+from app.control_plane.events.loader import subject_matches
+
+
+class FakeMsg:
+    __slots__ = ("subject", "data", "headers")
+
+    def __init__(self, subject: str, data: bytes, headers: Optional[Dict[str, str]]):
+        self.subject = subject
+        self.data = data
+        self.headers = headers
+
+
+class FakeSubscription:
+    def __init__(self, conn: "FakeConnection", subject: str, queue: str, cb):
+        self.conn = conn
+        self.subject = subject
+        self.queue = queue
+        self.cb = cb
+
+    async def unsubscribe(self) -> None:
+        self.conn.subs.remove(self)
+
+    async def drain(self) -> None:
+        # Delivery is synchronous, so nothing is ever in flight
+        await self.unsubscribe()
+
+
+class FakeConnection:
+    """The subset of nats.aio.client.Client that NATSClient uses."""
+
+    max_payload = 1024 * 1024
+    is_connected = True
+
+    def __init__(self):
+        self.subs: List[FakeSubscription] = []
+        self._turns: Dict[str, Any] = {}
+        self.published = 0
+        self.delivered = 0
+
+    async def subscribe(
+        self,
+        subject: str,
+        queue: str = "",
+        cb: Optional[Callable[[FakeMsg], Awaitable[None]]] = None,
+    ) -> FakeSubscription:
+        sub = FakeSubscription(self, subject, queue, cb)
+        self.subs.append(sub)
+        return sub
+
+    async def publish(
+        self, subject: str, payload: bytes, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        if len(payload) > self.max_payload:
+            raise ValueError(f"Message on '{subject}' exceeds the max payload")
+        self.published += 1
+        msg = FakeMsg(subject, payload, headers)
+        groups: Dict[str, List[FakeSubscription]] = {}
+        for sub in list(self.subs):
+            if not subject_matches(sub.subject, subject):
+                continue
+            if sub.queue:
+                groups.setdefault(sub.queue, []).append(sub)
+                continue
+            self.delivered += 1
+            await sub.cb(msg)
+        for queue, members in groups.items():
+            turn = self._turns.setdefault(queue, itertools.count())
+            self.delivered += 1
+            await members[next(turn) % len(members)].cb(msg)
+
+    async def flush(self, timeout: int = 10) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.subs.clear()
+
+
+class FakeNATSClient(NATSClient):
+    """NATSClient wired to a FakeConnection instead of a server."""
+
+    def __init__(self):
+        super().__init__(base_url="fake", port="0")
+
+    async def init_nats(self) -> None:
+        self.nc = FakeConnection()
@@ -0,0 +1,140 @@
+"""
+Minimal local stand-in for a NATS server: enough of the client protocol
+(INFO/CONNECT/PING/PUB/HPUB/SUB/UNSUB) for nats-py to connect, publish and
+subscribe, counting what arrives. Messages are routed to matching
+subscriptions, one member per queue group; there are no reply subjects,
+auth or clustering.
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+
+from app.control_plane.events.loader import subject_matches
+
+INFO = {
+    "server_id": "echo-stub",
+    "version": "2.10.0",
+    "proto": 1,
+    "headers": True,
+    "max_payload": 1024 * 1024,
+}
+
+
+class StubNatsServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self.bytes = 0
+        self.reads = 0
+        self.delivered = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._waiters = []
+        # (writer, sid) -> (subject, queue group)
+        self._subs: Dict[Tuple[object, bytes], Tuple[str, bytes]] = {}
+        self._routes: Dict[str, List[Tuple[object, bytes, bytes]]] = {}
+        self._turns: Dict[bytes, int] = {}
+
+    async def start(self) -> "StubNatsServer":
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def wait_for(self, count: int) -> None:
+        """Wait until `count` messages have arrived in total."""
+        while self.messages < count:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            await future
+
+    def _arrived(self, count: int, size: int) -> None:
+        self.messages += count
+        self.bytes += size
+        waiters, self._waiters = self._waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def _serve(self, reader, writer) -> None:
+        writer.write(f"INFO {json.dumps(INFO)}\r\n".encode())
+        buffer = b""
+        try:
+            while True:
+                chunk = await reader.read(1 << 16)
+                if not chunk:
+                    return
+                self.reads += 1
+                buffer += chunk
+                count = size = 0
+                while True:
+                    end = buffer.find(b"\r\n")
+                    if end == -1:
+                        break
+                    line = buffer[:end]
+                    op = line.split(b" ", 1)[0].upper()
+                    if op in (b"PUB", b"HPUB"):
+                        # PUB <subject> [reply] <size> / HPUB ... <hdr> <total>
+                        length = int(line.rsplit(b" ", 1)[1])
+                        if len(buffer) < end + 2 + length + 2:
+                            break
+                        body = buffer[end + 2 : end + 2 + length]
+                        buffer = buffer[end + 2 + length + 2 :]
+                        self._route(line, body)
+                        count += 1
+                        size += length
+                        continue
+                    buffer = buffer[end + 2 :]
+                    if op == b"PING":
+                        writer.write(b"PONG\r\n")
+                    elif op == b"SUB":
+                        # SUB <subject> [queue] <sid>
+                        parts = line.split(b" ")
+                        queue = parts[2] if len(parts) == 4 else b""
+                        self._subs[(writer, parts[-1])] = (parts[1].decode(), queue)
+                        self._routes.clear()
+                    elif op == b"UNSUB":
+                        self._subs.pop((writer, line.split(b" ")[1]), None)
+                        self._routes.clear()
+                if count:
+                    self._arrived(count, size)
+        except (ConnectionError, asyncio.CancelledError):
+            return
+        finally:
+            for key in [key for key in self._subs if key[0] is writer]:
+                del self._subs[key]
+            self._routes.clear()
+            writer.close()
+
+    def _route(self, line: bytes, body: bytes) -> None:
+        parts = line.split(b" ")
+        subject = parts[1].decode()
+        targets = self._routes.get(subject)
+        if targets is None:
+            targets = self._routes[subject] = [
+                (writer, sid, queue)
+                for (writer, sid), (pattern, queue) in self._subs.items()
+                if subject_matches(pattern, subject)
+            ]
+        if not targets:
+            return
+        chosen = [(w, sid) for w, sid, queue in targets if not queue]
+        groups: Dict[bytes, list] = {}
+        for writer, sid, queue in targets:
+            if queue:
+                groups.setdefault(queue, []).append((writer, sid))
+        for queue, members in groups.items():
+            turn = self._turns[queue] = self._turns.get(queue, -1) + 1
+            chosen.append(members[turn % len(members)])
+        for writer, sid in chosen:
+            if parts[0].upper() == b"HPUB":
+                head = b"HMSG %s %s %s %s\r\n" % (parts[1], sid, parts[-2], parts[-1])
+            else:
+                head = b"MSG %s %s %s\r\n" % (parts[1], sid, parts[-1])
+            writer.write(head + body + b"\r\n")
+            self.delivered += 1
@@ -0,0 +1,489 @@
+"""
+Benchmark suite over the hot paths, with a stored JSON baseline.
+
+    python -m benchmarks.suite [--quick] [--only PATTERN] [--save PATH]
+                               [--compare PATH] [--threshold 0.3]
+
+Runs offline: NATS is replaced by benchmarks.fake_nats.FakeNATSClient and
+specs come from the synthetic corpus (--specs files of --spec-size shape).
+Each case reports the best time per operation over --repeat runs (the
+median is recorded too), with garbage collection paused while timing.
+A fixed calibration workload is timed next to every run, and comparisons
+divide out its change, so a machine that is busier or slower overall than
+when the baseline was taken does not show up as a regression.
+--save writes the results as a baseline; --compare reports each case
+against one and exits with status 1 if any is slower by more than
+--threshold (0.3 = 30%).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import fnmatch
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from app.common.models.echo import Echo
+from app.common.models.echo_event import EchoEvent
+from app.common.models.watcher import EventKind, WatcherConfig
+from app.common.utils.loader import load
+from app.control_plane.events.codec import get_codec, msgpack
+from app.control_plane.events.emitter import Emitter
+from app.control_plane.events.loader import Loader
+from app.control_plane.watcher.coalescer import FILE_MODIFIED, EventCoalescer
+from app.control_plane.watcher.manager import WatcherManager
+from app.worker import spec_worker
+from benchmarks.corpus import SPEC_SIZES, render_spec, write_spec_tree
+from benchmarks.fake_nats import FakeMsg, FakeNATSClient
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+FORMAT = 1
+
+# A case builds its fixtures and returns (operations per run, run)
+Case = Callable[["Context"], Tuple[int, Callable[[], None]]]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str):
+    def register(fn: Case) -> Case:
+        CASES[name] = fn
+        return fn
+
+    return register
+
+
+class Context:
+    """Shared fixtures: a scratch directory, an event loop, sizes."""
+
+    def __init__(self, root: str, scale: float, specs: int, spec_size: str):
+        self.root = root
+        self.scale = scale
+        self.specs = specs
+        self.spec_size = spec_size
+        self.loop = asyncio.new_event_loop()
+        self._tree: Optional[List[str]] = None
+
+    def ops(self, full: int) -> int:
+        return max(1, int(full * self.scale))
+
+    def spec_file(self, size: str) -> str:
+        path = os.path.join(self.root, f"{size}.yaml")
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write(render_spec(0, **SPEC_SIZES[size]))
+        return path
+
+    def tree(self) -> List[str]:
+        """The spec tree, written on first use."""
+        if self._tree is None:
+            self._tree = write_spec_tree(
+                os.path.join(self.root, "tree"),
+                self.specs,
+                **SPEC_SIZES[self.spec_size],
+            )
+        return self._tree
+
+    def run_async(self, make: Callable[[], "asyncio.Future"]) -> Callable[[], None]:
+        return lambda: self.loop.run_until_complete(make())
+
+    def close(self) -> None:
+        self.loop.close()
+
+
+def make_events(count: int) -> List[EchoEvent]:
+    return [
+        EchoEvent(
+            name=FILE_MODIFIED,
+            source="watcher",
+            payload={"src": f"/srv/echoes/team_{n % 50}/spec_{n}.yaml", "seq": n},
+        )
+        for n in range(count)
+    ]
+
+
+# --- spec loading ---------------------------------------------------------
+
+
+def _load_case(size: str, full: int) -> Case:
+    def build(ctx: Context):
+        path = ctx.spec_file(size)
+        ops = ctx.ops(full)
+
+        def run():
+            for _ in range(ops):
+                load(path)
+
+        return ops, run
+
+    return build
+
+
+def _validate_case(size: str, full: int) -> Case:
+    def build(ctx: Context):
+        with open(ctx.spec_file(size)) as f:
+            data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        ops = ctx.ops(full)
+
+        def run():
+            for _ in range(ops):
+                Echo.model_validate(data)
+
+        return ops, run
+
+    return build
+
+
+case("load.small")(_load_case("small", 500))
+case("load.huge")(_load_case("huge", 10))
+case("echo.validate.small")(_validate_case("small", 5_000))
+case("echo.validate.huge")(_validate_case("huge", 50))
+
+
+# --- events ---------------------------------------------------------------
+
+
+@case("event.hash")
+def event_hash(ctx: Context):
+    events = make_events(ctx.ops(20_000))
+
+    def run():
+        for event in events:
+            event.invalidate_hash()
+            _ = event.hash
+
+    return len(events), run
+
+
+@case("event.json_roundtrip")
+def event_json_roundtrip(ctx: Context):
+    events = make_events(ctx.ops(20_000))
+
+    def run():
+        for event in events:
+            EchoEvent.model_validate_json(event.model_dump_json())
+
+    return len(events), run
+
+
+# --- watcher routing ------------------------------------------------------
+
+
+def _watcher_manager(roots: int) -> WatcherManager:
+    coalescer = EventCoalescer(lambda batch: None, debounce=0, max_pending=1 << 20)
+    manager = WatcherManager(coalescer=coalescer)
+    for n in range(roots):
+        manager.add_watcher(
+            WatcherConfig(name=f"tenant{n}", watch_path=f"/srv/tenants/tenant{n}")
+        )
+    return manager
+
+
+@case("watcher.route")
+def watcher_route(ctx: Context):
+    manager = _watcher_manager(1000)
+    paths = [
+        f"/srv/tenants/tenant{n % 1000}/team{n % 7}/spec_{n}.yaml"
+        for n in range(ctx.ops(50_000))
+    ]
+
+    def run():
+        for path in paths:
+            manager._record_path(EventKind.MODIFIED, path)
+        while manager.coalescer.take_due(force=True):
+            pass
+
+    return len(paths), run
+
+
+# --- loader dispatch ------------------------------------------------------
+
+
+def _dispatch_case(codec_name: str, trusted: bool, full: int) -> Case:
+    def build(ctx: Context):
+        client = FakeNATSClient()
+        loader = Loader(client, trusted=trusted)
+        codec = get_codec(codec_name)
+        headers = Emitter(client, codec=codec).headers
+        msgs = [
+            FakeMsg(FILE_MODIFIED, codec.encode(event), headers)
+            for event in make_events(ctx.ops(full))
+        ]
+
+        async def handler(event):
+            pass
+
+        async def dispatch():
+            for msg in msgs:
+                await loader._dispatch(FILE_MODIFIED, handler, msg)
+
+        return len(msgs), ctx.run_async(dispatch)
+
+    return build
+
+
+# Only msgpack decodes differently when trusted; JSON is always validated
+if msgpack is not None:
+    case("loader.dispatch.trusted")(_dispatch_case("msgpack", True, 20_000))
+case("loader.dispatch.validated")(_dispatch_case("json", False, 20_000))
+
+
+# --- watcher -> emitter -> loader -> handler --------------------------------
+
+
+def _pipeline(ctx: Context, paths: List[str], handler) -> Callable[[], None]:
+    client = FakeNATSClient()
+    ctx.loop.run_until_complete(client.init_nats())
+    emitter = Emitter(client)
+    loader = Loader(client, trusted=True)
+    ctx.loop.run_until_complete(loader.register_handler(FILE_MODIFIED, handler))
+    manager = _watcher_manager(1)
+    manager.add_watcher(WatcherConfig(name="bench", watch_path=ctx.root))
+
+    async def pipeline():
+        for path in paths:
+            manager._record_path(EventKind.MODIFIED, path)
+        # What the coalescer thread hands to the controller's sink
+        while True:
+            batch = manager.coalescer.take_due(force=True)
+            if not batch:
+                break
+            await emitter.publish_batch(
+                (
+                    kind,
+                    EchoEvent(name=kind, source="watcher", payload={"src": path}),
+                )
+                for kind, path in batch
+            )
+
+    return ctx.run_async(pipeline)
+
+
+@case("pipeline.noop")
+def pipeline_noop(ctx: Context):
+    paths = [
+        os.path.join(ctx.root, f"team_{n % 20}", f"spec_{n}.yaml")
+        for n in range(ctx.ops(20_000))
+    ]
+    handled = []
+
+    async def handler(event):
+        handled.append(event)
+
+    run = _pipeline(ctx, paths, handler)
+
+    def checked():
+        handled.clear()
+        run()
+        assert len(handled) == len(paths), (len(handled), len(paths))
+
+    return len(paths), checked
+
+
+@case("pipeline.spec_worker")
+def pipeline_spec_worker(ctx: Context):
+    paths = ctx.tree()
+    # Parse every spec up front, so runs measure repeated events for
+    # unchanged files (stat hits in the spec registry)
+    for path in paths:
+        spec_worker.registry.get(path)
+    return len(paths), _pipeline(ctx, paths, spec_worker.handle_file_modified)
+
+
+# --- running and comparing ------------------------------------------------
+
+
+def _calibration_work() -> None:
+    # A fixed mix of the interpreter work the cases do: dicts, strings, calls
+    table = {}
+    for n in range(2000):
+        key = f"spec_{n}"
+        table[key] = len(key) + n
+    sorted(table.items(), key=lambda item: item[1])
+
+
+def calibrate(repeat: int) -> float:
+    """Best time of a fixed workload right now, in ns (machine speed)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _calibration_work()
+        samples.append((time.perf_counter() - start) * 1e9)
+    return min(samples)
+
+
+def measure(run: Callable[[], None], ops: int, repeat: int) -> Dict[str, float]:
+    run()  # warm-up
+    samples = []
+    calibration = []
+    for _ in range(repeat):
+        calibration.append(calibrate(3))
+        # As timeit does: a collection landing in one sample is noise
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) / ops * 1e9)
+        finally:
+            gc.enable()
+    return {
+        "ns_per_op": round(min(samples), 1),
+        "median_ns": round(statistics.median(samples), 1),
+        "calibration_ns": round(min(calibration), 1),
+        "ops": ops,
+        "repeat": repeat,
+    }
+
+
+def run_suite(args) -> Dict[str, Dict[str, float]]:
+    root = tempfile.mkdtemp(prefix="echo-suite-")
+    ctx = Context(root, 0.1 if args.quick else 1.0, args.specs, args.spec_size)
+    results = {}
+    try:
+        for name, build in CASES.items():
+            if args.only and not fnmatch.fnmatch(name, args.only):
+                continue
+            # Handlers and loaders log per event; keep the report readable
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                ops, run = build(ctx)
+                result = measure(run, ops, args.repeat)
+            results[name] = result
+            print(
+                f"{name:<28} {result['ns_per_op']:>12,.0f} ns/op  "
+                f"(median {result['median_ns']:,.0f}, {ops} ops x {args.repeat})",
+                file=sys.stderr,
+            )
+    finally:
+        ctx.close()
+        shutil.rmtree(root)
+    return results
+
+
+def _change(before: Dict[str, float], after: Dict[str, float]) -> float:
+    """Relative change in time per op, corrected for machine speed when known."""
+    ratio = after["ns_per_op"] / before["ns_per_op"]
+    if before.get("calibration_ns") and after.get("calibration_ns"):
+        ratio /= after["calibration_ns"] / before["calibration_ns"]
+    return ratio - 1
+
+
+def compare(
+    baseline: Dict[str, Dict[str, float]],
+    results: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Print a comparison table; returns the names of regressed cases."""
+    regressions = []
+    print(f"{'case':<28} {'baseline':>12} {'current':>12} {'raw':>6} {'change':>7}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<28} {'-':>12} {result['ns_per_op']:>12,.0f}  new")
+            continue
+        raw = result["ns_per_op"] / before["ns_per_op"] - 1
+        change = _change(before, result)
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(
+            f"{name:<28} {before['ns_per_op']:>12,.0f} {result['ns_per_op']:>12,.0f} "
+            f"{raw:>+6.0%} {change:>+7.0%}{flag}"
+        )
+    for name in baseline:
+        if name not in results:
+            print(
+                f"{name:<28} {baseline[name]['ns_per_op']:>12,.0f} {'-':>12}  skipped"
+            )
+    return regressions
+
+
+def environment(args) -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": str(os.cpu_count()),
+        "quick": str(args.quick),
+        "specs": str(args.specs),
+        "spec_size": args.spec_size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="10%% of the ops")
+    parser.add_argument("--only", help="glob over case names, e.g. 'pipeline.*'")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--specs", type=int, default=500)
+    parser.add_argument("--spec-size", choices=sorted(SPEC_SIZES), default="small")
+    parser.add_argument("--save", nargs="?", const=BASELINE, metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, metavar="PATH")
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args()
+    if args.list:
+        print("\n".join(CASES))
+        return
+    if args.repeat <= 0 or args.threshold < 0:
+        parser.error("--repeat must be positive and --threshold not negative")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("format") != FORMAT:
+            parser.error(f"{args.compare} is not a format {FORMAT} baseline")
+        env = environment(args)
+        differs = {
+            k: v for k, v in baseline.get("environment", {}).items() if env.get(k) != v
+        }
+        if differs:
+            print(f"note: baseline recorded with {differs}", file=sys.stderr)
+
+    results = run_suite(args)
+
+    if args.save:
+        with open(f"{args.save}.tmp", "w") as f:
+            json.dump(
+                {
+                    "format": FORMAT,
+                    "created": datetime.datetime.now(datetime.timezone.utc)
+                    .replace(microsecond=0)
+                    .isoformat(),
+                    "environment": environment(args),
+                    "results": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        os.replace(f"{args.save}.tmp", args.save)
+        print(f"Saved {len(results)} results to {args.save}", file=sys.stderr)
+
+    if baseline is not None:
+        regressions = compare(baseline["results"], results, args.threshold)
+        if regressions:
+            print(
+                f"{len(regressions)} case(s) slower than baseline by more than "
+                f"{args.threshold:.0%}: {', '.join(regressions)}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
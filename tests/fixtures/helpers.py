@@ -0,0 +1,26 @@
+"""Helpers shared by the unit tests."""
+
+from app.common.models.echo import Echo
+
+
+class FakeClock:
+    """Callable clock for components taking `clock=`; advance it via `now`."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_echo(plan, tools, returns=None):
+    """A minimal valid Echo around `plan`, permitted to use `tools`."""
+    return Echo(
+        version="0.1",
+        capability="test",
+        description="test",
+        inputs={"x": {"type": "string", "description": "x"}},
+        permissions={"network": "none", "filesystem": "none", "tools": tools},
+        plan=plan,
+        returns=returns or {},
+    )
@@ -0,0 +1,78 @@
+"""Tests for the bulk spec loader."""
+
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.common.utils import bulk
+from app.common.utils.bulk import bulk_load, iter_spec_paths
+from app.common.utils.capability_index import CapabilityIndex
+from app.common.utils.spec_registry import SpecRegistry
+from app.worker import spec_worker
+
+ECHO_YAML = Path(__file__).parents[3] / "echoes" / "echo.yaml"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / ".git").mkdir()
+    shutil.copy(ECHO_YAML, tmp_path / "top.yaml")
+    shutil.copy(ECHO_YAML, tmp_path / "a" / "b" / "nested.yml")
+    shutil.copy(ECHO_YAML, tmp_path / ".git" / "hidden.yaml")
+    (tmp_path / "a" / "broken.yaml").write_text("version: '0.1'\n")
+    (tmp_path / "a" / "notes.txt").write_text("not a spec")
+    return tmp_path
+
+
+def test_walk_finds_specs_and_skips_hidden(tree):
+    names = sorted(Path(p).name for p in iter_spec_paths(str(tree)))
+
+    assert names == ["broken.yaml", "nested.yml", "top.yaml"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_results_and_errors_are_streamed(tree, workers):
+    results = {
+        Path(r.path).name: r
+        for r in bulk_load(str(tree), workers=workers, chunk_size=1)
+    }
+
+    assert results["top.yaml"].echo.capability == "analyze_repo"
+    assert results["nested.yml"].error is None
+    assert results["broken.yaml"].echo is None
+    assert "capability" in results["broken.yaml"].error
+
+
+def test_preload_primes_registry(tree, monkeypatch):
+    registry = SpecRegistry()
+    monkeypatch.setattr(spec_worker, "registry", registry)
+
+    assert spec_worker.preload(str(tree), workers=1, snapshot=False) == (2, 1)
+    assert registry.get(str(tree / "top.yaml")).capability == "analyze_repo"
+    assert registry.stats["parses"] == 0
+
+
+def test_preload_keeps_versions_reloaded_while_it_ran(tree, monkeypatch):
+    monkeypatch.setattr(spec_worker, "registry", SpecRegistry())
+    monkeypatch.setattr(spec_worker, "accepted", {})
+    monkeypatch.setattr(spec_worker, "capabilities", CapabilityIndex())
+    top = tree / "top.yaml"
+
+    def racing_bulk_load(paths, workers=None):
+        results = list(bulk.bulk_load_paths(paths, workers=workers))
+        # A file.modified handler accepts a newer version on the loop
+        top.write_text(top.read_text().replace("read-only", "write"))
+        asyncio.run(spec_worker.reload(str(top)))
+        yield from results
+
+    monkeypatch.setattr(spec_worker, "bulk_load_paths", racing_bulk_load)
+    assert spec_worker.preload(str(tree), workers=1, snapshot=False) == (1, 1)
+
+    assert spec_worker.accepted[str(top)] == spec_worker.registry.digest(str(top))
+    assert spec_worker.registry.get(str(top)).permissions.network == "write"
+    assert spec_worker.capabilities.find(network="read-only") == [
+        str(tree / "a" / "b" / "nested.yml")
+    ]
@@ -0,0 +1,81 @@
+"""Tests for the inverted capability index."""
+
+import pytest
+
+from app.common.utils.capability_index import (
+    AllOf,
+    AnyOf,
+    CapabilityIndex,
+    Term,
+    dump_terms,
+)
+
+
+def spec(capability, network, tools, inputs=None, filesystem="ephemeral"):
+    return {
+        "capability": capability,
+        "permissions": {
+            "network": network,
+            "filesystem": filesystem,
+            "tools": tools,
+        },
+        "inputs": {name: {"type": type_} for name, type_ in (inputs or {}).items()},
+    }
+
+
+@pytest.fixture
+def index():
+    index = CapabilityIndex()
+    index.update(
+        [
+            (
+                "a",
+                dump_terms(
+                    spec("analyze_repo", "read-only", ["git.clone"], {"url": "string"})
+                ),
+            ),
+            ("b", dump_terms(spec("push_repo", "write", ["git.clone", "git.push"]))),
+            (
+                "c",
+                dump_terms(
+                    spec("fetch_page", "write", ["http.get"], {"url": "string"})
+                ),
+            ),
+        ]
+    )
+    return index
+
+
+def test_compound_queries(index):
+    assert index.query(Term("tool", "git.clone")) == ["a", "b"]
+    assert index.query(Term("tool", "git.clone") & Term("network", "write")) == ["b"]
+    assert index.query(Term("input", "url") | Term("tool", "git.push")) == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert index.query(
+        AllOf(Term("network", "write"), AnyOf(Term("input", "url"), Term("tool", "x")))
+    ) == ["c"]
+    assert index.find(tool=["git.push", "http.get"], input_type="string") == ["c"]
+    assert index.count(Term("filesystem", "ephemeral")) == 3
+    assert index.query(Term("tool", "git.clone"), limit=1) == ["a"]
+    assert index.values("network") == {"read-only": 1, "write": 2}
+
+
+def test_updates_only_move_changed_terms(index):
+    index.add("a", dump_terms(spec("analyze_repo", "write", ["git.clone"])))
+    assert index.query(Term("network", "write")) == ["a", "b", "c"]
+    assert index.query(Term("input", "url")) == ["c"]
+    assert "read-only" not in index.values("network")
+
+    index.discard("b")
+    index.add("d", dump_terms(spec("deploy", "write", ["git.push"])))
+    # "d" takes the slot "b" left
+    assert index.query(Term("tool", "git.push")) == ["d"]
+    assert len(index) == 3
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError):
+        Term("owner", "me")
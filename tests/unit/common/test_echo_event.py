@@ -0,0 +1,47 @@
+"""Tests for EchoEvent hash memoisation."""
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import JsonCodec
+
+
+def make_event():
+    return EchoEvent(
+        name="file.modified", source="watcher", payload={"src": "echoes/echo.yaml"}
+    )
+
+
+def test_hash_is_memoised(monkeypatch):
+    event = make_event()
+    digest = event.hash
+
+    monkeypatch.setattr(EchoEvent, "_canonical", lambda self: 1 / 0)
+    assert event.hash == digest
+    assert f"#{digest[:8]}" in str(event)
+    assert '"hash":"' + digest in event.model_dump_json()
+
+
+def test_reassigning_a_field_invalidates_the_hash():
+    event = make_event()
+    before = event.hash
+
+    event.name = "file.created"
+
+    assert event.hash != before
+    assert event.hash == EchoEvent(**event.model_dump(exclude={"hash"})).hash
+
+
+def test_cached_digest_does_not_affect_equality():
+    event, other = make_event(), make_event()
+    other.timestamp = event.timestamp
+    assert event.hash
+
+    assert event == other
+
+
+def test_json_decode_recomputes_transmitted_hash():
+    codec = JsonCodec()
+    event = make_event()
+    body = codec.encode(event).replace(b'"hash":"', b'"hash":"f00d', 1)
+
+    assert codec.decode(body, trusted=True).hash == event.hash
+    assert codec.decode(body).hash == event.hash
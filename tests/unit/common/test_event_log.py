@@ -0,0 +1,42 @@
+"""Tests for the watcher ring-buffer event log."""
+
+from app.common.models.watcher import EventKind, EventLog, WatcherConfig
+
+
+def test_ring_buffer_keeps_newest_entries():
+    log = EventLog(capacity=3)
+    for i in range(5):
+        log.append(EventKind.MODIFIED, f"echoes/{i}.yaml", timestamp=float(i))
+
+    assert len(log) == 3
+    assert [e.path for e in log] == ["echoes/2.yaml", "echoes/3.yaml", "echoes/4.yaml"]
+    assert [e.path for e in log.last(2)] == ["echoes/3.yaml", "echoes/4.yaml"]
+    assert log.last(10) == list(log)
+
+
+def test_since_returns_entries_at_or_after_timestamp():
+    log = EventLog(capacity=4)
+    for i in range(6):
+        log.append(EventKind.CREATED, f"echoes/{i}.yaml", timestamp=float(i))
+
+    assert [e.timestamp for e in log.since(3.0)] == [3.0, 4.0, 5.0]
+    assert log.since(10.0) == []
+    assert len(log.since(0.0)) == 4
+
+
+def test_entries_are_typed():
+    log = EventLog()
+    log.append(EventKind.CREATED, "echoes/echo.yaml")
+
+    entry = log.last(1)[0]
+    assert entry.kind is EventKind.CREATED
+    assert entry.kind.subject == "file.created"
+    assert entry.path == "echoes/echo.yaml"
+
+
+def test_watcher_config_gets_its_own_log():
+    a, b = WatcherConfig(name="a"), WatcherConfig(name="b")
+    a.logs.append(EventKind.MODIFIED, "x")
+
+    assert len(a.logs) == 1
+    assert len(b.logs) == 0
@@ -0,0 +1,70 @@
+"""Tests for the metrics registry and Prometheus export."""
+
+import asyncio
+
+import pytest
+
+from app.common.utils.metrics import MetricsRegistry
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    events = registry.counter("events", "Events seen", ("subject",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    events.labels("file.created").inc()
+    events.labels("file.created").inc(2)
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    text = registry.render()
+
+    assert '# TYPE events counter\nevents_total{subject="file.created"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_sum 5.55" in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_gauges_read_callbacks_at_export():
+    registry = MetricsRegistry()
+    depth = {"a": 1}
+    registry.gauge("pending", "Pending", fn=lambda: len(depth))
+    registry.gauge("queued", "Queued", ("subject",), fn=lambda: dict(depth))
+    depth["b"] = 4
+
+    text = registry.render()
+
+    assert "pending 2" in text
+    assert 'queued{subject="a"} 1\nqueued{subject="b"} 4' in text
+
+
+def test_registering_a_name_twice():
+    registry = MetricsRegistry()
+    counter = registry.counter("x", "X")
+
+    assert registry.counter("x", "X") is counter
+    with pytest.raises(ValueError):
+        registry.histogram("x", "X")
+    with pytest.raises(ValueError):
+        registry.counter("y", "Y", ("subject",)).labels("a", "b")
+
+
+def test_serves_over_http():
+    registry = MetricsRegistry()
+    registry.counter("hits", "Hits").inc()
+
+    async def main():
+        server = await registry.serve(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        server.close()
+        return response.decode()
+
+    response = asyncio.run(main())
+
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert response.endswith("hits_total 1\n")
@@ -0,0 +1,90 @@
+"""Tests for plan compilation."""
+
+from pathlib import Path
+
+import pytest
+import yaml
+from pydantic import ValidationError
+
+from app.common.models.echo import Echo
+
+ECHO_YAML = Path(__file__).parents[3] / "echoes" / "echo.yaml"
+
+
+def spec(plan, returns=None):
+    data = yaml.safe_load(ECHO_YAML.read_text())
+    data["plan"] = plan
+    data["returns"] = returns or {}
+    return data
+
+
+def test_sample_spec_compiles_to_a_chain():
+    compiled = Echo(**yaml.safe_load(ECHO_YAML.read_text())).compiled
+
+    assert compiled.order == ("clone_repo", "analyze_structure", "summarize")
+    assert compiled.steps["analyze_structure"].deps == {"clone_repo"}
+    assert compiled.dependents["clone_repo"] == ("analyze_structure",)
+
+
+def test_rendering_keeps_types_and_interpolates_text():
+    echo = Echo(
+        **spec(
+            [
+                {"id": "a", "use": "t", "output": "value"},
+                {
+                    "id": "b",
+                    "use": "t",
+                    "with": {
+                        "raw": "${{ a.output.value }}",
+                        "nested": ["url=${{ inputs.url }}", 3],
+                        "fixed": "x",
+                    },
+                },
+            ],
+            returns={"n": "${{ b.output.count }}"},
+        )
+    )
+    outputs = {"a": {"k": 1}, "b": {"count": 7}}
+    step = echo.compiled.steps["b"]
+
+    assert step.render_args({"url": "u"}, outputs) == {
+        "raw": {"k": 1},
+        "nested": ["url=u", 3],
+        "fixed": "x",
+    }
+    assert echo.compiled.render_returns({}, outputs) == {"n": 7}
+
+
+def test_independent_steps_keep_declaration_order():
+    echo = Echo(
+        **spec(
+            [
+                {"id": "late", "use": "t", "with": {"x": "${{ first.output }}"}},
+                {"id": "first", "use": "t"},
+                {"id": "other", "use": "t"},
+            ]
+        )
+    )
+
+    assert echo.compiled.order == ("first", "late", "other")
+
+
+@pytest.mark.parametrize(
+    "plan, message",
+    [
+        (
+            [
+                {"id": "a", "use": "t", "with": {"x": "${{ b.output }}"}},
+                {"id": "b", "use": "t", "with": {"x": "${{ a.output }}"}},
+            ],
+            "cycle",
+        ),
+        ([{"id": "a", "use": "t", "with": {"x": "${{ nope.output }}"}}], "nope"),
+        ([{"id": "a", "use": "t", "with": {"x": "${{ inputs.nope }}"}}], "nope"),
+        ([{"id": "a", "use": "t", "with": {"x": "${{ a.result }}"}}], "expected"),
+        ([{"id": "a", "use": "t"}, {"id": "a", "use": "t"}], "Duplicate"),
+    ],
+)
+def test_invalid_plans_are_rejected_at_load(plan, message):
+    with pytest.raises(ValidationError, match=message):
+        Echo(**spec(plan))
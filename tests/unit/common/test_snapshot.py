@@ -0,0 +1,89 @@
+"""Tests for the on-disk spec snapshot."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.common.utils.snapshot import SpecSnapshot, snapshot_path
+from app.common.utils.spec_registry import SpecRegistry
+from app.worker import spec_worker
+from app.worker.tool_registry import ToolRegistry, ToolSpec
+
+ECHO_YAML = Path(__file__).parents[3] / "echoes" / "echo.yaml"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "echoes"
+    root.mkdir()
+    for name in ("one.yaml", "two.yaml"):
+        shutil.copy(ECHO_YAML, root / name)
+    return root
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = SpecRegistry()
+    monkeypatch.setattr(spec_worker, "registry", registry)
+    return registry
+
+
+def test_warm_start_skips_parsing(tree, registry, monkeypatch):
+    assert spec_worker.preload(str(tree), workers=1) == (2, 0)
+    assert os.path.exists(snapshot_path(str(tree)))
+    # Kept out of the watched tree, so rewriting it raises no file events
+    assert sorted(p.name for p in tree.iterdir()) == ["one.yaml", "two.yaml"]
+
+    loaded = []
+    monkeypatch.setattr(
+        spec_worker, "bulk_load_paths", lambda paths, **kw: loaded.extend(paths) or []
+    )
+    registry.clear()
+    assert spec_worker.preload(str(tree), workers=1) == (2, 0)
+
+    assert loaded == []
+    assert registry.get(str(tree / "one.yaml")).capability == "analyze_repo"
+    assert registry.stats["parses"] == 0
+
+
+def test_changed_files_are_reparsed(tree, registry):
+    spec_worker.preload(str(tree), workers=1)
+    changed = tree / "two.yaml"
+    changed.write_text(ECHO_YAML.read_text().replace("analyze_repo", "other"))
+    os.utime(tree / "one.yaml")  # touched only, digest still matches
+
+    spec_worker.preload(str(tree), workers=1)
+    snap = SpecSnapshot.for_tree(str(tree))
+
+    assert snap.load(str(changed)).capability == "other"
+    assert snap.entry(str(tree / "one.yaml")).mtime_ns == (
+        (tree / "one.yaml").stat().st_mtime_ns
+    )
+    snap.close()
+
+
+def test_corrupt_or_foreign_snapshot_is_ignored(tree, registry):
+    Path(snapshot_path(str(tree))).write_bytes(b"garbage")
+
+    assert len(SpecSnapshot.for_tree(str(tree))) == 0
+    assert spec_worker.preload(str(tree), workers=1) == (2, 0)
+    assert len(SpecSnapshot.for_tree(str(tree))) == 2
+
+
+def test_snapshot_entries_are_rechecked_against_the_tool_registry(
+    tree, registry, monkeypatch
+):
+    spec_worker.preload(str(tree), workers=1)
+    monkeypatch.setattr(
+        spec_worker,
+        "tools",
+        ToolRegistry(ToolSpec(name, "unused:tool") for name in ("git.clone",)),
+    )
+    monkeypatch.setattr(spec_worker, "accepted", {})
+    registry.clear()
+
+    assert spec_worker.preload(str(tree), workers=1) == (0, 2)
+    assert spec_worker.accepted == {}
+    assert len(SpecSnapshot.for_tree(str(tree))) == 0
@@ -0,0 +1,60 @@
+"""Tests for structural spec diffs."""
+
+from pathlib import Path
+
+import yaml
+
+from app.common.models.echo import Echo
+from app.common.utils.spec_diff import diff_echo
+
+ECHO_YAML = Path(__file__).parents[3] / "echoes" / "echo.yaml"
+
+
+def load(**changes):
+    data = yaml.safe_load(ECHO_YAML.read_text())
+    for key, value in changes.items():
+        data[key] = value(data[key]) if callable(value) else value
+    return Echo(**data)
+
+
+def test_description_edit_leaves_plan_alone():
+    diff = diff_echo(load(), load(description="new words"))
+
+    assert diff.header == ["description"]
+    assert not diff.affects_plan and not diff.affects_tools
+    assert diff.to_payload() == {"header": ["description"]}
+
+
+def test_single_step_edit_is_reported_by_id():
+    def edit(plan):
+        plan[1]["with"]["path"] = "${{ clone_repo.output }}"
+        return plan
+
+    diff = diff_echo(load(), load(plan=edit))
+
+    assert diff.steps_changed == ["analyze_structure"]
+    assert diff.affects_plan
+    assert diff.to_payload() == {"steps": {"changed": ["analyze_structure"]}}
+
+
+def test_input_type_edit_is_a_change():
+    def retype(inputs):
+        inputs["url"]["type"] = "integer"
+        return inputs
+
+    diff = diff_echo(load(), load(inputs=retype))
+
+    assert diff.inputs_changed == ["url"]
+    assert diff and not diff.affects_plan and diff.affects_index
+    assert diff.to_payload() == {"inputs": {"changed": ["url"]}}
+
+
+def test_permissions_and_new_spec():
+    def more_tools(permissions):
+        permissions["tools"].append("shell.exec")
+        return permissions
+
+    assert diff_echo(load(), load(permissions=more_tools)).affects_tools
+    created = diff_echo(None, load())
+    assert created.steps_added == ["clone_repo", "analyze_structure", "summarize"]
+    assert not diff_echo(load(), load())
@@ -0,0 +1,75 @@
+"""Tests for the content-addressed spec registry."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.common.models.echo import Echo
+from app.common.utils.spec_registry import SpecRegistry
+
+ECHO_YAML = Path(__file__).parents[3] / "echoes" / "echo.yaml"
+
+
+@pytest.fixture
+def spec(tmp_path):
+    path = tmp_path / "echo.yaml"
+    shutil.copy(ECHO_YAML, path)
+    return path
+
+
+def test_unchanged_file_is_parsed_once(spec):
+    registry = SpecRegistry()
+
+    first = registry.get(str(spec))
+    second = registry.get(str(spec))
+
+    assert isinstance(first, Echo)
+    assert first is second
+    assert registry.stats["parses"] == 1
+    assert registry.stats["stat_hits"] == 1
+
+
+def test_touch_without_content_change_skips_parse(spec):
+    registry = SpecRegistry()
+    first = registry.get(str(spec))
+
+    st = os.stat(spec)
+    os.utime(spec, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert registry.get(str(spec)) is first
+    assert registry.stats["digest_hits"] == 1
+    assert registry.stats["parses"] == 1
+
+
+def test_content_change_reparses(spec):
+    registry = SpecRegistry()
+    registry.get(str(spec))
+
+    spec.write_text(spec.read_text().replace("analyze_repo", "inspect_repo"))
+
+    assert registry.get(str(spec)).capability == "inspect_repo"
+    assert registry.stats["parses"] == 2
+
+
+def test_invalid_spec_returns_none(tmp_path):
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("version: '0.1'\n")
+
+    assert SpecRegistry().get(str(bad)) is None
+
+
+def test_lru_eviction_respects_memory_cap(tmp_path):
+    registry = SpecRegistry(max_bytes=3 * (ECHO_YAML.stat().st_size + 1024))
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"spec{i}.yaml"
+        shutil.copy(ECHO_YAML, path)
+        paths.append(str(path))
+        registry.get(str(path))
+
+    assert len(registry) == 3
+    assert paths[0] not in registry
+    assert paths[-1] in registry
+    assert registry.memory_bytes <= registry.max_bytes
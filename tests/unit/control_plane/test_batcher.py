@@ -0,0 +1,81 @@
+"""Tests for batched publishing."""
+
+import asyncio
+
+from app.control_plane.events.batcher import PublishBatcher
+from app.control_plane.events.client import NATSClient
+
+
+class RecordingClient:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.flushed = 0
+
+    async def publish_many(self, messages):
+        self.batches.append([data for _, data, _ in messages])
+        await asyncio.sleep(self.delay)
+
+    async def flush(self):
+        self.flushed += 1
+
+
+def test_batches_by_count_and_linger():
+    async def main():
+        client = RecordingClient()
+        batcher = PublishBatcher(client, max_batch=3, linger=0.01)
+        for i in range(4):
+            await batcher.add("s", str(i).encode())
+        await asyncio.sleep(0)
+        first = list(client.batches)
+        await asyncio.sleep(0.03)  # the leftover message goes out on linger
+        return first, client.batches
+
+    first, batches = asyncio.run(main())
+
+    assert first == [[b"0", b"1", b"2"]]
+    assert batches == [[b"0", b"1", b"2"], [b"3"]]
+
+
+def test_pending_bytes_bound_makes_producers_wait():
+    async def main():
+        client = RecordingClient(delay=0.01)
+        batcher = PublishBatcher(client, max_batch=2, max_pending_bytes=4)
+        peak = 0
+        for _ in range(10):
+            await batcher.add("s", b"xx")
+            peak = max(peak, batcher.pending_bytes)
+        await batcher.flush()
+        return peak, batcher, client
+
+    peak, batcher, client = asyncio.run(main())
+
+    assert peak <= 4
+    assert batcher.stats["waits"] > 0
+    assert sum(len(b) for b in client.batches) == 10
+    assert batcher.pending_bytes == 0 and client.flushed == 1
+
+
+def test_publish_many_publishes_each_message_then_flushes_once():
+    class FakeConnection:
+        is_connected = True
+
+        def __init__(self):
+            self.calls = []
+
+        async def publish(self, subject, payload, headers=None):
+            self.calls.append((subject, payload, headers))
+
+        async def flush(self):
+            self.calls.append("flush")
+
+    client = NATSClient("localhost", "4222")
+    client.nc = FakeConnection()
+    headers = {"Echo-Codec": "json"}
+
+    sent = asyncio.run(
+        client.publish_many([("a.b", b"one", headers), ("c", "two", None)])
+    )
+
+    assert sent == 2
+    assert client.nc.calls == [("a.b", b"one", headers), ("c", b"two", None), "flush"]
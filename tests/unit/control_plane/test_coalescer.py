@@ -0,0 +1,79 @@
+"""Tests for the per-path debounce stage between watcher and emitter."""
+
+from app.control_plane.watcher.coalescer import (
+    FILE_CREATED,
+    FILE_DELETED,
+    FILE_MODIFIED,
+    EventCoalescer,
+)
+from tests.fixtures.helpers import FakeClock
+
+
+def make(**kwargs):
+    batches = []
+    clock = FakeClock()
+    coalescer = EventCoalescer(batches.append, clock=clock, **kwargs)
+    return coalescer, clock, batches
+
+
+def test_created_and_modified_collapse_into_one_event():
+    coalescer, clock, _ = make(debounce=0.1)
+
+    coalescer.submit(FILE_CREATED, "echoes/a.yaml")
+    coalescer.submit(FILE_MODIFIED, "echoes/a.yaml")
+    coalescer.submit(FILE_MODIFIED, "echoes/a.yaml")
+
+    assert coalescer.take_due() == []
+    clock.now = 0.2
+    assert coalescer.take_due() == [(FILE_CREATED, "echoes/a.yaml")]
+    assert (coalescer.events_in, coalescer.events_out) == (3, 1)
+
+
+def test_delete_wins_within_the_window_until_the_file_is_recreated():
+    coalescer, clock, _ = make(debounce=0.1)
+
+    coalescer.submit(FILE_CREATED, "echoes/a.yaml")
+    coalescer.submit(FILE_MODIFIED, "echoes/a.yaml")
+    coalescer.submit(FILE_DELETED, "echoes/a.yaml")
+    coalescer.submit(FILE_MODIFIED, "echoes/b.yaml")
+    coalescer.submit(FILE_DELETED, "echoes/b.yaml")
+    coalescer.submit(FILE_CREATED, "echoes/b.yaml")
+
+    clock.now = 0.2
+    assert coalescer.take_due() == [
+        (FILE_DELETED, "echoes/a.yaml"),
+        (FILE_CREATED, "echoes/b.yaml"),
+    ]
+
+
+def test_debounce_window_slides_until_max_wait():
+    coalescer, clock, _ = make(debounce=0.1, max_wait=0.25)
+
+    for t in (0.0, 0.08, 0.16, 0.24):
+        clock.now = t
+        coalescer.submit(FILE_MODIFIED, "echoes/a.yaml")
+        assert coalescer.take_due() == []
+
+    clock.now = 0.25
+    assert coalescer.take_due() == [(FILE_MODIFIED, "echoes/a.yaml")]
+
+
+def test_batches_are_capped_and_flush_drains_everything():
+    coalescer, _, batches = make(debounce=0.1, max_batch=2)
+    for i in range(5):
+        coalescer.submit(FILE_MODIFIED, f"echoes/{i}.yaml")
+
+    coalescer.flush()
+
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert len(coalescer) == 0
+
+
+def test_full_queue_rejects_new_paths_after_timeout():
+    coalescer, _, _ = make(max_pending=1)
+    assert coalescer.submit(FILE_MODIFIED, "echoes/a.yaml")
+    # Updates to a pending path never need a new slot
+    assert coalescer.submit(FILE_MODIFIED, "echoes/a.yaml")
+
+    assert not coalescer.submit(FILE_MODIFIED, "echoes/b.yaml", timeout=0.01)
+    assert coalescer.dropped == 1
@@ -0,0 +1,49 @@
+"""Tests for the EchoEvent wire codecs."""
+
+import pytest
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import (
+    CODEC_HEADER,
+    JsonCodec,
+    codec_for_headers,
+    get_codec,
+)
+
+
+def make_event():
+    return EchoEvent(
+        name="file.modified", source="watcher", payload={"src": "echoes/echo.yaml"}
+    )
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_json_round_trip(trusted):
+    event = make_event()
+
+    decoded = JsonCodec().decode(JsonCodec().encode(event), trusted=trusted)
+
+    assert decoded == event
+    assert decoded.hash == event.hash
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_msgpack_round_trip_is_smaller_than_json(trusted):
+    pytest.importorskip("msgpack")
+    codec = get_codec("msgpack")
+    event = make_event()
+
+    data = codec.encode(event)
+
+    assert len(data) < len(JsonCodec().encode(event))
+    decoded = codec.decode(data, trusted=trusted)
+    assert decoded == event
+    assert decoded.hash == event.hash
+
+
+def test_header_selects_codec_and_defaults_to_json():
+    assert codec_for_headers(None).name == "json"
+    assert codec_for_headers({}).name == "json"
+    assert codec_for_headers({CODEC_HEADER: "json"}).name == "json"
+    with pytest.raises(ValueError):
+        codec_for_headers({CODEC_HEADER: "xml"})
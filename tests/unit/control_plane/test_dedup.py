@@ -0,0 +1,74 @@
+"""Tests for duplicate suppression in the Loader."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import JsonCodec
+from app.control_plane.events.dedup import SeenSet
+from app.control_plane.events.loader import Loader
+from tests.fixtures.helpers import FakeClock
+
+
+def test_seen_set_window_and_bound():
+    clock = FakeClock()
+    seen = SeenSet(window=1.0, max_entries=2, clock=clock)
+
+    assert not seen.seen("a")
+    assert seen.seen("a")
+    clock.now = 1.5
+    assert not seen.seen("a")
+
+    seen.seen("b")
+    seen.seen("c")
+    assert len(seen) == 2
+    assert seen.stats == {"hits": 1, "misses": 4, "evictions": 1}
+
+
+def make_msg(src):
+    event = EchoEvent(name="file.modified", source="watcher", payload={"src": src})
+    return SimpleNamespace(data=JsonCodec().encode(event), headers=None)
+
+
+def test_loader_suppresses_repeated_events_for_same_file_state(tmp_path):
+    spec = tmp_path / "echo.yaml"
+    spec.write_text("a")
+    handled = []
+
+    async def handler(event):
+        handled.append(event)
+
+    async def run():
+        loader = Loader(nats_client=None, dedup=SeenSet())
+        # Distinct EchoEvents (own timestamps) for the same unchanged file
+        for _ in range(3):
+            await loader._dispatch("file.modified", handler, make_msg(str(spec)))
+        spec.write_text("changed")
+        await loader._dispatch("file.modified", handler, make_msg(str(spec)))
+        return loader
+
+    loader = asyncio.run(run())
+
+    assert len(handled) == 2
+    assert loader.dedup.stats["hits"] == 2
+
+
+def test_failed_handler_does_not_suppress_retry(tmp_path):
+    spec = tmp_path / "echo.yaml"
+    spec.write_text("a")
+    calls = []
+
+    async def flaky(event):
+        calls.append(event)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    async def run():
+        loader = Loader(nats_client=None, dedup=SeenSet())
+        msg = make_msg(str(spec))
+        await loader._dispatch("file.modified", flaky, msg)
+        await loader._dispatch("file.modified", flaky, msg)
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
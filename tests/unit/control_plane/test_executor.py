@@ -0,0 +1,57 @@
+"""Tests for the bounded-concurrency handler executor."""
+
+import asyncio
+
+from app.control_plane.events.executor import HandlerExecutor
+
+
+def test_per_subject_concurrency_and_in_flight_bound():
+    peak = {"a": 0, "b": 0}
+    running = {"a": 0, "b": 0}
+    max_in_flight = 0
+
+    def handler(subject):
+        async def run(event):
+            running[subject] += 1
+            peak[subject] = max(peak[subject], running[subject])
+            await asyncio.sleep(0.01)
+            running[subject] -= 1
+
+        return run
+
+    async def main():
+        nonlocal max_in_flight
+        executor = HandlerExecutor(max_in_flight=6, concurrency=4, per_subject={"a": 2})
+        for i in range(20):
+            subject = "a" if i % 2 else "b"
+            await executor.submit(subject, handler(subject), None)
+            max_in_flight = max(max_in_flight, executor.in_flight)
+        await executor.drain()
+        return executor.metrics()
+
+    metrics = asyncio.run(main())
+
+    assert peak["a"] == 2
+    assert 2 < peak["b"] <= 4
+    assert max_in_flight <= 6
+    assert metrics["a"]["completed"] == metrics["b"]["completed"] == 10
+    assert metrics["a"]["queued"] == metrics["a"]["running"] == 0
+    assert metrics["a"]["p50_ms"] > 0
+
+
+def test_failures_are_counted_and_reported():
+    errors = []
+
+    async def boom(event):
+        raise RuntimeError("boom")
+
+    async def main():
+        executor = HandlerExecutor()
+        await executor.submit("a", boom, None, on_error=errors.append)
+        await executor.drain()
+        return executor.metrics()
+
+    metrics = asyncio.run(main())
+
+    assert metrics["a"]["failed"] == 1
+    assert isinstance(errors[0], RuntimeError)
@@ -0,0 +1,128 @@
+"""Tests for the local event journal and replay."""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.codec import JsonCodec
+from app.control_plane.events.emitter import Emitter
+from app.control_plane.events.journal import OFFSET_HEADER, Journal
+from app.control_plane.events.loader import Loader, subject_matches
+from app.control_plane.events.memory_bus import InMemoryBus
+
+
+def test_append_read_and_reopen(tmp_path):
+    journal = Journal(str(tmp_path))
+    offsets = [journal.append("file.created", b"payload-%d" % i) for i in range(3)]
+    journal.close()
+
+    journal = Journal(str(tmp_path))
+    records = list(journal.read(1))
+
+    assert offsets == [0, 1, 2]
+    assert [(r.offset, r.payload) for r in records] == [
+        (1, b"payload-1"),
+        (2, b"payload-2"),
+    ]
+    assert records[0].subject == "file.created" and records[0].codec == "json"
+    assert journal.append("file.created", b"next") == 3
+
+
+def test_torn_record_is_dropped_on_open(tmp_path):
+    journal = Journal(str(tmp_path))
+    journal.append("s", b"kept")
+    journal.append("s", b"torn")
+    journal.close()
+    (path,) = [p for p in tmp_path.iterdir() if p.suffix == ".seg"]
+    data = bytearray(path.read_bytes())
+    data[data.index(b"torn")] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    journal = Journal(str(tmp_path))
+
+    assert [r.payload for r in journal.read()] == [b"kept"]
+    assert journal.append("s", b"again") == 1
+
+
+def test_segments_roll_and_compact_behind_checkpoints(tmp_path):
+    journal = Journal(str(tmp_path), segment_bytes=128)
+    for _ in range(10):
+        journal.append("s", b"x" * 40)
+    segments = len([n for n in os.listdir(tmp_path) if n.endswith(".seg")])
+
+    journal.commit("a", 6)
+    journal.commit("b", 9)
+    removed = journal.compact()
+
+    assert segments > 2
+    assert removed > 0 and journal.first_offset <= 6
+    assert [r.offset for r in journal.read(0)][-1] == 9
+    journal.close()
+    assert Journal(str(tmp_path)).checkpoint("a") == 6
+
+
+def test_subject_matches():
+    assert subject_matches("file.created", "file.created")
+    assert subject_matches("file.*", "file.created")
+    assert subject_matches("file.>", "file.created.x")
+    assert not subject_matches("file.*", "file.created.x")
+    assert not subject_matches("spec.>", "file.created")
+
+
+def test_restart_replays_only_unhandled_events(tmp_path):
+    def event(i):
+        return EchoEvent(name="file.created", source="test", payload={"i": i})
+
+    async def first_run():
+        journal = Journal(str(tmp_path))
+        bus = InMemoryBus()
+        emitter = Emitter(bus, journal=journal)
+        loader = Loader(bus, journal=journal)
+        handled = []
+
+        async def handler(e):
+            handled.append(e.payload["i"])
+
+        await loader.register_handler("file.created", handler)
+        for i in range(3):
+            await emitter.publish("file.created", event(i))
+        await bus.flush()
+        await loader.unregister_all()
+        # Emitted after the handler went away, e.g. just before a crash
+        await emitter.publish("file.created", event(3))
+        journal.close()
+        return handled
+
+    async def second_run():
+        journal = Journal(str(tmp_path))
+        loader = Loader(InMemoryBus(), journal=journal)
+        replayed = []
+
+        async def handler(e):
+            replayed.append(e.payload["i"])
+
+        await loader.register_handler("file.created", handler)
+        await loader.replay()
+        return replayed, journal.checkpoint("file.created")
+
+    assert asyncio.run(first_run()) == [0, 1, 2]
+    assert asyncio.run(second_run()) == ([3], 4)
+
+
+def test_invalid_offset_header_is_ignored(tmp_path):
+    handled = []
+
+    async def handler(event):
+        handled.append(event)
+
+    event = EchoEvent(name="file.modified", source="test", payload={"src": "a"})
+    loader = Loader(nats_client=None, journal=Journal(str(tmp_path)))
+    for value in ("junk", "-3"):
+        msg = SimpleNamespace(
+            data=JsonCodec().encode(event), headers={OFFSET_HEADER: value}
+        )
+        asyncio.run(loader._dispatch("file.modified", handler, msg))
+
+    assert len(handled) == 2
+    assert loader.journal.checkpoint("file.modified") == 0
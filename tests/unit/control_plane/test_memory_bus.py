@@ -0,0 +1,94 @@
+"""Tests for the in-process event bus."""
+
+import asyncio
+
+import pytest
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.emitter import Emitter
+from app.control_plane.events.loader import Loader
+from app.control_plane.events.memory_bus import InMemoryBus
+
+
+def test_wildcards_follow_nats_rules():
+    async def main():
+        bus = InMemoryBus()
+        got = {}
+        for pattern in ("file.created", "file.*", "file.>", ">", "spec.*"):
+
+            async def handler(msg, pattern=pattern):
+                got.setdefault(pattern, []).append(msg.subject)
+
+            await bus.observe(pattern, handler)
+        for subject in ("file.created", "file.a.b", "spec", "spec.changed"):
+            await bus.publish(subject, b"x")
+        await bus.flush()
+        await bus.unsubscribe_all()
+        return got
+
+    got = asyncio.run(main())
+
+    assert got["file.created"] == ["file.created"]
+    assert got["file.*"] == ["file.created"]
+    assert got["file.>"] == ["file.created", "file.a.b"]
+    assert got[">"] == ["file.created", "file.a.b", "spec", "spec.changed"]
+    assert got["spec.*"] == ["spec.changed"]
+
+
+def test_invalid_subjects_are_rejected():
+    async def main():
+        bus = InMemoryBus()
+        with pytest.raises(ValueError):
+            await bus.observe("a.>.b", print)
+        with pytest.raises(ValueError):
+            await bus.observe("a..b", print)
+
+    asyncio.run(main())
+
+
+def test_full_queue_blocks_publisher_and_order_is_kept():
+    async def main():
+        bus = InMemoryBus(max_pending=2)
+        release = asyncio.Event()
+        seen = []
+
+        async def slow(msg):
+            await release.wait()
+            seen.append(msg.data)
+
+        await bus.subscribe_event("s", slow)
+        for i in range(3):
+            await bus.publish("s", str(i).encode())
+        publisher = asyncio.create_task(bus.publish("s", b"3"))
+        await asyncio.sleep(0.01)
+        blocked = not publisher.done()
+        release.set()
+        await publisher
+        await bus.flush()
+        await bus.unsubscribe_all()
+        return blocked, seen
+
+    blocked, seen = asyncio.run(main())
+
+    assert blocked
+    assert seen == [b"0", b"1", b"2", b"3"]
+
+
+def test_events_reach_loader_handlers_without_serialisation():
+    async def main():
+        bus = InMemoryBus()
+        received = []
+
+        async def handler(event):
+            received.append(event)
+
+        await Loader(bus).register_handler("file.created", handler)
+        event = EchoEvent(name="file.created", source="test", payload={"src": "x"})
+        await Emitter(bus).publish("file.created", event)
+        await bus.flush()
+        await bus.unsubscribe_all()
+        return event, received
+
+    event, received = asyncio.run(main())
+
+    assert received == [event] and received[0] is event
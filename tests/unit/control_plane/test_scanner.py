@@ -0,0 +1,116 @@
+"""Tests for the stat-snapshot tree scanner."""
+
+import os
+import time
+
+from app.common.models.watcher import EventKind
+from app.control_plane.watcher.coalescer import EventCoalescer
+from app.control_plane.watcher.manager import WatcherManager
+from app.control_plane.watcher.scanner import TreeScanner
+
+
+def touch(path, content="x"):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def bump(path, content):
+    # Same-second writes can share an mtime; size still differs
+    touch(path, content)
+    stamp = time.time_ns() + 10**9
+    os.utime(path, ns=(stamp, stamp))
+
+
+def relative(changes, root):
+    return sorted((kind.name, os.path.relpath(path, root)) for kind, path in changes)
+
+
+def test_reports_created_modified_and_deleted_files(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "old").mkdir()
+    touch(tmp_path / "a" / "keep.yaml")
+    touch(tmp_path / "a" / "edit.yaml")
+    touch(tmp_path / "a" / "gone.yaml")
+    touch(tmp_path / "old" / "x.yaml")
+    scanner = TreeScanner(str(tmp_path), workers=2)
+
+    assert scanner.scan() == []  # the first scan only builds the index
+    assert len(scanner) == 4
+
+    bump(tmp_path / "a" / "edit.yaml", "changed")
+    os.remove(tmp_path / "a" / "gone.yaml")
+    touch(tmp_path / "a" / "new.yaml")
+    (tmp_path / "b").mkdir()
+    touch(tmp_path / "b" / "nested.yaml")
+    os.remove(tmp_path / "old" / "x.yaml")
+    os.rmdir(tmp_path / "old")
+
+    assert relative(scanner.scan(), tmp_path) == [
+        ("CREATED", "a/new.yaml"),
+        ("CREATED", "b/nested.yaml"),
+        ("DELETED", "a/gone.yaml"),
+        ("DELETED", "old/x.yaml"),
+        ("MODIFIED", "a/edit.yaml"),
+    ]
+    assert scanner.scan() == []
+    scanner.close()
+
+
+def test_only_changed_directories_are_listed(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        touch(tmp_path / name / "spec.yaml")
+    scanner = TreeScanner(str(tmp_path), workers=2, stat_files=False)
+    scanner.scan()
+    listed = scanner.stats["listed"]
+
+    bump(tmp_path / "a" / "spec.yaml", "in place")
+    touch(tmp_path / "b" / "added.yaml")
+    changes = scanner.scan()
+
+    # In-place writes need stat_files; the new file changed b's mtime
+    assert relative(changes, tmp_path) == [("CREATED", "b/added.yaml")]
+    assert scanner.stats["listed"] - listed == 1
+    scanner.close()
+
+
+def test_saved_index_reports_changes_made_while_stopped(tmp_path):
+    root = tmp_path / "tree"
+    root.mkdir()
+    touch(root / "spec.yaml")
+    index = str(tmp_path / "index")
+    scanner = TreeScanner(str(root), index_path=index)
+    scanner.scan()
+    scanner.save()
+    scanner.close()
+
+    bump(root / "spec.yaml", "edited offline")
+    touch(root / "more.yaml")
+    scanner = TreeScanner(str(root), index_path=index)
+
+    assert scanner.loaded
+    assert relative(scanner.scan(), root) == [
+        ("CREATED", "more.yaml"),
+        ("MODIFIED", "spec.yaml"),
+    ]
+    scanner.close()
+
+
+def test_manager_scan_backend_feeds_the_coalescer(tmp_path):
+    root = tmp_path / "echoes"
+    root.mkdir()
+    batches = []
+    coalescer = EventCoalescer(batches.extend, debounce=0, max_wait=0)
+    manager = WatcherManager(coalescer=coalescer, backend="scan", scan_interval=0.02)
+    manager.register_path(str(root))
+    try:
+        manager.start_one("echoes")
+        time.sleep(0.1)
+        touch(root / "spec.yaml")
+        deadline = time.monotonic() + 5
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        manager.stop_all()
+
+    assert batches == [(EventKind.CREATED.subject, str(root / "spec.yaml"))]
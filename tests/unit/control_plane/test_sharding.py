@@ -0,0 +1,123 @@
+"""Tests for queue groups and path-sharded subscriptions."""
+
+import asyncio
+import json
+
+from app.common.models.echo_event import EchoEvent
+from app.control_plane.events.emitter import Emitter
+from app.control_plane.events.memory_bus import InMemoryBus
+from app.control_plane.events.sharding import (
+    MEMBERS_SUBJECT,
+    ShardCoordinator,
+    owner,
+    partition_for,
+)
+
+
+class Msg:
+    def __init__(self, data):
+        self.data = data
+
+
+class RecordingClient:
+    def __init__(self):
+        self.subscribed = {}
+        self.published = []
+
+    async def subscribe_event(self, event, handler, queue=""):
+        self.subscribed[event] = queue
+
+    async def unsubscribe_event(self, event, drain=False):
+        del self.subscribed[event]
+
+    async def observe(self, pattern, handler):
+        pass
+
+    async def publish(self, subject, data, headers=None):
+        self.published.append((subject, json.loads(data)))
+
+
+def test_partitions_are_stable_and_rendezvous_moves_little():
+    assert partition_for("echoes/a.yaml", 64) == partition_for("echoes/a.yaml", 64)
+
+    before = {p: owner(p, ["w1", "w2", "w3"]) for p in range(256)}
+    after = {p: owner(p, ["w1", "w2", "w3", "w4"]) for p in range(256)}
+    moved = [p for p in before if before[p] != after[p]]
+
+    # Only partitions won by the newcomer move, about a quarter of them
+    assert all(after[p] == "w4" for p in moved)
+    assert 32 < len(moved) < 96
+
+
+def test_queue_group_members_take_turns_on_the_memory_bus():
+    got = {"a": [], "b": [], "all": []}
+
+    def collect(name):
+        async def handler(msg):
+            got[name].append(msg.data)
+
+        return handler
+
+    async def main():
+        bus = InMemoryBus()
+        await bus.subscribe_event("file.*", collect("a"), queue="w")
+        await bus.subscribe_event("file.>", collect("b"), queue="w")
+        await bus.subscribe_event("file.created", collect("all"))
+        for i in range(4):
+            await bus.publish("file.created", str(i).encode())
+        await bus.flush()
+
+    asyncio.run(main())
+
+    assert got["a"] == [b"0", b"2"] and got["b"] == [b"1", b"3"]
+    assert len(got["all"]) == 4
+
+
+def test_coordinator_hands_shards_over_once_the_new_owner_is_alive():
+    async def main():
+        client = RecordingClient()
+        shards = ShardCoordinator(client, partitions=16, member_id="w1", grace=0.01)
+        await shards.add_subject("file.created", None)
+        shards._started = True
+        await shards.rebalance()
+        alone = set(client.subscribed)
+
+        await shards._on_member(Msg(json.dumps({"member": "w2", "state": "join"})))
+        await asyncio.sleep(0.05)
+        # w2 has not subscribed to its slice yet, so w1 keeps serving it
+        joining = set(client.subscribed)
+        await shards._on_member(Msg(json.dumps({"member": "w2", "state": "alive"})))
+        await asyncio.sleep(0.5)
+        return alone, joining, set(client.subscribed), shards, client
+
+    alone, joining, after, shards, client = asyncio.run(main())
+
+    assert alone == {f"file.created.{p}" for p in range(16)}
+    assert joining == alone
+    assert after == {f"file.created.{p}" for p in shards.owned}
+    assert shards.owned == {p for p in range(16) if owner(p, ["w1", "w2"]) == "w1"}
+    assert (MEMBERS_SUBJECT, {"member": "w1", "state": "alive"}) in client.published
+
+
+def test_emitter_routes_file_events_to_their_shard():
+    client = RecordingClient()
+    emitter = Emitter(client, partitions=8)
+    subjects = []
+
+    async def publish(subject, data, headers=None):
+        subjects.append(subject)
+
+    client.publish = publish
+    event = EchoEvent(name="file.created", source="t", payload={"src": "echoes/a.yaml"})
+    changed = EchoEvent(name="spec.changed", source="t", payload={"path": "x.yaml"})
+
+    async def main():
+        await emitter.publish("file.created", event)
+        await emitter.publish("spec.changed", changed)
+
+    asyncio.run(main())
+
+    assert subjects == [
+        f"file.created.{partition_for('echoes/a.yaml', 8)}",
+        "spec.changed",
+    ]
@@ -0,0 +1,55 @@
+"""Tests for WatcherManager observer scheduling."""
+
+from app.control_plane.watcher import manager as manager_module
+from app.control_plane.watcher.manager import WatcherManager
+
+
+def test_shared_pool_schedules_and_unschedules_individual_watches(tmp_path):
+    roots = []
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        roots.append(str(tmp_path / name))
+
+    manager = WatcherManager(observer_pool_size=2)
+    for root in roots:
+        manager.register_path(root)
+    try:
+        for name in ("a", "b", "c"):
+            manager.start_one(name)
+
+        assert len(manager._pool) == 2
+        assert manager.observers == {}
+        assert sum(len(o.emitters) for o in manager._pool) == 3
+
+        observer = manager._watches["b"][0]
+        manager.stop_one("b")
+        assert "b" not in manager._watches
+        assert observer.is_alive()
+        assert sum(len(o.emitters) for o in manager._pool) == 2
+    finally:
+        manager.stop_all()
+
+    assert manager._pool == []
+
+
+def test_warns_once_when_inotify_instances_run_low(tmp_path, monkeypatch, capsys):
+    usage = [(10, 128)]
+    monkeypatch.setattr(manager_module, "_inotify_usage", lambda: usage[0])
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+
+    manager = WatcherManager(observer_pool_size=1)
+    try:
+        manager.register_path(str(tmp_path / "a"))
+        manager.start_one("a")
+        assert "Warning" not in capsys.readouterr().out
+
+        usage[0] = (115, 128)
+        for name in ("b", "c"):
+            manager.register_path(str(tmp_path / name))
+            manager.start_one(name)
+        out = capsys.readouterr().out
+        assert out.count("115 of 128 inotify instances") == 1
+        assert "scan" in out
+    finally:
+        manager.stop_all()
@@ -0,0 +1,51 @@
+"""Tests for trie-based watcher routing."""
+
+import pytest
+
+from app.common.models.watcher import WatcherConfig
+from app.control_plane.watcher.registry import WatcherRegistry
+
+
+def make_registry(*roots):
+    registry = WatcherRegistry()
+    for name, path in roots:
+        registry.add(WatcherConfig(name=name, watch_path=path))
+    return registry
+
+
+def test_longest_prefix_wins():
+    registry = make_registry(("tenants", "/srv/tenants"), ("acme", "/srv/tenants/acme"))
+
+    assert registry.match("/srv/tenants/acme/echo.yaml").name == "acme"
+    assert registry.match("/srv/tenants/other/echo.yaml").name == "tenants"
+    assert registry.match("/srv/elsewhere/echo.yaml") is None
+
+
+def test_sibling_with_shared_prefix_is_not_matched():
+    registry = make_registry(("echoes", "/srv/echoes"))
+
+    assert registry.match("/srv/echoes2/echo.yaml") is None
+    assert registry.match("/srv/echoes/echo.yaml").name == "echoes"
+
+
+def test_relative_paths_are_normalised(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = make_registry(("echoes", "echoes"))
+
+    assert registry.match(str(tmp_path / "echoes" / "a.yaml")).name == "echoes"
+    assert registry.match("./echoes/sub/../a.yaml").name == "echoes"
+
+
+def test_duplicates_are_rejected_and_remove_prunes():
+    registry = make_registry(("a", "/srv/a"), ("b", "/srv/a/b"))
+
+    with pytest.raises(ValueError):
+        registry.add(WatcherConfig(name="a", watch_path="/srv/c"))
+    with pytest.raises(ValueError):
+        registry.add(WatcherConfig(name="c", watch_path="/srv/a/"))
+
+    registry.remove("b")
+    assert registry.match("/srv/a/b/x.yaml").name == "a"
+    registry.remove("a")
+    assert registry.match("/srv/a/x.yaml") is None
+    assert len(registry) == 0
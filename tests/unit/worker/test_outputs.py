@@ -0,0 +1,116 @@
+"""Tests for spilling step outputs to the blob store."""
+
+import asyncio
+import os
+
+from app.worker.outputs import BlobStore, OutputHandle
+from app.worker.scheduler import FAILED, PlanScheduler
+from tests.fixtures.helpers import make_echo
+
+
+def test_large_values_are_stored_once_and_removed_with_the_last_handle(tmp_path):
+    store = BlobStore(str(tmp_path), inline_bytes=8)
+
+    async def adopt():
+        return [await store.adopt(v) for v in (b"small", b"x" * 100, b"x" * 100)]
+
+    small, first, second = asyncio.run(adopt())
+    assert small == b"small"
+    assert isinstance(first, OutputHandle) and first == second
+    assert os.listdir(tmp_path) == [first.digest]
+    with first.view() as view:
+        assert view[:3] == b"xxx" and len(view) == 100
+    assert [len(w) for w in first.windows(64)] == [100]
+
+    first.release()
+    assert os.path.exists(second.path)
+    second.release()
+    assert os.listdir(tmp_path) == [] and store.disk_bytes == 0
+
+
+def test_streamed_output_feeds_the_next_step_in_chunks(tmp_path):
+    store = BlobStore(str(tmp_path), inline_bytes=16, chunk_bytes=64)
+    sizes = []
+
+    async def produce(args):
+        for _ in range(100):
+            yield b"abcdefghij"
+
+    async def consume(args):
+        handle = args["data"]
+        async for chunk in handle.chunks():
+            sizes.append(len(chunk))
+        return "s" * 20
+
+    echo = make_echo(
+        [
+            {"id": "produce", "use": "produce"},
+            {
+                "id": "consume",
+                "use": "consume",
+                "with": {"data": "${{ produce.output }}"},
+            },
+        ],
+        ["produce", "consume"],
+        returns={"text": "got ${{ consume.output }}"},
+    )
+    scheduler = PlanScheduler({"produce": produce, "consume": consume}, store=store)
+    result = asyncio.run(scheduler.run(echo, {}))
+
+    assert result.ok and sum(sizes) == 1000 and max(sizes) == 64
+    assert result.returns == {"text": "got " + "s" * 20}
+    assert len(store) == 2
+    result.release()
+    assert len(store) == 0
+
+
+def test_exceeding_the_disk_budget_fails_the_step(tmp_path):
+    store = BlobStore(str(tmp_path), inline_bytes=0, max_disk_bytes=50)
+
+    def produce(args):
+        return (b"x" * 20 for _ in range(5))
+
+    echo = make_echo([{"id": "big", "use": "produce"}], ["produce"])
+    result = asyncio.run(PlanScheduler({"produce": produce}, store=store).run(echo, {}))
+
+    assert result.status == {"big": FAILED}
+    assert "full" in result.errors["big"]
+    assert os.listdir(tmp_path) == [] and store.disk_bytes == 0
+
+
+def test_outputs_past_text_bytes_are_not_embedded_in_strings(tmp_path):
+    store = BlobStore(str(tmp_path), inline_bytes=8, text_bytes=32)
+    prompts = []
+
+    def produce(args):
+        return "x" * args["n"]
+
+    def prompt(args):
+        prompts.append(args["prompt"])
+        return len(args["prompt"])
+
+    def run(n):
+        echo = make_echo(
+            [
+                {"id": "produce", "use": "produce", "with": {"n": n}},
+                {
+                    "id": "prompt",
+                    "use": "prompt",
+                    "with": {"prompt": "Summarise: ${{ produce.output }}"},
+                },
+            ],
+            ["produce", "prompt"],
+        )
+        scheduler = PlanScheduler({"produce": produce, "prompt": prompt}, store=store)
+        return asyncio.run(scheduler.run(echo, {}))
+
+    small = run(32)
+    assert small.ok and prompts == ["Summarise: " + "x" * 32]
+    small.release()
+
+    large = run(33)
+    assert large.status["prompt"] == FAILED
+    assert "text_bytes" in large.errors["prompt"]
+    assert isinstance(large.outputs["produce"], OutputHandle)
+    large.release()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,132 @@
+"""Tests for incremental spec reconciliation in the spec worker."""
+
+import asyncio
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.common.models.echo_event import EchoEvent
+from app.common.utils.capability_index import CapabilityIndex
+from app.common.utils.spec_registry import SpecRegistry
+from app.control_plane.events.codec import JsonCodec
+from app.control_plane.events.dedup import SeenSet
+from app.control_plane.events.loader import Loader
+from app.worker import spec_worker
+
+ECHO_YAML = Path(__file__).parents[3] / "echoes" / "echo.yaml"
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    events = []
+
+    async def sink(event):
+        events.append(event)
+
+    monkeypatch.setattr(spec_worker, "registry", SpecRegistry())
+    monkeypatch.setattr(spec_worker, "accepted", {})
+    monkeypatch.setattr(spec_worker, "change_sink", sink)
+    return events
+
+
+def test_edits_emit_compact_change_sets(tmp_path, worker):
+    spec = tmp_path / "echo.yaml"
+    shutil.copy(ECHO_YAML, spec)
+    first = asyncio.run(spec_worker.reload(str(spec)))
+
+    spec.write_text(spec.read_text().replace("Analyze a public", "Analyse a public"))
+    second = asyncio.run(spec_worker.reload(str(spec)))
+
+    assert [e.payload["changes"] for e in worker] == [
+        worker[0].payload["changes"],
+        {"header": ["description"]},
+    ]
+    assert "steps" in worker[0].payload["changes"]
+    assert second.compiled is first.compiled
+
+    spec.write_text(spec.read_text() + "\n# comment only\n")
+    asyncio.run(spec_worker.reload(str(spec)))
+    assert len(worker) == 2
+
+
+def test_input_type_edit_emits_a_change_set(tmp_path, worker, monkeypatch):
+    monkeypatch.setattr(spec_worker, "capabilities", CapabilityIndex())
+    spec = tmp_path / "echo.yaml"
+    shutil.copy(ECHO_YAML, spec)
+    first = asyncio.run(spec_worker.reload(str(spec)))
+
+    spec.write_text(spec.read_text().replace("type: string", "type: integer", 1))
+    second = asyncio.run(spec_worker.reload(str(spec)))
+
+    assert worker[-1].payload["changes"] == {"inputs": {"changed": ["url"]}}
+    assert second.compiled is first.compiled
+    assert spec_worker.capabilities.find(input_type="integer") == [str(spec)]
+
+
+def test_unknown_tools_are_rejected(tmp_path, worker):
+    spec = tmp_path / "echo.yaml"
+    spec.write_text(ECHO_YAML.read_text().replace("llm.summarize", "llm.unknown"))
+
+    assert asyncio.run(spec_worker.reload(str(spec))) is None
+    assert spec_worker.accepted == {}
+    assert worker == []
+
+
+def test_capability_index_follows_edits(tmp_path, worker, monkeypatch):
+    monkeypatch.setattr(spec_worker, "capabilities", CapabilityIndex())
+    spec = tmp_path / "echo.yaml"
+    shutil.copy(ECHO_YAML, spec)
+    asyncio.run(spec_worker.reload(str(spec)))
+    assert spec_worker.capabilities.find(tool="git.clone") == [str(spec)]
+
+    spec.write_text(spec.read_text().replace("read-only", "write"))
+    asyncio.run(spec_worker.reload(str(spec)))
+    assert spec_worker.capabilities.find(network="read-only") == []
+    assert spec_worker.capabilities.find(network="write", input="url") == [str(spec)]
+
+    spec.unlink()
+    event = EchoEvent(name="file.modified", source="test", payload={"src": str(spec)})
+    asyncio.run(spec_worker.handle_file_modified(event))
+    assert len(spec_worker.capabilities) == 0
+
+
+def test_rejected_spec_fails_the_event_so_it_can_be_retried(tmp_path, worker):
+    spec = tmp_path / "echo.yaml"
+    spec.write_text("version: [not a spec")
+    event = EchoEvent(name="file.modified", source="test", payload={"src": str(spec)})
+
+    with pytest.raises(ValueError):
+        asyncio.run(spec_worker.handle_file_modified(event))
+
+    async def deliver_twice():
+        loader = Loader(nats_client=None, dedup=SeenSet())
+        msg = SimpleNamespace(data=JsonCodec().encode(event), headers=None)
+        for _ in range(2):
+            await loader._dispatch(
+                "file.modified", spec_worker.handle_file_modified, msg
+            )
+        return loader
+
+    loader = asyncio.run(deliver_twice())
+    assert loader.dedup.stats["hits"] == 0
+    assert loader.dedup.stats["misses"] == 2
+
+
+def test_deleted_spec_is_forgotten(tmp_path, worker, monkeypatch):
+    monkeypatch.setattr(spec_worker, "capabilities", CapabilityIndex())
+    spec = tmp_path / "echo.yaml"
+    shutil.copy(ECHO_YAML, spec)
+    asyncio.run(spec_worker.reload(str(spec)))
+    event = EchoEvent(name="file.deleted", source="test", payload={"src": str(spec)})
+
+    asyncio.run(spec_worker.handle_file_deleted(event))
+    # The file still exists, so the event is stale and ignored
+    assert str(spec) in spec_worker.accepted
+
+    spec.unlink()
+    asyncio.run(spec_worker.handle_file_deleted(event))
+    assert spec_worker.accepted == {}
+    assert len(spec_worker.capabilities) == 0
+    assert str(spec) not in spec_worker.registry
@@ -0,0 +1,97 @@
+"""Tests for the tool result cache."""
+
+import asyncio
+import os
+import time
+
+from app.common.models.echo import Echo
+from app.worker.result_cache import MISSING, ResultCache, pure_tool
+from app.worker.scheduler import PlanScheduler
+from tests.fixtures.helpers import FakeClock
+
+
+def test_key_ignores_argument_order_and_includes_version():
+    key = ResultCache.key
+
+    assert key("t", "1", {"a": 1, "b": 2}) == key("t", "1", {"b": 2, "a": 1})
+    assert key("t", "1", {"a": 1}) != key("t", "2", {"a": 1})
+    assert key("t", "1", {"a": object()}) is None
+
+
+def test_ttl_and_lru_eviction():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, max_entries=2, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)  # evicts b, the least recently used
+
+    assert cache.get("b") is MISSING
+    clock.now = 11
+    assert cache.get("a") is MISSING
+    assert cache.stats["evictions"] == 1
+    assert cache.stats["expirations"] == 1
+
+
+def test_large_results_spill_to_disk(tmp_path):
+    cache = ResultCache(directory=str(tmp_path), spill_bytes=100)
+    cache.put("small", "x")
+    cache.put("large", "y" * 1000)
+
+    assert os.listdir(tmp_path) == ["large"]
+    assert cache.get("large") == "y" * 1000
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_spilled_results_survive_a_restart_within_limits(tmp_path):
+    first = ResultCache(directory=str(tmp_path), spill_bytes=10)
+    for key in ("old", "mid", "new"):
+        first.put(key, key * 100)
+    (tmp_path / "partial.tmp").write_bytes(b"x")
+    now = time.time()
+    os.utime(tmp_path / "old", (now - 7200, now - 7200))
+    os.utime(tmp_path / "mid", (now - 60, now - 60))
+
+    size = os.path.getsize(tmp_path / "new")
+    clock = FakeClock()
+    second = ResultCache(
+        directory=str(tmp_path), spill_bytes=10, max_disk_bytes=size, clock=clock
+    )
+
+    # "old" outlived the TTL and "mid" is the oldest past the disk limit
+    assert sorted(os.listdir(tmp_path)) == ["new"]
+    assert second.get("new") == "new" * 100
+    clock.now = 3600
+    assert second.get("new") is MISSING
+    assert os.listdir(tmp_path) == []
+
+
+def test_scheduler_reuses_results_of_pure_tools_only():
+    calls = {"pure": 0, "impure": 0}
+
+    @pure_tool(version="1")
+    async def pure(args):
+        calls["pure"] += 1
+        return {"n": args["n"]}
+
+    async def impure(args):
+        calls["impure"] += 1
+
+    echo = Echo(
+        version="0.1",
+        capability="test",
+        description="test",
+        permissions={"network": "none", "filesystem": "none", "tools": ["p", "i"]},
+        plan=[{"id": "a", "use": "p", "with": {"n": 1}}, {"id": "b", "use": "i"}],
+        returns={},
+    )
+    cache = ResultCache()
+    scheduler = PlanScheduler({"p": pure, "i": impure}, cache=cache)
+
+    for _ in range(3):
+        result = asyncio.run(scheduler.run(echo, {}))
+
+    assert result.outputs["a"] == {"n": 1}
+    assert calls == {"pure": 1, "impure": 3}
+    assert cache.stats["hits"] == 2
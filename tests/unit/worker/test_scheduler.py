@@ -0,0 +1,103 @@
+"""Tests for the plan step scheduler."""
+
+import asyncio
+
+import pytest
+
+from app.worker.scheduler import CANCELLED, FAILED, OK, PlanScheduler
+from tests.fixtures.helpers import make_echo
+
+
+def sleeper(delay, log, value=None):
+    async def tool(args):
+        log.append(("start", args.get("name")))
+        await asyncio.sleep(delay)
+        return value if value is not None else args
+
+    return tool
+
+
+def test_independent_steps_overlap_and_output_is_ordered():
+    log = []
+    both_started = asyncio.Event()
+
+    async def slow(args):
+        log.append(("start", args["name"]))
+        if len(log) == 2:
+            both_started.set()
+        # Completes only if the other independent step is running too
+        await asyncio.wait_for(both_started.wait(), 1)
+        return args
+
+    echo = make_echo(
+        [
+            {"id": "a", "use": "slow", "with": {"name": "a"}},
+            {"id": "b", "use": "slow", "with": {"name": "b"}},
+            {
+                "id": "join",
+                "use": "fast",
+                "with": {"name": "join", "a": "${{ a.output.name }}"},
+            },
+        ],
+        ["slow", "fast"],
+        returns={"out": "${{ join.output.a }}"},
+    )
+    tools = {"slow": slow, "fast": sleeper(0, log)}
+
+    result = asyncio.run(PlanScheduler(tools).run(echo, {"x": "1"}))
+
+    assert result.ok
+    assert list(result.outputs) == ["a", "b", "join"]
+    assert result.returns == {"out": "a"}
+    assert log == [("start", "a"), ("start", "b"), ("start", "join")]
+
+
+def test_per_tool_cap():
+    running = peak = 0
+
+    async def tool(args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    echo = make_echo([{"id": f"s{i}", "use": "t"} for i in range(8)], ["t"])
+    scheduler = PlanScheduler({"t": tool}, per_tool={"t": 3})
+
+    assert asyncio.run(scheduler.run(echo, {})).ok
+    assert peak == 3
+
+
+def test_failure_cancels_only_dependents():
+    async def boom(args):
+        raise RuntimeError("boom")
+
+    echo = make_echo(
+        [
+            {"id": "bad", "use": "boom"},
+            {"id": "child", "use": "ok", "with": {"v": "${{ bad.output }}"}},
+            {"id": "grandchild", "use": "ok", "with": {"v": "${{ child.output }}"}},
+            {"id": "other", "use": "ok"},
+        ],
+        ["boom", "ok"],
+    )
+    tools = {"boom": boom, "ok": sleeper(0, [])}
+
+    result = asyncio.run(PlanScheduler(tools).run(echo, {}))
+
+    assert result.status == {
+        "bad": FAILED,
+        "child": CANCELLED,
+        "grandchild": CANCELLED,
+        "other": OK,
+    }
+    assert "boom" in result.errors["bad"]
+    assert result.returns is None
+
+
+def test_tools_must_be_permitted():
+    echo = make_echo([{"id": "a", "use": "secret"}], ["t"])
+
+    with pytest.raises(ValueError, match="permissions.tools"):
+        asyncio.run(PlanScheduler({"secret": sleeper(0, [])}).run(echo, {}))
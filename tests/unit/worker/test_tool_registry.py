@@ -0,0 +1,61 @@
+"""Tests for the lazily importing tool registry."""
+
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+from app.common.models.echo import Echo
+from app.worker.result_cache import is_pure
+from app.worker.tool_registry import ToolRegistry
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    (tmp_path / "echo_test_plugin.py").write_text(
+        "async def upper(args):\n    return args['s'].upper()\n"
+    )
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text(
+        "tools:\n"
+        "  text.upper:\n"
+        "    target: echo_test_plugin:upper\n"
+        "    pure: true\n"
+        "    version: '2'\n"
+        "  text.gone:\n"
+        "    target: echo_test_missing:nothing\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "echo_test_plugin", raising=False)
+    return ToolRegistry.from_manifest(str(manifest))
+
+
+def test_plugins_are_imported_on_first_use(plugin):
+    assert "text.upper" in plugin
+    assert sorted(plugin) == ["text.gone", "text.upper"]
+    assert "echo_test_plugin" not in sys.modules
+
+    tool = plugin["text.upper"]
+
+    assert "echo_test_plugin" in sys.modules
+    assert plugin.loaded == ["text.upper"]
+    assert is_pure(tool) and tool.version == "2"
+
+
+def test_broken_plugin_fails_on_lookup_only(plugin):
+    with pytest.raises(ImportError, match="text.gone"):
+        plugin["text.gone"]
+
+
+def test_builtin_manifest_covers_sample_spec():
+    data = yaml.safe_load(
+        (Path(__file__).parents[3] / "echoes" / "echo.yaml").read_text()
+    )
+    registry = ToolRegistry.builtin()
+
+    assert registry.missing(Echo(**data)) == []
+    assert registry.loaded == []
+    data["permissions"]["tools"].append("shell.exec")
+    with pytest.raises(ValueError, match="shell.exec"):
+        registry.check(Echo(**data))
@@ -0,0 +1,99 @@
+"""Tests for the built-in tool plugins."""
+
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from app.worker.scheduler import PlanResult
+from app.worker.tools import git, repo
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    """Redirects tempfile.mkdtemp() into a directory the test can inspect."""
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    return scratch
+
+
+def make_repo(path):
+    path.mkdir()
+    (path / "README.md").write_text("hello\n")
+    run = ["git", "-C", str(path), "-c", "user.name=t", "-c", "user.email=t@t"]
+    subprocess.run([*run[:3], "init", "-q"], check=True)
+    subprocess.run([*run[:3], "add", "."], check=True)
+    subprocess.run([*run, "commit", "-q", "-m", "init"], check=True)
+    return path
+
+
+def test_clone_checkout_is_removed_on_release(tmp_path, scratch):
+    origin = make_repo(tmp_path / "origin")
+
+    checkout = asyncio.run(git.clone({"repo_url": origin.as_uri()}))
+
+    assert os.path.dirname(checkout) == str(scratch)
+    assert (scratch / checkout / "README.md").read_text() == "hello\n"
+    result = PlanResult()
+    result.outputs["clone"] = checkout
+    result.release()
+    assert list(scratch.iterdir()) == []
+
+
+def test_failed_clone_leaves_nothing_behind(tmp_path, scratch):
+    with pytest.raises(RuntimeError, match="git clone failed"):
+        asyncio.run(git.clone({"repo_url": (tmp_path / "missing").as_uri()}))
+    with pytest.raises(ValueError):
+        asyncio.run(git.clone({}))
+
+    assert list(scratch.iterdir()) == []
+
+
+def test_repo_stats_counts_per_extension(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("x = 1\ny = 2\n")
+    (tmp_path / "b.py").write_text("z = 3\n")
+    (tmp_path / "Makefile").write_text("all:\n")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("ignored\n")
+
+    stats = repo.stats({"path": str(tmp_path)})
+
+    assert stats["files"] == 3
+    assert stats["metrics"][".py"] == {"files": 2, "bytes": 18, "lines": 3}
+    assert stats["metrics"]["Makefile"]["lines"] == 1
+    with pytest.raises(ValueError):
+        repo.stats({"path": str(tmp_path / "missing")})
+
+
+def test_llm_summarize_sends_prompt(monkeypatch):
+    requests = []
+
+    class FakeCompletions:
+        async def create(self, **kwargs):
+            requests.append(kwargs)
+            message = SimpleNamespace(content="short")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    class FakeClient:
+        chat = SimpleNamespace(completions=FakeCompletions())
+
+    # The plugin imports openai at module level; load a private copy of it
+    # against a fake, so neither the package nor the network is needed
+    monkeypatch.setitem(sys.modules, "openai", SimpleNamespace(AsyncOpenAI=FakeClient))
+    spec = importlib.util.find_spec("app.worker.tools.llm")
+    llm = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(llm)
+
+    assert asyncio.run(llm.summarize({"prompt": "long", "model": "m"})) == "short"
+    assert requests == [
+        {"model": "m", "messages": [{"role": "user", "content": "long"}]}
+    ]
+    with pytest.raises(ValueError):
+        asyncio.run(llm.summarize({}))